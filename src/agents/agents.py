@@ -1,19 +1,166 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from langgraph.prebuilt import create_react_agent
 
 from src.prompts import apply_prompt_template
 from src.llms.llm import get_llm_by_type
 from src.config.agents import AGENT_LLM_MAP
 
+logger = logging.getLogger(__name__)
 
-# Create agents using configured LLM types
-def create_agent(agent_name: str, agent_type: str, tools: list, prompt_template: str):
-    """Factory function to create agents with consistent configuration."""
+# Tool instances of the agent run in the current context, by tool name
+_bound_tools: ContextVar[dict[str, BaseTool]] = ContextVar("bound_tools", default={})
+
+
+class ToolProxy(BaseTool):
+    """Stands in for a tool in a cached agent.
+
+    The proxy has the name, description and arguments of the tool it was
+    created from, and forwards every call to the tool instance with the same
+    name bound to the current agent run.
+    """
+
+    @classmethod
+    def from_tool(cls, tool: BaseTool) -> "ToolProxy":
+        return cls(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            return_direct=tool.return_direct,
+        )
+
+    def _get_tool(self) -> BaseTool:
+        tool = _bound_tools.get().get(self.name)
+        if tool is None:
+            raise RuntimeError(f"Tool {self.name} is not bound to the agent run")
+        return tool
+
+    def invoke(
+        self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> Any:
+        return self._get_tool().invoke(input, config, **kwargs)
+
+    async def ainvoke(
+        self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> Any:
+        return await self._get_tool().ainvoke(input, config, **kwargs)
+
+    def _run(self, *args: Any, **kwargs: Any) -> Any:
+        raise NotImplementedError("ToolProxy forwards invoke() and ainvoke()")
+
+
+class BoundAgent:
+    """A cached compiled agent together with the tool instances of one run."""
+
+    def __init__(self, graph, tools: list[BaseTool]):
+        self.graph = graph
+        self.tools = {tool.name: tool for tool in tools}
+
+    def invoke(self, *args: Any, **kwargs: Any) -> Any:
+        token = _bound_tools.set(self.tools)
+        try:
+            return self.graph.invoke(*args, **kwargs)
+        finally:
+            _bound_tools.reset(token)
+
+    async def ainvoke(self, *args: Any, **kwargs: Any) -> Any:
+        token = _bound_tools.set(self.tools)
+        try:
+            return await self.graph.ainvoke(*args, **kwargs)
+        finally:
+            _bound_tools.reset(token)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.graph, name)
+
+
+def get_tools_fingerprint(tools: list[BaseTool]) -> str:
+    """Hash of the tool schemas the model is given, in order."""
+    schemas = [[convert_to_openai_tool(tool), tool.return_direct] for tool in tools]
+    return hashlib.sha256(
+        json.dumps(schemas, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class AgentCache:
+    """A bounded LRU cache of compiled agents."""
+
+    def __init__(self, max_size: int = 32):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._agents: OrderedDict[tuple, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key: tuple, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._agents:
+                self.hits += 1
+                self._agents.move_to_end(key)
+                return self._agents[key]
+            self.misses += 1
+        # Compile outside of the lock, a concurrent miss only compiles twice
+        agent = factory()
+        with self._lock:
+            self._agents[key] = agent
+            self._agents.move_to_end(key)
+            while len(self._agents) > self.max_size:
+                self._agents.popitem(last=False)
+        return agent
+
+    def clear(self) -> None:
+        with self._lock:
+            self._agents.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"size": len(self._agents), "hits": self.hits, "misses": self.misses}
+
+
+_agent_cache = AgentCache(max_size=int(os.getenv("AGENT_CACHE_SIZE", "32")))
+
+
+def _compile_agent(agent_name: str, model, tools: list, prompt_template: str):
+    logger.info(f"Compiling agent {agent_name} with tools: {[t.name for t in tools]}")
     return create_react_agent(
         name=agent_name,
-        model=get_llm_by_type(AGENT_LLM_MAP[agent_type]),
-        tools=tools,
+        model=model,
+        tools=[ToolProxy.from_tool(tool) for tool in tools],
         prompt=lambda state: apply_prompt_template(prompt_template, state),
     )
+
+
+# Create agents using configured LLM types
+def create_agent(agent_name: str, agent_type: str, tools: list, prompt_template: str):
+    """Factory function to create agents with consistent configuration.
+
+    Compiled agents are cached by agent, model and the schemas of their tools.
+    The cached agent runs the tool instances passed here, so per-request tools
+    such as the retriever or MCP tools do not need a new agent.
+    """
+    model = get_llm_by_type(AGENT_LLM_MAP[agent_type])
+    key = (
+        agent_name,
+        agent_type,
+        prompt_template,
+        # Identifies the model, the cached agent keeps it alive
+        id(model),
+        get_tools_fingerprint(tools),
+    )
+    graph = _agent_cache.get_or_create(
+        key, lambda: _compile_agent(agent_name, model, tools, prompt_template)
+    )
+    return BoundAgent(graph, tools)
@@ -0,0 +1,13 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from .builder import CheckpointerType, build_checkpointer
+from .memory_saver import BoundedMemorySaver
+from .sqlite_saver import SQLiteSaver
+
+__all__ = [
+    "BoundedMemorySaver",
+    "CheckpointerType",
+    "SQLiteSaver",
+    "build_checkpointer",
+]
@@ -0,0 +1,58 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import enum
+import logging
+from pathlib import Path
+from typing import Any, Dict
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+from src.config import load_yaml_config
+from src.checkpointer.memory_saver import BoundedMemorySaver
+from src.checkpointer.sqlite_saver import SQLiteSaver
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointerType(enum.Enum):
+    MEMORY = "memory"
+    SQLITE = "sqlite"
+
+
+def _get_config_file_path() -> str:
+    """Get the path to the configuration file."""
+    return str((Path(__file__).parent.parent.parent / "conf.yaml").resolve())
+
+
+def get_checkpointer_config() -> Dict[str, Any]:
+    """Get the `CHECKPOINTER` section of conf.yaml."""
+    conf = load_yaml_config(_get_config_file_path())
+    checkpointer_conf = conf.get("CHECKPOINTER", {}) or {}
+    if not isinstance(checkpointer_conf, dict):
+        raise ValueError(f"Invalid checkpointer configuration: {checkpointer_conf}")
+    return checkpointer_conf
+
+
+def build_checkpointer() -> BaseCheckpointSaver:
+    """Build the checkpointer configured in conf.yaml, in-memory by default."""
+    conf = get_checkpointer_config()
+    checkpointer_type = conf.get("type", CheckpointerType.MEMORY.value)
+    if checkpointer_type == CheckpointerType.MEMORY.value:
+        max_bytes = conf.get("max_bytes")
+        return BoundedMemorySaver(
+            max_threads=conf.get("max_threads", 1000),
+            thread_ttl=conf.get("thread_ttl", 24 * 60 * 60),
+            max_bytes=int(max_bytes) if max_bytes else None,
+            eviction_interval=float(conf.get("eviction_interval", 60)),
+        )
+    if checkpointer_type == CheckpointerType.SQLITE.value:
+        path = conf.get("path", "checkpoints.sqlite")
+        logger.info(f"Using SQLite checkpointer at {path}")
+        return SQLiteSaver(
+            path,
+            max_checkpoints_per_thread=conf.get("max_checkpoints_per_thread"),
+            batch_size=int(conf.get("batch_size", 32)),
+            flush_interval=float(conf.get("flush_interval", 1.0)),
+        )
+    raise ValueError(f"Unsupported checkpointer type: {checkpointer_type}")
@@ -0,0 +1,209 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator, Sequence
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """An in-memory checkpoint saver that evicts idle and least recently used threads.
+
+    Every access to a thread marks it as recently used. A background thread
+    runs `evict()` every `eviction_interval` seconds, which drops whole threads:
+
+    1. threads that have been idle for longer than `thread_ttl` seconds;
+    2. the least recently used threads while there are more than `max_threads`;
+    3. the least recently used threads while the serialized checkpoints take
+       more than `max_bytes` bytes.
+
+    Any limit set to `None` is not enforced. Eviction counters are available
+    from `stats()`.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_threads: Optional[int] = None,
+        thread_ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        eviction_interval: Optional[float] = 60.0,
+        serde: Optional[SerializerProtocol] = None,
+    ) -> None:
+        super().__init__(serde=serde)
+        self.max_threads = max_threads
+        self.thread_ttl = thread_ttl
+        self.max_bytes = max_bytes
+        self.evictions = {"ttl": 0, "capacity": 0, "memory": 0}
+
+        self._lock = threading.RLock()
+        # thread ID -> last access time, ordered from least to most recently used
+        self._last_access: OrderedDict[str, float] = OrderedDict()
+        self._thread_bytes: dict[str, int] = {}
+        self._total_bytes = 0
+
+        self._closed = threading.Event()
+        self._evictor = None
+        if eviction_interval:
+            self._evictor = threading.Thread(
+                target=self._evict_loop,
+                args=(eviction_interval,),
+                name="memory-saver-evictor",
+                daemon=True,
+            )
+            self._evictor.start()
+
+    def close(self) -> None:
+        """Stop the background eviction thread."""
+        self._closed.set()
+        if self._evictor:
+            self._evictor.join()
+
+    def stats(self) -> dict[str, Any]:
+        """Return the number of threads, their size in bytes and eviction counters."""
+        with self._lock:
+            return {
+                "threads": len(self._last_access),
+                "bytes": self._total_bytes,
+                "evictions": dict(self.evictions),
+            }
+
+    def _evict_loop(self, interval: float) -> None:
+        while not self._closed.wait(interval):
+            try:
+                self.evict()
+            except Exception as e:
+                logger.error(f"Failed to evict checkpoint threads: {e}")
+
+    def _touch(self, thread_id: str) -> None:
+        self._last_access[thread_id] = time.monotonic()
+        self._last_access.move_to_end(thread_id)
+
+    def _add_bytes(self, thread_id: str, size: int) -> None:
+        self._thread_bytes[thread_id] = self._thread_bytes.get(thread_id, 0) + size
+        self._total_bytes += size
+
+    def _drop_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        self._last_access.pop(thread_id, None)
+        self._total_bytes -= self._thread_bytes.pop(thread_id, 0)
+
+    def evict(self) -> int:
+        """Evict expired and least recently used threads, return how many."""
+        evicted = {"ttl": 0, "capacity": 0, "memory": 0}
+        with self._lock:
+            if self.thread_ttl is not None:
+                deadline = time.monotonic() - self.thread_ttl
+                # The LRU order is also the last access order
+                while self._last_access:
+                    thread_id, last_access = next(iter(self._last_access.items()))
+                    if last_access > deadline:
+                        break
+                    self._drop_thread(thread_id)
+                    evicted["ttl"] += 1
+            if self.max_threads is not None:
+                while len(self._last_access) > self.max_threads:
+                    self._drop_thread(next(iter(self._last_access)))
+                    evicted["capacity"] += 1
+            if self.max_bytes is not None:
+                while self._last_access and self._total_bytes > self.max_bytes:
+                    self._drop_thread(next(iter(self._last_access)))
+                    evicted["memory"] += 1
+            for reason, count in evicted.items():
+                self.evictions[reason] += count
+        total = sum(evicted.values())
+        if total:
+            logger.info(f"Evicted {total} checkpoint threads: {evicted}")
+        return total
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            # Avoid creating empty entries for unknown threads
+            if thread_id not in self.storage:
+                return None
+            self._touch(thread_id)
+            return super().get_tuple(config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        with self._lock:
+            if config:
+                thread_id = config["configurable"]["thread_id"]
+                if thread_id not in self.storage:
+                    return
+                self._touch(thread_id)
+            items = list(
+                super().list(config, filter=filter, before=before, limit=limit)
+            )
+        yield from items
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        with self._lock:
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+            checkpoint_ns = next_config["configurable"]["checkpoint_ns"]
+            saved, saved_metadata, _ = self.storage[thread_id][checkpoint_ns][
+                checkpoint["id"]
+            ]
+            size = len(saved[1]) + len(saved_metadata[1])
+            for channel, version in new_versions.items():
+                size += len(self.blobs[(thread_id, checkpoint_ns, channel, version)][1])
+            self._add_bytes(thread_id, size)
+            self._touch(thread_id)
+            return next_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        key = (
+            thread_id,
+            config["configurable"].get("checkpoint_ns", ""),
+            config["configurable"]["checkpoint_id"],
+        )
+        with self._lock:
+            before = self._writes_size(key)
+            super().put_writes(config, writes, task_id, task_path)
+            self._add_bytes(thread_id, self._writes_size(key) - before)
+            self._touch(thread_id)
+
+    def _writes_size(self, key: tuple[str, str, str]) -> int:
+        if key not in self.writes:
+            return 0
+        return sum(len(w[2][1]) for w in self.writes[key].values())
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._drop_thread(thread_id)
@@ -0,0 +1,469 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import threading
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.types import TASKS, ChannelProtocol
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+_UPSERT_CHECKPOINT = (
+    "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, "
+    "parent_checkpoint_id, type, checkpoint, metadata_type, metadata) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_UPSERT_WRITE = (
+    "INSERT OR REPLACE INTO writes (thread_id, checkpoint_ns, checkpoint_id, "
+    "task_id, idx, channel, type, value, task_path) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_INSERT_WRITE = _UPSERT_WRITE.replace("INSERT OR REPLACE", "INSERT OR IGNORE", 1)
+
+
+class SQLiteSaver(BaseCheckpointSaver[str]):
+    """A checkpoint saver that persists checkpoints to a local SQLite database.
+
+    Writes are buffered in memory and committed in batches, either when
+    `batch_size` operations are pending or every `flush_interval` seconds, so a
+    graph step never waits on the disk. Reads always flush the buffer first.
+    After each batch, only the newest `max_checkpoints_per_thread` checkpoints
+    of every thread (and checkpoint namespace) are kept.
+
+    Args:
+        path: Path of the SQLite database file, created if missing.
+        max_checkpoints_per_thread: Checkpoints to keep per thread, `None` keeps all.
+        batch_size: Number of pending writes that triggers a flush.
+        flush_interval: Maximum number of seconds a write stays in the buffer.
+        serde: The serializer to use, defaults to the LangGraph serializer.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        max_checkpoints_per_thread: Optional[int] = None,
+        batch_size: int = 32,
+        flush_interval: float = 1.0,
+        serde: Optional[SerializerProtocol] = None,
+    ) -> None:
+        super().__init__(serde=serde)
+        if max_checkpoints_per_thread is not None and max_checkpoints_per_thread < 2:
+            # The latest checkpoint needs its parent to restore pending sends
+            raise ValueError("max_checkpoints_per_thread must be at least 2")
+        self.path = path
+        self.max_checkpoints_per_thread = max_checkpoints_per_thread
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+        self._lock = threading.RLock()
+        self._pending_checkpoints: list[tuple] = []
+        self._pending_writes: list[tuple[str, tuple]] = []
+        self._closed = threading.Event()
+        self._flush_requested = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="sqlite-saver-flusher", daemon=True
+        )
+        self._flusher.start()
+
+    def __enter__(self) -> "SQLiteSaver":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "SQLiteSaver":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Flush pending writes, stop the background flusher and close the DB."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._flush_requested.set()
+        self._flusher.join()
+        with self._lock:
+            self._flush()
+            self.conn.close()
+
+    @property
+    def pending_count(self) -> int:
+        """Number of buffered operations not yet committed to disk."""
+        with self._lock:
+            return len(self._pending_checkpoints) + len(self._pending_writes)
+
+    def flush(self) -> None:
+        """Commit all buffered writes to disk."""
+        with self._lock:
+            self._flush()
+
+    def _flush_loop(self) -> None:
+        while not self._closed.is_set():
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            if self._closed.is_set():
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush checkpoints: {e}")
+
+    def _request_flush_if_needed(self) -> None:
+        if self.pending_count >= self.batch_size:
+            self._flush_requested.set()
+
+    def _flush(self) -> None:
+        if not self._pending_checkpoints and not self._pending_writes:
+            return
+        checkpoints, self._pending_checkpoints = self._pending_checkpoints, []
+        writes, self._pending_writes = self._pending_writes, []
+        touched = {(row[0], row[1]) for row in checkpoints}
+        with self.conn:
+            self.conn.executemany(_UPSERT_CHECKPOINT, checkpoints)
+            for query, row in writes:
+                self.conn.execute(query, row)
+            if self.max_checkpoints_per_thread:
+                for thread_id, checkpoint_ns in touched:
+                    self._prune(thread_id, checkpoint_ns)
+        logger.debug(f"Flushed {len(checkpoints)} checkpoints and {len(writes)} writes")
+
+    def _prune(self, thread_id: str, checkpoint_ns: str) -> None:
+        keep = (
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? "
+            "AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT ?"
+        )
+        args = (
+            thread_id,
+            checkpoint_ns,
+            thread_id,
+            checkpoint_ns,
+            self.max_checkpoints_per_thread,
+        )
+        for table in ("writes", "checkpoints"):
+            self.conn.execute(
+                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? "
+                f"AND checkpoint_id NOT IN ({keep})",
+                args,
+            )
+
+    def _load_writes(
+        self, thread_id: str, checkpoint_ns: str, checkpoint_id: str
+    ) -> list[tuple]:
+        return self.conn.execute(
+            "SELECT task_id, channel, type, value, task_path, idx FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+    def _make_tuple(self, row: tuple) -> CheckpointTuple:
+        (
+            thread_id,
+            checkpoint_ns,
+            checkpoint_id,
+            parent_checkpoint_id,
+            type_,
+            checkpoint,
+            metadata_type,
+            metadata,
+        ) = row
+        writes = self._load_writes(thread_id, checkpoint_ns, checkpoint_id)
+        sends = []
+        if parent_checkpoint_id:
+            sends = sorted(
+                (
+                    w
+                    for w in self._load_writes(
+                        thread_id, checkpoint_ns, parent_checkpoint_id
+                    )
+                    if w[1] == TASKS
+                ),
+                key=lambda w: (w[4], w[0], w[5]),
+            )
+        checkpoint_: Checkpoint = self.serde.loads_typed((type_, checkpoint))
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint_,
+                "pending_sends": [self.serde.loads_typed((w[2], w[3])) for w in sends],
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (w[0], w[1], self.serde.loads_typed((w[2], w[3]))) for w in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Get the checkpoint tuple for the config, or the latest one of the thread."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "type, checkpoint, metadata_type, metadata FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        args: tuple = (thread_id, checkpoint_ns)
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            args += (checkpoint_id,)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            self._flush()
+            row = self.conn.execute(query, args).fetchone()
+            return self._make_tuple(row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints matching the config, newest first."""
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+            "type, checkpoint, metadata_type, metadata FROM checkpoints"
+        )
+        clauses: list[str] = []
+        args: tuple = ()
+        if config:
+            clauses.append("thread_id = ?")
+            args += (config["configurable"]["thread_id"],)
+            if (
+                checkpoint_ns := config["configurable"].get("checkpoint_ns")
+            ) is not None:
+                clauses.append("checkpoint_ns = ?")
+                args += (checkpoint_ns,)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                args += (checkpoint_id,)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            args += (before_checkpoint_id,)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            self._flush()
+            rows = self.conn.execute(query, args).fetchall()
+            results = []
+            for row in rows:
+                if limit is not None and len(results) >= limit:
+                    break
+                if filter:
+                    metadata = self.serde.loads_typed((row[6], row[7]))
+                    if not all(metadata.get(k) == v for k, v in filter.items()):
+                        continue
+                results.append(self._make_tuple(row))
+        yield from results
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Buffer a checkpoint for the next batch commit."""
+        c = checkpoint.copy()
+        c.pop("pending_sends", None)  # type: ignore[misc]
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, serialized_checkpoint = self.serde.dumps_typed(c)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+        with self._lock:
+            self._pending_checkpoints.append(
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    type_,
+                    serialized_checkpoint,
+                    metadata_type,
+                    serialized_metadata,
+                )
+            )
+        self._request_flush_if_needed()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Buffer the intermediate writes of a task for the next batch commit."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, serialized_value = self.serde.dumps_typed(value)
+            rows.append(
+                (
+                    # Special channels (errors, interrupts...) overwrite earlier
+                    # writes, regular writes are only saved once
+                    _UPSERT_WRITE if channel in WRITES_IDX_MAP else _INSERT_WRITE,
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        checkpoint_id,
+                        task_id,
+                        WRITES_IDX_MAP.get(channel, idx),
+                        channel,
+                        type_,
+                        serialized_value,
+                        task_path,
+                    ),
+                )
+            )
+        with self._lock:
+            self._pending_writes.extend(rows)
+        self._request_flush_if_needed()
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes associated with a thread ID."""
+        with self._lock:
+            self._flush()
+            with self.conn:
+                self.conn.execute(
+                    "DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,)
+                )
+                self.conn.execute(
+                    "DELETE FROM writes WHERE thread_id = ?", (thread_id,)
+                )
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        # Buffering only, the disk I/O happens on the flusher thread
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        return self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: ChannelProtocol) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        next_v = current_v + 1
+        next_h = random.random()
+        return f"{next_v:032}.{next_h:016}"
@@ -21,9 +21,13 @@ class Configuration:
     max_plan_iterations: int = 1  # Maximum number of plan iterations
     max_step_num: int = 3  # Maximum number of steps in a plan
     max_search_results: int = 3  # Maximum number of search results
+    max_parallel_steps: int = 3  # Maximum number of plan steps executed at once
     mcp_settings: dict = None  # MCP settings, including dynamic loaded tools
     report_style: str = ReportStyle.ACADEMIC.value  # Report style
     enable_deep_thinking: bool = False  # Whether to enable deep thinking
+    speculative_search: bool = False  # Search while the coordinator is answering
+    research_cache: str = ""  # Reuse the "plan" or "report" of similar questions
+    stream_plan_steps: bool = False  # Send and start plan steps as they are generated
 
     @classmethod
     def from_runnable_config(
@@ -3,11 +3,37 @@
 
 import logging
 import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 
 import requests
+from requests.compat import chardet
+
+from src.utils.cancellation import get_cancel_token
 
 logger = logging.getLogger(__name__)
 
+# Bytes read between two checks of the cancellation of the run
+_CHUNK_SIZE = 16 * 1024
+# Seconds to connect, and to wait for each read, the page is rendered before
+# the server answers
+_TIMEOUT = (10, 120)
+
+# Sends the requests of cancellable crawls, whose callers wait for either the
+# response or the cancellation of their run
+_executor = ThreadPoolExecutor(thread_name_prefix="jina")
+
+
+def _close_response(future: Future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def _decode(response: requests.Response, content: bytes) -> str:
+    """Decode like `response.text`, detecting the encoding when none is sent."""
+    encoding = response.encoding or chardet.detect(content)["encoding"] or "utf-8"
+    return content.decode(encoding, errors="replace")
+
 
 class JinaClient:
     def crawl(self, url: str, return_format: str = "html") -> str:
@@ -22,5 +48,44 @@ class JinaClient:
                 "Jina API key is not set. Provide your own key to access a higher rate limit. See https://jina.ai/reader for more information."
             )
         data = {"url": url}
-        response = requests.post("https://r.jina.ai/", headers=headers, json=data)
-        return response.text
+        token = get_cancel_token()
+        if token is None:
+            response = requests.post(
+                "https://r.jina.ai/", headers=headers, json=data, timeout=_TIMEOUT
+            )
+            return response.text
+        token.raise_if_cancelled()
+        future = _executor.submit(
+            requests.post,
+            "https://r.jina.ai/",
+            headers=headers,
+            json=data,
+            stream=True,
+            timeout=_TIMEOUT,
+        )
+        answered = threading.Event()
+        future.add_done_callback(lambda _: answered.set())
+        token.add_callback(answered.set)
+        try:
+            answered.wait()
+        finally:
+            token.remove_callback(answered.set)
+        if token.cancelled:
+            # The response is dropped whenever the server answers
+            future.add_done_callback(_close_response)
+            token.raise_if_cancelled()
+        with future.result() as response:
+            # Closing the response interrupts a read waiting for the server
+            token.add_callback(response.close)
+            try:
+                chunks = []
+                for chunk in response.iter_content(_CHUNK_SIZE):
+                    token.raise_if_cancelled()
+                    chunks.append(chunk)
+            except Exception:
+                token.raise_if_cancelled()
+                raise
+            finally:
+                token.remove_callback(response.close)
+            token.raise_if_cancelled()
+            return _decode(response, b"".join(chunks))
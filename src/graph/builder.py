@@ -1,47 +1,107 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+from typing import Callable, get_args, get_origin, get_type_hints
+
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph, START, END
-from langgraph.checkpoint.memory import MemorySaver
-from src.prompts.planner_model import StepType
+from langgraph.types import Command, Send
+from langgraph.utils.runnable import RunnableCallable
+
+from src.checkpointer import build_checkpointer
+from src.config.configuration import Configuration
+from src.prompts.planner_model import StepType, get_ready_step_indices
 
 from .types import State
 from .nodes import (
     coordinator_node,
+    coordinator_node_async,
     planner_node,
+    planner_node_async,
     reporter_node,
+    reporter_node_async,
     research_team_node,
     researcher_node,
     coder_node,
     human_feedback_node,
     background_investigation_node,
+    background_investigation_node_async,
 )
 
 
-def continue_to_running_research_team(state: State):
+def _get_step_node(step) -> str | None:
+    """Return the name of the node that executes the given step."""
+    if step.step_type and step.step_type == StepType.RESEARCH:
+        return "researcher"
+    if step.step_type and step.step_type == StepType.PROCESSING:
+        return "coder"
+    return None
+
+
+def continue_to_running_research_team(state: State, config: RunnableConfig = None):
     current_plan = state.get("current_plan")
     if not current_plan or not current_plan.steps:
         return "planner"
     if all(step.execution_res for step in current_plan.steps):
         return "planner"
-    for step in current_plan.steps:
-        if not step.execution_res:
-            break
-    if step.step_type and step.step_type == StepType.RESEARCH:
-        return "researcher"
-    if step.step_type and step.step_type == StepType.PROCESSING:
-        return "coder"
-    return "planner"
+
+    # The first unexecuted step is always ready, since steps can only depend on
+    # earlier ones. Every other ready step is independent of the running ones.
+    configurable = Configuration.from_runnable_config(config)
+    max_parallel_steps = max(1, int(configurable.max_parallel_steps))
+    ready_indices = get_ready_step_indices(current_plan)[:max_parallel_steps]
+    if len(ready_indices) <= 1:
+        for step in current_plan.steps:
+            if not step.execution_res:
+                break
+        return _get_step_node(step) or "planner"
+
+    # Fan out: run every ready step in the same superstep. The research team
+    # only runs once all of them are done, so a step made ready by a fast step
+    # waits for the slowest step of the batch.
+    sends = []
+    for index in ready_indices:
+        node = _get_step_node(current_plan.steps[index])
+        if node:
+            sends.append(Send(node, {**state, "current_step_index": index}))
+    return sends or "planner"
+
+
+def _add_sync_and_async_node(
+    builder: StateGraph, node: str, func: Callable, afunc: Callable
+) -> None:
+    """Add a node running `afunc` when the graph is streamed or invoked
+    asynchronously, and `func` otherwise.
+
+    Without `afunc`, async runs execute `func` in the default thread pool,
+    holding a worker thread for the whole LLM call.
+    """
+    destinations = None
+    return_hint = get_type_hints(func).get("return")
+    if get_origin(return_hint) is Command:
+        destinations = get_args(get_args(return_hint)[0])
+    builder.add_node(
+        node,
+        RunnableCallable(func, afunc, name=node, trace=False),
+        destinations=destinations,
+    )
 
 
 def _build_base_graph():
     """Build and return the base state graph with all nodes and edges."""
     builder = StateGraph(State)
     builder.add_edge(START, "coordinator")
-    builder.add_node("coordinator", coordinator_node)
-    builder.add_node("background_investigator", background_investigation_node)
-    builder.add_node("planner", planner_node)
-    builder.add_node("reporter", reporter_node)
+    _add_sync_and_async_node(
+        builder, "coordinator", coordinator_node, coordinator_node_async
+    )
+    _add_sync_and_async_node(
+        builder,
+        "background_investigator",
+        background_investigation_node,
+        background_investigation_node_async,
+    )
+    _add_sync_and_async_node(builder, "planner", planner_node, planner_node_async)
+    _add_sync_and_async_node(builder, "reporter", reporter_node, reporter_node_async)
     builder.add_node("research_team", research_team_node)
     builder.add_node("researcher", researcher_node)
     builder.add_node("coder", coder_node)
@@ -58,9 +118,8 @@ def _build_base_graph():
 
 def build_graph_with_memory():
     """Build and return the agent workflow graph with memory."""
-    # use persistent memory to save conversation history
-    # TODO: be compatible with SQLite / PostgreSQL
-    memory = MemorySaver()
+    # use the checkpointer configured in conf.yaml to save conversation history
+    memory = build_checkpointer()
 
     # build state graph
     builder = _build_base_graph()
@@ -1,16 +1,21 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import asyncio
+import contextvars
 import json
 import logging
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Annotated, Literal
 
 from langchain_core.messages import AIMessage, HumanMessage
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from langchain_core.tools import tool
+from langgraph.config import get_stream_writer
 from langgraph.types import Command, interrupt
-from langchain_mcp_adapters.client import MultiServerMCPClient
+from pydantic import ValidationError
 
 from src.agents import create_agent
 from src.tools.search import LoggedTavilySearch
@@ -20,19 +25,43 @@ from src.tools import (
     get_retriever_tool,
     python_repl_tool,
 )
+from src.tools.mcp_session_pool import get_mcp_session_pool
 
 from src.config.agents import AGENT_LLM_MAP
 from src.config.configuration import Configuration
-from src.llms.llm import get_llm_by_type
-from src.prompts.planner_model import Plan
+from src.llms.cache import ReplayChatModel
+from src.llms.llm import get_llm_by_type, get_llm_token_limit
+from src.prompts.planner_model import (
+    Plan,
+    Step,
+    StepType,
+    get_step_dependencies,
+    parse_plan,
+)
 from src.prompts.template import apply_prompt_template
-from src.utils.json_utils import repair_json_output
+from src.utils.cancellation import CancelToken, get_cancel_token, set_cancel_token
+from src.utils.context_builder import ContextBuilder
+from src.utils.question_cache import get_question_cache
+from src.utils.json_utils import IncrementalJSONParser
 
-from .types import State
+from .types import Reset, State
 from ..config import SELECTED_SEARCH_ENGINE, SearchEngine
 
 logger = logging.getLogger(__name__)
 
+# Speculative background searches run next to the coordinator LLM call
+_speculative_executor = ThreadPoolExecutor(
+    max_workers=4, thread_name_prefix="speculative-search"
+)
+# Minimum similarity between the speculated and the handed off research topic
+SPECULATIVE_TOPIC_SIMILARITY = 0.6
+_TOPIC_TOKEN_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af]|[^\W_]+")
+
+# Share of the model context window given to findings of earlier steps
+FINDINGS_TOKEN_RATIO = 0.3
+# Share of the model context window given to observations in the report
+OBSERVATIONS_TOKEN_RATIO = 0.6
+
 
 @tool
 def handoff_to_planner(
@@ -45,46 +74,108 @@ def handoff_to_planner(
     return
 
 
-def background_investigation_node(state: State, config: RunnableConfig):
-    logger.info("background investigation node is running.")
-    configurable = Configuration.from_runnable_config(config)
-    query = state.get("research_topic")
-    background_investigation_results = None
+def _get_background_search_tool(max_search_results: int):
+    if SELECTED_SEARCH_ENGINE == SearchEngine.TAVILY.value:
+        return LoggedTavilySearch(max_results=max_search_results)
+    return get_web_search_tool(max_search_results)
+
+
+def _format_background_results(searched_content) -> str:
+    """Format the background search results for the planner."""
     if SELECTED_SEARCH_ENGINE == SearchEngine.TAVILY.value:
-        searched_content = LoggedTavilySearch(
-            max_results=configurable.max_search_results
-        ).invoke(query)
         if isinstance(searched_content, list):
-            background_investigation_results = [
+            return "\n\n".join(
                 f"## {elem['title']}\n\n{elem['content']}" for elem in searched_content
-            ]
-            return {
-                "background_investigation_results": "\n\n".join(
-                    background_investigation_results
-                )
-            }
-        else:
-            logger.error(
-                f"Tavily search returned malformed response: {searched_content}"
             )
-    else:
-        background_investigation_results = get_web_search_tool(
-            configurable.max_search_results
-        ).invoke(query)
+        logger.error(f"Tavily search returned malformed response: {searched_content}")
+        searched_content = None
+    return json.dumps(searched_content, ensure_ascii=False)
+
+
+def _search_background(query: str, max_search_results: int) -> str:
+    """Search the web for a query and format the results for the planner."""
+    searched_content = _get_background_search_tool(max_search_results).invoke(query)
+    return _format_background_results(searched_content)
+
+
+async def _search_background_async(query: str, max_search_results: int) -> str:
+    """Async version of `_search_background`."""
+    searched_content = await _get_background_search_tool(max_search_results).ainvoke(
+        query
+    )
+    return _format_background_results(searched_content)
+
+
+def background_investigation_node(state: State, config: RunnableConfig):
+    logger.info("background investigation node is running.")
+    configurable = Configuration.from_runnable_config(config)
+    query = state.get("research_topic")
     return {
-        "background_investigation_results": json.dumps(
-            background_investigation_results, ensure_ascii=False
+        "background_investigation_results": _search_background(
+            query, configurable.max_search_results
         )
     }
 
 
-def planner_node(
-    state: State, config: RunnableConfig
-) -> Command[Literal["human_feedback", "reporter"]]:
-    """Planner node that generate the full plan."""
-    logger.info("Planner generating full plan")
+async def background_investigation_node_async(state: State, config: RunnableConfig):
+    """Async version of `background_investigation_node`."""
+    logger.info("background investigation node is running.")
     configurable = Configuration.from_runnable_config(config)
-    plan_iterations = state["plan_iterations"] if state.get("plan_iterations", 0) else 0
+    query = state.get("research_topic")
+    return {
+        "background_investigation_results": await _search_background_async(
+            query, configurable.max_search_results
+        )
+    }
+
+
+def _topic_tokens(topic: str) -> set[str]:
+    return set(_TOPIC_TOKEN_PATTERN.findall(topic.lower()))
+
+
+def is_similar_topic(a: str, b: str) -> bool:
+    """Whether two research topics are close enough to share search results."""
+    tokens_a, tokens_b = _topic_tokens(a), _topic_tokens(b)
+    if not tokens_a or not tokens_b:
+        return False
+    dice = 2 * len(tokens_a & tokens_b) / (len(tokens_a) + len(tokens_b))
+    return dice >= SPECULATIVE_TOPIC_SIMILARITY
+
+
+def _uses_research_cache(configurable: Configuration) -> bool:
+    return configurable.research_cache in ("plan", "report")
+
+
+def _get_report_kind(configurable: Configuration) -> str:
+    return f"report/{configurable.report_style}"
+
+
+def _lookup_cached_plan(state: State, configurable: Configuration) -> str:
+    """The accepted plan of a similar question, empty if there is none.
+
+    Only the first plan of a run is reused, plans revised after feedback are not.
+    """
+    if not _uses_research_cache(configurable):
+        return ""
+    if state.get("plan_iterations", 0) or any(
+        getattr(message, "name", None) == "feedback" for message in state["messages"]
+    ):
+        return ""
+    return (
+        get_question_cache().lookup(
+            state.get("research_topic", ""), state.get("locale", "en-US"), "plan"
+        )
+        or ""
+    )
+
+
+def _replay(content: str):
+    """Send a cached answer to the stream of the current node."""
+    return ReplayChatModel(message=AIMessage(content=content))
+
+
+def _prepare_planner(state: State, configurable: Configuration):
+    """Build the planner messages and pick the LLM generating the plan."""
     messages = apply_prompt_template("planner", state, configurable)
 
     if state.get("enable_background_investigation") and state.get(
@@ -103,6 +194,9 @@ def planner_node(
 
     if configurable.enable_deep_thinking:
         llm = get_llm_by_type("reasoning")
+    elif AGENT_LLM_MAP["planner"] == "basic" and _streams_plan_steps(configurable):
+        # The raw JSON is streamed, to parse the steps as they are generated
+        llm = get_llm_by_type("basic").bind(response_format={"type": "json_object"})
     elif AGENT_LLM_MAP["planner"] == "basic":
         llm = get_llm_by_type("basic").with_structured_output(
             Plan,
@@ -110,37 +204,138 @@ def planner_node(
         )
     else:
         llm = get_llm_by_type(AGENT_LLM_MAP["planner"])
+    return messages, llm
 
-    # if the plan iterations is greater than the max plan iterations, return the reporter node
-    if plan_iterations >= configurable.max_plan_iterations:
-        return Command(goto="reporter")
 
-    full_response = ""
-    if AGENT_LLM_MAP["planner"] == "basic" and not configurable.enable_deep_thinking:
-        response = llm.invoke(messages)
-        full_response = response.model_dump_json(indent=4, exclude_none=True)
-    else:
-        response = llm.stream(messages)
-        for chunk in response:
-            full_response += chunk.content
+def _uses_structured_planner(configurable: Configuration) -> bool:
+    return (
+        AGENT_LLM_MAP["planner"] == "basic"
+        and not configurable.enable_deep_thinking
+        and not _streams_plan_steps(configurable)
+    )
+
+
+def _streams_plan_steps(configurable: Configuration) -> bool:
+    return configurable.stream_plan_steps is True
+
+
+def _send_plan_step(writer, index: int, step: dict) -> None:
+    """Send a step of the plan being generated to the client."""
+    writer(
+        {
+            "event": "plan_step",
+            "agent": "planner",
+            "data": {"index": index, "step": step},
+        }
+    )
+
+
+def _can_start_early(
+    state: State,
+    configurable: Configuration,
+    fields: dict,
+    index: int,
+    step: dict,
+    started: int,
+) -> bool:
+    """Whether a step can run before the rest of the plan is generated.
+
+    Only steps of auto accepted plans that depend on no other step are started,
+    at most `max_parallel_steps` of them.
+    """
+    return (
+        state.get("auto_accepted_plan") is True
+        and fields.get("has_enough_context") is False
+        and (index == 0 or step.get("depends_on") == [])
+        and started < max(1, int(configurable.max_parallel_steps))
+    )
+
+
+async def _run_plan_step(step_state: State, config: RunnableConfig):
+    step = step_state["current_plan"].steps[0]
+    if step.step_type == StepType.PROCESSING:
+        return await coder_node(step_state, config)
+    return await researcher_node(step_state, config)
+
+
+async def _start_early_step(state: State, fields: dict, index: int, step: dict) -> dict:
+    """Execute a step of the plan being generated, return its result and updates."""
+    plan_step = Step.model_validate(step)
+    agent = "coder" if plan_step.step_type == StepType.PROCESSING else "researcher"
+    logger.info(f"Starting step {index} early: {plan_step.title}, agent: {agent}")
+    locale = fields.get("locale") or state.get("locale", "en-US")
+    plan = Plan(
+        locale=locale,
+        has_enough_context=False,
+        thought=fields.get("thought", ""),
+        title=fields.get("title", ""),
+        steps=[plan_step],
+    )
+    step_state = {
+        **state,
+        "current_plan": plan,
+        "current_step_index": 0,
+        "locale": locale,
+    }
+    # The agent streams its messages under its own name, not the planner's
+    command = await RunnableLambda(_run_plan_step).ainvoke(
+        step_state, config={"run_name": agent, "metadata": {"step_agent": agent}}
+    )
+    update = command.update or {}
+    step_results = update.get("step_results") or [{"execution_res": None}]
+    return {
+        "index": index,
+        "title": plan_step.title,
+        "execution_res": step_results[0]["execution_res"],
+        "update": update,
+    }
+
+
+async def _attach_early_steps(command: Command, early_steps: list) -> Command:
+    """Wait for the steps started early and add their results to the plan update."""
+    if not early_steps:
+        return command
+    if command.goto != "human_feedback":
+        for task in early_steps:
+            task.cancel()
+        return command
+
+    early_step_results = []
+    for result in await asyncio.gather(*early_steps, return_exceptions=True):
+        if isinstance(result, BaseException):
+            logger.error(f"Step started early failed: {result}")
+            continue
+        if not result["execution_res"]:
+            continue
+        update = result.pop("update")
+        for key in ("messages", "observations", "context_tokens_saved"):
+            command.update[key] = command.update.get(key, []) + update.get(key, [])
+        early_step_results.append(result)
+    command.update["early_step_results"] = early_step_results
+    return command
+
+
+def _handle_planner_response(
+    state: State, full_response: str, plan_iterations: int
+) -> Command[Literal["human_feedback", "reporter"]]:
+    """Turn the planner response into the next step of the workflow."""
     logger.debug(f"Current state messages: {state['messages']}")
     logger.info(f"Planner response: {full_response}")
 
     try:
-        curr_plan = json.loads(repair_json_output(full_response))
-    except json.JSONDecodeError:
-        logger.warning("Planner response is not a valid JSON")
+        curr_plan = parse_plan(full_response)
+    except (json.JSONDecodeError, ValidationError):
+        logger.warning("Planner response is not a valid plan")
         if plan_iterations > 0:
             return Command(goto="reporter")
         else:
             return Command(goto="__end__")
-    if curr_plan.get("has_enough_context"):
+    if curr_plan.has_enough_context:
         logger.info("Planner response has enough context.")
-        new_plan = Plan.model_validate(curr_plan)
         return Command(
             update={
                 "messages": [AIMessage(content=full_response, name="planner")],
-                "current_plan": new_plan,
+                "current_plan": curr_plan,
             },
             goto="reporter",
         )
@@ -153,8 +348,109 @@ def planner_node(
     )
 
 
+def planner_node(
+    state: State, config: RunnableConfig
+) -> Command[Literal["human_feedback", "reporter"]]:
+    """Planner node that generate the full plan."""
+    logger.info("Planner generating full plan")
+    configurable = Configuration.from_runnable_config(config)
+    plan_iterations = state["plan_iterations"] if state.get("plan_iterations", 0) else 0
+    messages, llm = _prepare_planner(state, configurable)
+
+    # if the plan iterations is greater than the max plan iterations, return the reporter node
+    if plan_iterations >= configurable.max_plan_iterations:
+        return Command(goto="reporter")
+
+    cached_plan = _lookup_cached_plan(state, configurable)
+    if cached_plan:
+        _replay(cached_plan).invoke(messages)
+        return _handle_planner_response(state, cached_plan, plan_iterations)
+
+    full_response = ""
+    if _uses_structured_planner(configurable):
+        response = llm.invoke(messages)
+        full_response = response.model_dump_json(indent=4, exclude_none=True)
+    elif _streams_plan_steps(configurable):
+        writer = get_stream_writer()
+        parser = IncrementalJSONParser("steps")
+        index = 0
+        for chunk in llm.stream(messages):
+            full_response += chunk.content
+            for step in parser.feed(chunk.content):
+                _send_plan_step(writer, index, step)
+                index += 1
+    else:
+        response = llm.stream(messages)
+        for chunk in response:
+            full_response += chunk.content
+    return _handle_planner_response(state, full_response, plan_iterations)
+
+
+async def planner_node_async(
+    state: State, config: RunnableConfig
+) -> Command[Literal["human_feedback", "reporter"]]:
+    """Async version of `planner_node`."""
+    logger.info("Planner generating full plan")
+    configurable = Configuration.from_runnable_config(config)
+    plan_iterations = state["plan_iterations"] if state.get("plan_iterations", 0) else 0
+    messages, llm = _prepare_planner(state, configurable)
+
+    # if the plan iterations is greater than the max plan iterations, return the reporter node
+    if plan_iterations >= configurable.max_plan_iterations:
+        return Command(goto="reporter")
+
+    cached_plan = _lookup_cached_plan(state, configurable)
+    if cached_plan:
+        await _replay(cached_plan).ainvoke(messages)
+        return _handle_planner_response(state, cached_plan, plan_iterations)
+
+    full_response = ""
+    if _uses_structured_planner(configurable):
+        response = await llm.ainvoke(messages)
+        full_response = response.model_dump_json(indent=4, exclude_none=True)
+    elif _streams_plan_steps(configurable):
+        return await _astream_plan_steps(
+            state, configurable, messages, llm, plan_iterations
+        )
+    else:
+        async for chunk in llm.astream(messages):
+            full_response += chunk.content
+    return _handle_planner_response(state, full_response, plan_iterations)
+
+
+async def _astream_plan_steps(
+    state: State, configurable: Configuration, messages, llm, plan_iterations: int
+) -> Command[Literal["human_feedback", "reporter"]]:
+    """Generate the plan, sending its steps and starting the first ones early."""
+    writer = get_stream_writer()
+    parser = IncrementalJSONParser("steps")
+    early_steps = []
+    full_response = ""
+    index = 0
+    try:
+        async for chunk in llm.astream(messages):
+            full_response += chunk.content
+            for step in parser.feed(chunk.content):
+                _send_plan_step(writer, index, step)
+                if _can_start_early(
+                    state, configurable, parser.fields, index, step, len(early_steps)
+                ):
+                    early_steps.append(
+                        asyncio.create_task(
+                            _start_early_step(state, parser.fields, index, step)
+                        )
+                    )
+                index += 1
+    except BaseException:
+        for task in early_steps:
+            task.cancel()
+        raise
+    command = _handle_planner_response(state, full_response, plan_iterations)
+    return await _attach_early_steps(command, early_steps)
+
+
 def human_feedback_node(
-    state,
+    state, config: RunnableConfig = None
 ) -> Command[Literal["planner", "research_team", "reporter", "__end__"]]:
     current_plan = state.get("current_plan", "")
     # check if the plan is auto accepted
@@ -181,42 +477,102 @@ def human_feedback_node(
     plan_iterations = state["plan_iterations"] if state.get("plan_iterations", 0) else 0
     goto = "research_team"
     try:
-        current_plan = repair_json_output(current_plan)
         # increment the plan iterations
         plan_iterations += 1
-        # parse the plan
-        new_plan = json.loads(current_plan)
-        if new_plan["has_enough_context"]:
+        # parse the plan, usually already parsed by the planner
+        plan = parse_plan(current_plan)
+        if plan.has_enough_context:
             goto = "reporter"
-    except json.JSONDecodeError:
-        logger.warning("Planner response is not a valid JSON")
+    except (json.JSONDecodeError, ValidationError):
+        logger.warning("Planner response is not a valid plan")
         if plan_iterations > 1:  # the plan_iterations is increased before this check
             return Command(goto="reporter")
         else:
             return Command(goto="__end__")
 
+    if _uses_research_cache(Configuration.from_runnable_config(config)):
+        get_question_cache().store(
+            state.get("research_topic", ""), plan.locale, "plan", current_plan
+        )
+
+    # Steps executed while the plan was generated are not executed again
+    for result in state.get("early_step_results") or []:
+        index = result["index"]
+        if index < len(plan.steps) and plan.steps[index].title == result["title"]:
+            plan.steps[index].execution_res = result["execution_res"]
+
     return Command(
         update={
-            "current_plan": Plan.model_validate(new_plan),
+            "current_plan": plan,
             "plan_iterations": plan_iterations,
-            "locale": new_plan["locale"],
+            "locale": plan.locale,
+            "early_step_results": [],
         },
         goto=goto,
     )
 
 
-def coordinator_node(
-    state: State, config: RunnableConfig
-) -> Command[Literal["planner", "background_investigator", "__end__"]]:
-    """Coordinator node that communicate with customers."""
-    logger.info("Coordinator talking.")
-    configurable = Configuration.from_runnable_config(config)
-    messages = apply_prompt_template("coordinator", state)
-    response = (
-        get_llm_by_type(AGENT_LLM_MAP["coordinator"])
-        .bind_tools([handoff_to_planner])
-        .invoke(messages)
+def _get_speculative_topic(state: State, configurable: Configuration) -> str:
+    """The research topic to search for speculatively, empty if disabled."""
+    if state.get("enable_background_investigation") and configurable.speculative_search:
+        return state.get("research_topic", "")
+    return ""
+
+
+def _speculative_search_context() -> tuple[contextvars.Context, CancelToken]:
+    """Context of a speculative search, with a token cancelled with the run.
+
+    The search also sees the callbacks of the coordinator run, which stop its
+    tool call once the run is cancelled.
+    """
+    run_token = get_cancel_token()
+    token = run_token.child() if run_token is not None else CancelToken()
+    context = contextvars.copy_context()
+    context.run(set_cancel_token, token)
+    return context, token
+
+
+def _stop_speculative_search(search, token: CancelToken) -> None:
+    """Stop a speculative search still running, and collect its error."""
+    token.cancel()
+    search.cancel()
+    search.add_done_callback(lambda search: search.cancelled() or search.exception())
+
+
+def _keep_speculative_search(
+    goto: str, speculative_topic: str, research_topic: str
+) -> bool:
+    if goto == "background_investigator" and is_similar_topic(
+        speculative_topic, research_topic
+    ):
+        return True
+    logger.info(f"Discarded speculative background search for: {speculative_topic}")
+    return False
+
+
+def _reuse_cached_report(update: dict, goto: str, configurable: Configuration) -> str:
+    """Go straight to the reporter if a similar question has a report, return the goto."""
+    if configurable.research_cache != "report" or goto == "__end__":
+        return goto
+    cached_report = get_question_cache().lookup(
+        update["research_topic"], update["locale"], _get_report_kind(configurable)
     )
+    if not cached_report:
+        return goto
+    update["cached_report"] = cached_report
+    return "reporter"
+
+
+def _get_coordinator_llm():
+    return get_llm_by_type(AGENT_LLM_MAP["coordinator"]).bind_tools(
+        [handoff_to_planner]
+    )
+
+
+def _handle_coordinator_response(
+    state: State, configurable: Configuration, response
+) -> tuple[dict, str]:
+    """Read the hand off from the coordinator response, return the update and goto."""
     logger.debug(f"Current state messages: {state['messages']}")
 
     goto = "__end__"
@@ -246,20 +602,98 @@ def coordinator_node(
         )
         logger.debug(f"Coordinator response: {response}")
 
-    return Command(
-        update={
-            "locale": locale,
-            "research_topic": research_topic,
-            "resources": configurable.resources,
-        },
-        goto=goto,
-    )
+    update = {
+        "locale": locale,
+        "research_topic": research_topic,
+        "resources": configurable.resources,
+    }
+    return update, goto
 
 
-def reporter_node(state: State, config: RunnableConfig):
-    """Reporter node that write a final report."""
-    logger.info("Reporter write final report")
+def coordinator_node(
+    state: State, config: RunnableConfig
+) -> Command[Literal["planner", "background_investigator", "reporter", "__end__"]]:
+    """Coordinator node that communicate with customers."""
+    logger.info("Coordinator talking.")
     configurable = Configuration.from_runnable_config(config)
+
+    # The handed off research topic is usually the user's last message, so
+    # the background search can start before the coordinator has answered
+    speculative_topic = _get_speculative_topic(state, configurable)
+    speculative_search = None
+    if speculative_topic:
+        logger.info(f"Speculative background search for: {speculative_topic}")
+        context, search_token = _speculative_search_context()
+        speculative_search = _speculative_executor.submit(
+            context.run,
+            _search_background,
+            speculative_topic,
+            configurable.max_search_results,
+        )
+
+    try:
+        messages = apply_prompt_template("coordinator", state)
+        response = _get_coordinator_llm().invoke(messages)
+        update, goto = _handle_coordinator_response(state, configurable, response)
+        goto = _reuse_cached_report(update, goto, configurable)
+
+        if speculative_search and _keep_speculative_search(
+            goto, speculative_topic, update["research_topic"]
+        ):
+            try:
+                update["background_investigation_results"] = speculative_search.result()
+                goto = "planner"
+            except Exception as e:
+                logger.error(f"Speculative background search failed: {e}")
+    finally:
+        if speculative_search:
+            _stop_speculative_search(speculative_search, search_token)
+
+    return Command(update=update, goto=goto)
+
+
+async def coordinator_node_async(
+    state: State, config: RunnableConfig
+) -> Command[Literal["planner", "background_investigator", "reporter", "__end__"]]:
+    """Async version of `coordinator_node`."""
+    logger.info("Coordinator talking.")
+    configurable = Configuration.from_runnable_config(config)
+
+    speculative_topic = _get_speculative_topic(state, configurable)
+    speculative_search = None
+    if speculative_topic:
+        logger.info(f"Speculative background search for: {speculative_topic}")
+        context, search_token = _speculative_search_context()
+        speculative_search = asyncio.create_task(
+            _search_background_async(
+                speculative_topic, configurable.max_search_results
+            ),
+            context=context,
+        )
+
+    try:
+        messages = apply_prompt_template("coordinator", state)
+        response = await _get_coordinator_llm().ainvoke(messages)
+        update, goto = _handle_coordinator_response(state, configurable, response)
+        goto = _reuse_cached_report(update, goto, configurable)
+
+        if speculative_search and _keep_speculative_search(
+            goto, speculative_topic, update["research_topic"]
+        ):
+            try:
+                update["background_investigation_results"] = await speculative_search
+                goto = "planner"
+            except Exception as e:
+                logger.error(f"Speculative background search failed: {e}")
+    finally:
+        if speculative_search:
+            _stop_speculative_search(speculative_search, search_token)
+
+    return Command(update=update, goto=goto)
+
+
+def _prepare_reporter(state: State, configurable: Configuration):
+    """Build the reporter messages, fitting the observations into the context window."""
     current_plan = state.get("current_plan")
     input_ = {
         "messages": [
@@ -280,7 +714,13 @@ def reporter_node(state: State, config: RunnableConfig):
         )
     )
 
-    for observation in observations:
+    # Older observations are summarized or dropped to fit the context window
+    context_builder = ContextBuilder(
+        int(get_llm_token_limit(AGENT_LLM_MAP["reporter"]) * OBSERVATIONS_TOKEN_RATIO)
+    )
+    for observation in context_builder.fit(observations):
+        if observation is None:
+            continue
         invoke_messages.append(
             HumanMessage(
                 content=f"Below are some observations for the research task:\n\n{observation}",
@@ -288,49 +728,125 @@ def reporter_node(state: State, config: RunnableConfig):
             )
         )
     logger.debug(f"Current invoke messages: {invoke_messages}")
-    response = get_llm_by_type(AGENT_LLM_MAP["reporter"]).invoke(invoke_messages)
-    response_content = response.content
+    return invoke_messages, context_builder
+
+
+def _finish_reporter(
+    state: State, configurable: Configuration, response_content: str, context_builder
+):
     logger.info(f"reporter response: {response_content}")
 
-    return {"final_report": response_content}
+    if _uses_research_cache(configurable):
+        get_question_cache().store(
+            state.get("research_topic", ""),
+            state.get("locale", "en-US"),
+            _get_report_kind(configurable),
+            response_content,
+        )
+
+    context_tokens_saved = sum(state.get("context_tokens_saved", []))
+    context_tokens_saved += context_builder.tokens_saved
+    logger.info(f"Context tokens saved in this run: {context_tokens_saved}")
+
+    return {
+        "final_report": response_content,
+        "context_tokens_saved": [context_builder.tokens_saved],
+    }
+
+
+def _replayed_report(state: State):
+    logger.info("Reporter reused the report of a similar question")
+    return {"final_report": state["cached_report"], "cached_report": ""}
+
+
+def reporter_node(state: State, config: RunnableConfig):
+    """Reporter node that write a final report."""
+    logger.info("Reporter write final report")
+    configurable = Configuration.from_runnable_config(config)
+    if state.get("cached_report"):
+        _replay(state["cached_report"]).invoke([])
+        return _replayed_report(state)
+    invoke_messages, context_builder = _prepare_reporter(state, configurable)
+    response = get_llm_by_type(AGENT_LLM_MAP["reporter"]).invoke(invoke_messages)
+    return _finish_reporter(state, configurable, response.content, context_builder)
+
+
+async def reporter_node_async(state: State, config: RunnableConfig):
+    """Async version of `reporter_node`."""
+    logger.info("Reporter write final report")
+    configurable = Configuration.from_runnable_config(config)
+    if state.get("cached_report"):
+        await _replay(state["cached_report"]).ainvoke([])
+        return _replayed_report(state)
+    invoke_messages, context_builder = _prepare_reporter(state, configurable)
+    response = await get_llm_by_type(AGENT_LLM_MAP["reporter"]).ainvoke(invoke_messages)
+    return _finish_reporter(state, configurable, response.content, context_builder)
 
 
 def research_team_node(state: State):
-    """Research team node that collaborates on tasks."""
+    """Research team node that collaborates on tasks.
+
+    The results of the steps executed since its last run, possibly in
+    parallel, are recorded in the plan.
+    """
     logger.info("Research team is collaborating on tasks.")
-    pass
+    step_results = state.get("step_results")
+    if not step_results:
+        return None
+    plan = state["current_plan"].model_copy(deep=True)
+    for result in step_results:
+        plan.steps[result["index"]].execution_res = result["execution_res"]
+    return {"current_plan": plan, "step_results": Reset()}
 
 
 async def _execute_agent_step(
     state: State, agent, agent_name: str
 ) -> Command[Literal["research_team"]]:
-    """Helper function to execute a step using the specified agent."""
+    """Helper function to execute a step using the specified agent.
+
+    The step is selected by `current_step_index` when the research team fans
+    out ready steps in parallel, otherwise the first unexecuted step is used.
+    """
     current_plan = state.get("current_plan")
-    observations = state.get("observations", [])
 
-    # Find the first unexecuted step
+    # Find the step to execute
     current_step = None
-    completed_steps = []
-    for step in current_plan.steps:
-        if not step.execution_res:
-            current_step = step
-            break
-        else:
-            completed_steps.append(step)
+    step_index = state.get("current_step_index")
+    if step_index is None:
+        for index, step in enumerate(current_plan.steps):
+            if not step.execution_res:
+                current_step, step_index = step, index
+                break
+    elif not current_plan.steps[step_index].execution_res:
+        current_step = current_plan.steps[step_index]
 
     if not current_step:
         logger.warning("No unexecuted step found")
         return Command(goto="research_team")
 
+    # Only the results of the steps this one depends on are passed along
+    completed_steps = [
+        current_plan.steps[i]
+        for i in get_step_dependencies(current_plan, step_index)
+        if current_plan.steps[i].execution_res
+    ]
+
     logger.info(f"Executing step: {current_step.title}, agent: {agent_name}")
 
-    # Format completed steps information
+    # Format completed steps information, summarizing older findings to fit
+    # the context window of the agent's model
+    context_builder = ContextBuilder(
+        int(get_llm_token_limit(AGENT_LLM_MAP[agent_name]) * FINDINGS_TOKEN_RATIO)
+    )
+    findings = context_builder.fit([step.execution_res for step in completed_steps])
     completed_steps_info = ""
     if completed_steps:
         completed_steps_info = "# Existing Research Findings\n\n"
-        for i, step in enumerate(completed_steps):
+        for i, (step, finding) in enumerate(zip(completed_steps, findings)):
+            if finding is None:
+                continue
             completed_steps_info += f"## Existing Finding {i + 1}: {step.title}\n\n"
-            completed_steps_info += f"<finding>\n{step.execution_res}\n</finding>\n\n"
+            completed_steps_info += f"<finding>\n{finding}\n</finding>\n\n"
 
     # Prepare the input for the agent with completed steps info
     agent_input = {
@@ -395,8 +911,8 @@ async def _execute_agent_step(
     response_content = result["messages"][-1].content
     logger.debug(f"{agent_name.capitalize()} full response: {response_content}")
 
-    # Update the step with the execution result
-    current_step.execution_res = response_content
+    # The research team records the result in the plan, which is shared by the
+    # steps executed in parallel
     logger.info(f"Step '{current_step.title}' execution completed by {agent_name}")
 
     return Command(
@@ -407,7 +923,9 @@ async def _execute_agent_step(
                     name=agent_name,
                 )
             ],
-            "observations": observations + [response_content],
+            "observations": [response_content],
+            "context_tokens_saved": [context_builder.tokens_saved],
+            "step_results": [{"index": step_index, "execution_res": response_content}],
         },
         goto="research_team",
     )
@@ -456,14 +974,17 @@ async def _setup_and_execute_agent_step(
 
     # Create and execute agent with MCP tools if available
     if mcp_servers:
-        async with MultiServerMCPClient(mcp_servers) as client:
+        async with get_mcp_session_pool().acquire(mcp_servers) as mcp_tools:
             loaded_tools = default_tools[:]
-            for tool in client.get_tools():
+            for tool in mcp_tools:
                 if tool.name in enabled_tools:
-                    tool.description = (
+                    # Pooled tools are shared between steps, describe a copy
+                    description = (
                         f"Powered by '{enabled_tools[tool.name]}'.\n{tool.description}"
                     )
-                    loaded_tools.append(tool)
+                    loaded_tools.append(
+                        tool.model_copy(update={"description": description})
+                    )
             agent = create_agent(agent_type, agent_type, loaded_tools, agent_type)
             return await _execute_agent_step(state, agent, agent_type)
     else:
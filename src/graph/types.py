@@ -1,23 +1,50 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+from dataclasses import dataclass, field
+from typing import Annotated
+
 from langgraph.graph import MessagesState
 
 from src.prompts.planner_model import Plan
 from src.rag import Resource
 
 
+@dataclass(frozen=True)
+class Reset:
+    """Update replacing the list of an `append_or_reset` field."""
+
+    value: list = field(default_factory=list)
+
+
+def append_or_reset(existing: list, new: list | Reset) -> list:
+    """Append values written by (possibly parallel) nodes.
+
+    A `Reset` update replaces the list, which is how a new run on an existing
+    thread starts from a clean slate.
+    """
+    if isinstance(new, Reset):
+        return list(new.value)
+    return (existing or []) + (new or [])
+
+
 class State(MessagesState):
     """State for the agent system, extends MessagesState with next field."""
 
     # Runtime Variables
     locale: str = "en-US"
     research_topic: str = ""
-    observations: list[str] = []
+    observations: Annotated[list[str], append_or_reset] = []
+    context_tokens_saved: Annotated[list[int], append_or_reset] = []
     resources: list[Resource] = []
     plan_iterations: int = 0
     current_plan: Plan | str = None
     final_report: str = ""
+    cached_report: str = ""
     auto_accepted_plan: bool = False
     enable_background_investigation: bool = True
     background_investigation_results: str = None
+    # Results of the steps executed since the research team last ran, by index
+    step_results: Annotated[list[dict], append_or_reset] = []
+    # Steps executed while the plan was generated, by index and title
+    early_step_results: list[dict] = []
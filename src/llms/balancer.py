@@ -0,0 +1,250 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import httpx
+
+from src.llms.http import aon_close, call_once, on_close
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest latency in the moving average of an endpoint
+LATENCY_EWMA_ALPHA = 0.3
+# Consecutive failures after which an endpoint is ejected
+MAX_FAILURES = 3
+# Seconds an endpoint is ejected for, doubled on each ejection in a row
+EJECTION_SECONDS = 30.0
+MAX_EJECTION_SECONDS = 300.0
+
+
+@dataclass(eq=False)
+class Endpoint:
+    """An OpenAI-compatible endpoint serving the model."""
+
+    base_url: str
+    api_key: Optional[str] = None
+    outstanding: int = 0
+    latency: Optional[float] = None
+    failures: int = 0
+    ejections: int = 0
+    ejected_until: float = 0.0
+
+    def __post_init__(self):
+        self.url = httpx.URL(self.base_url.rstrip("/") + "/")
+
+
+class LoadBalancer:
+    """Picks the endpoint to send each request of a model to.
+
+    Each endpoint is scored by its outstanding requests weighted by the moving
+    average of its latency, and the lowest score is picked: busy and slow
+    replicas receive less traffic. An endpoint is ejected for a while after
+    `MAX_FAILURES` failures in a row, connection errors, timeouts, 429 and 5xx
+    responses counting as failures.
+    """
+
+    def __init__(self, name: str, endpoints: list[Endpoint]):
+        if not endpoints:
+            raise ValueError(f"No endpoints configured for LLM type: {name}")
+        self.name = name
+        self.endpoints = endpoints
+        self._lock = threading.Lock()
+
+    def pick(self, exclude: tuple[Endpoint, ...] = ()) -> Endpoint:
+        """Pick an endpoint and count the request as outstanding on it."""
+        with self._lock:
+            now = time.monotonic()
+            candidates = [
+                endpoint for endpoint in self.endpoints if endpoint not in exclude
+            ] or self.endpoints
+            healthy = [
+                endpoint for endpoint in candidates if endpoint.ejected_until <= now
+            ]
+            if healthy:
+                # Endpoints without a latency yet go first, to measure them
+                endpoint = min(
+                    healthy,
+                    key=lambda e: (
+                        (e.outstanding + 1) * (e.latency or 0.0),
+                        e.outstanding,
+                    ),
+                )
+            else:
+                # All ejected, the endpoint back the soonest is the best bet
+                endpoint = min(candidates, key=lambda e: e.ejected_until)
+            endpoint.outstanding += 1
+            return endpoint
+
+    def done(self, endpoint: Endpoint) -> None:
+        with self._lock:
+            endpoint.outstanding -= 1
+
+    def record_success(self, endpoint: Endpoint, latency: float) -> None:
+        with self._lock:
+            endpoint.failures = 0
+            endpoint.ejections = 0
+            if endpoint.latency is None:
+                endpoint.latency = latency
+            else:
+                endpoint.latency += LATENCY_EWMA_ALPHA * (latency - endpoint.latency)
+
+    def record_failure(self, endpoint: Endpoint, reason: str) -> None:
+        with self._lock:
+            endpoint.failures += 1
+            if endpoint.failures < MAX_FAILURES:
+                return
+            ejection = min(
+                EJECTION_SECONDS * 2**endpoint.ejections, MAX_EJECTION_SECONDS
+            )
+            endpoint.ejections += 1
+            endpoint.failures = 0
+            endpoint.ejected_until = time.monotonic() + ejection
+        logger.warning(
+            f"Ejected {self.name} LLM endpoint {endpoint.base_url} for {ejection:.0f}s: {reason}"
+        )
+
+    def stats(self) -> list[dict[str, Any]]:
+        with self._lock:
+            now = time.monotonic()
+            return [
+                {
+                    "base_url": endpoint.base_url,
+                    "outstanding": endpoint.outstanding,
+                    "latency": endpoint.latency,
+                    "ejected": endpoint.ejected_until > now,
+                }
+                for endpoint in self.endpoints
+            ]
+
+
+def _is_failure(response: httpx.Response) -> bool:
+    return response.status_code == 429 or response.status_code >= 500
+
+
+class _BalancedTransportBase:
+    def __init__(self, balancer: LoadBalancer, base_url: str, transport):
+        self.balancer = balancer
+        self._base_url = httpx.URL(base_url.rstrip("/") + "/")
+        self._transport = transport
+
+    def _route(self, request: httpx.Request, endpoint: Endpoint) -> httpx.Request:
+        """Send a request to the client's base URL to the endpoint instead."""
+        path = request.url.raw_path.decode("ascii")
+        prefix = self._base_url.raw_path.decode("ascii")
+        relative = path[len(prefix) :] if path.startswith(prefix) else path.lstrip("/")
+        headers = httpx.Headers(request.headers)
+        url = endpoint.url.join(relative)
+        headers["host"] = url.netloc.decode("ascii")
+        if endpoint.api_key:
+            headers["authorization"] = f"Bearer {endpoint.api_key}"
+        return httpx.Request(
+            request.method,
+            url,
+            headers=headers,
+            stream=request.stream,
+            extensions=request.extensions,
+        )
+
+    def _on_response(
+        self, endpoint: Endpoint, response: httpx.Response, started_at: float
+    ) -> Callable[[], None]:
+        if _is_failure(response):
+            self.balancer.record_failure(endpoint, f"HTTP {response.status_code}")
+        else:
+            self.balancer.record_success(endpoint, time.monotonic() - started_at)
+        return call_once(lambda: self.balancer.done(endpoint))
+
+
+class BalancedTransport(_BalancedTransportBase, httpx.BaseTransport):
+    """Spreads the requests of a client over the endpoints of a load balancer.
+
+    Requests whose connection failed are sent again to another endpoint, the
+    request never reached the first one. Outstanding requests are counted
+    until their response is closed, so streamed completions count until
+    their last token.
+    """
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        tried: tuple[Endpoint, ...] = ()
+        while True:
+            endpoint = self.balancer.pick(exclude=tried)
+            tried += (endpoint,)
+            started_at = time.monotonic()
+            try:
+                response = self._transport.handle_request(
+                    self._route(request, endpoint)
+                )
+            except httpx.TransportError as e:
+                self.balancer.done(endpoint)
+                self.balancer.record_failure(endpoint, repr(e))
+                if isinstance(e, httpx.ConnectError) and len(tried) < len(
+                    self.balancer.endpoints
+                ):
+                    continue
+                raise
+            except BaseException:
+                self.balancer.done(endpoint)
+                raise
+            return on_close(response, self._on_response(endpoint, response, started_at))
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncBalancedTransport(_BalancedTransportBase, httpx.AsyncBaseTransport):
+    """Async version of `BalancedTransport`."""
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        tried: tuple[Endpoint, ...] = ()
+        while True:
+            endpoint = self.balancer.pick(exclude=tried)
+            tried += (endpoint,)
+            started_at = time.monotonic()
+            try:
+                response = await self._transport.handle_async_request(
+                    self._route(request, endpoint)
+                )
+            except httpx.TransportError as e:
+                self.balancer.done(endpoint)
+                self.balancer.record_failure(endpoint, repr(e))
+                if isinstance(e, httpx.ConnectError) and len(tried) < len(
+                    self.balancer.endpoints
+                ):
+                    continue
+                raise
+            except BaseException:
+                self.balancer.done(endpoint)
+                raise
+            return aon_close(
+                response, self._on_response(endpoint, response, started_at)
+            )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+# Load balancers of the configured models, by LLM type
+_llm_balancers: dict[str, LoadBalancer] = {}
+
+
+def get_llm_balancer(llm_type: str, endpoints: list[dict[str, Any]]) -> LoadBalancer:
+    """Get the load balancer of a LLM type, created from its `endpoints` settings."""
+    if llm_type not in _llm_balancers:
+        _llm_balancers[llm_type] = LoadBalancer(
+            llm_type,
+            [
+                Endpoint(base_url=endpoint["base_url"], api_key=endpoint.get("api_key"))
+                for endpoint in endpoints
+            ],
+        )
+    return _llm_balancers[llm_type]
+
+
+def get_llm_balancer_stats() -> dict[str, list[dict[str, Any]]]:
+    """State of the endpoints of the load balanced models, by LLM type."""
+    return {llm_type: balancer.stats() for llm_type, balancer in _llm_balancers.items()}
@@ -0,0 +1,399 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    ToolMessage,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.messages.tool import tool_call_chunk
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.language_models.chat_models import (
+    BaseChatModel,
+    generate_from_stream,
+)
+from langchain_openai import ChatOpenAI
+from pydantic import PrivateAttr
+
+logger = logging.getLogger(__name__)
+
+# Cached answers are replayed one word at a time, keeping the whitespace
+_REPLAY_PATTERN = re.compile(r"\s*\S+|\s+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    message TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def _normalize_content(content: Any) -> Any:
+    if isinstance(content, str):
+        return content.strip()
+    if isinstance(content, list):
+        return [_normalize_content(part) for part in content]
+    return content
+
+
+def normalize_messages(messages: list[BaseMessage]) -> list[dict[str, Any]]:
+    """Reduce messages to what the model sees.
+
+    Message ids and metadata are dropped, surrounding whitespace is stripped,
+    and tool call ids are replaced by their position in the conversation, as
+    they differ every time the same conversation is run.
+    """
+    call_ids: dict[str, str] = {}
+
+    def normalize_call_id(call_id: Optional[str]) -> str:
+        return call_ids.setdefault(call_id or "", f"call_{len(call_ids)}")
+
+    normalized = []
+    for message in messages:
+        entry: dict[str, Any] = {
+            "type": message.type,
+            "content": _normalize_content(message.content),
+        }
+        if message.name:
+            entry["name"] = message.name
+        if isinstance(message, AIMessage) and message.tool_calls:
+            entry["tool_calls"] = [
+                {
+                    "name": tool_call["name"],
+                    "args": tool_call["args"],
+                    "id": normalize_call_id(tool_call["id"]),
+                }
+                for tool_call in message.tool_calls
+            ]
+        if isinstance(message, ToolMessage):
+            entry["tool_call_id"] = normalize_call_id(message.tool_call_id)
+        normalized.append(entry)
+    return normalized
+
+
+class LLMResponseCache:
+    """An exact-match cache of LLM responses.
+
+    Responses are kept in an in-memory LRU of `max_entries` entries and, if
+    `path` is set, in a SQLite database shared by restarts. Entries older
+    than `ttl` seconds are never returned.
+
+    Args:
+        max_entries: Responses to keep in memory.
+        path: Path of the SQLite database file, created if missing.
+        ttl: Seconds a response stays valid, `None` keeps them forever.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        path: Optional[str] = None,
+        ttl: Optional[float] = 86400.0,
+    ):
+        self.max_entries = max_entries
+        self.path = path
+        self.ttl = ttl
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+            self._prune()
+
+    @staticmethod
+    def make_key(llm_string: str, messages: list[BaseMessage]) -> str:
+        """Hash of the model, its parameters and the normalized messages."""
+        return hashlib.sha256(
+            json.dumps(
+                [llm_string, normalize_messages(messages)],
+                sort_keys=True,
+                default=str,
+            ).encode("utf-8")
+        ).hexdigest()
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def _prune(self) -> None:
+        if self.ttl is not None:
+            with self._lock:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?",
+                    (time.time() - self.ttl,),
+                )
+                self._conn.commit()
+
+    def _remember(self, key: str, created_at: float, message: dict) -> None:
+        self._entries[key] = (created_at, message)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def lookup(self, key: str) -> Optional[AIMessage]:
+        """Get the cached response for a key, `None` on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and self._expired(entry[0]):
+                del self._entries[key]
+                entry = None
+            if entry:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+            elif self._conn:
+                row = self._conn.execute(
+                    "SELECT created_at, message FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row and not self._expired(row[0]):
+                    entry = (row[0], json.loads(row[1]))
+                    self._remember(key, *entry)
+                    self.disk_hits += 1
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return messages_from_dict([entry[1]])[0]
+
+    def update(self, key: str, message: AIMessage) -> None:
+        """Cache the response for a key."""
+        created_at = time.time()
+        data = message_to_dict(message)
+        with self._lock:
+            self._remember(key, created_at, data)
+            if self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, message, created_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, json.dumps(data), created_at),
+                )
+                self._conn.commit()
+
+    async def alookup(self, key: str) -> Optional[AIMessage]:
+        if self._conn is None:
+            return self.lookup(key)
+        return await asyncio.to_thread(self.lookup, key)
+
+    async def aupdate(self, key: str, message: AIMessage) -> None:
+        if self._conn is None:
+            return self.update(key, message)
+        await asyncio.to_thread(self.update, key, message)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._conn:
+                self._conn.execute("DELETE FROM responses")
+                self._conn.commit()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
+
+
+def _is_cacheable(message: AIMessage) -> bool:
+    return not message.invalid_tool_calls and bool(
+        message.content or message.tool_calls
+    )
+
+
+def replay_chunks(message: AIMessage) -> Iterator[ChatGenerationChunk]:
+    """Split a cached response into chunks, as if it was streamed again."""
+    content = message.content
+    if isinstance(content, str):
+        pieces = _REPLAY_PATTERN.findall(content) or [""]
+        for piece in pieces[:-1]:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+        content = pieces[-1]
+    # The last chunk carries the tool calls and the response metadata
+    yield ChatGenerationChunk(
+        message=AIMessageChunk(
+            content=content,
+            tool_call_chunks=[
+                tool_call_chunk(
+                    name=tool_call["name"],
+                    args=json.dumps(tool_call["args"], ensure_ascii=False),
+                    id=tool_call["id"],
+                    index=index,
+                )
+                for index, tool_call in enumerate(message.tool_calls)
+            ],
+            response_metadata={**message.response_metadata, "cache_hit": True},
+        )
+    )
+
+
+class CachedChatOpenAI(ChatOpenAI):
+    """A ChatOpenAI model answering repeated calls from a response cache.
+
+    Cached answers are streamed again as word chunks, so callers streaming
+    the model see the same events as for a call to the API. Token usage is
+    not replayed, a cached answer costs no tokens.
+    """
+
+    _response_cache: LLMResponseCache = PrivateAttr()
+
+    def __init__(self, response_cache: LLMResponseCache, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._response_cache = response_cache
+
+    def _get_cache_key(
+        self, messages: list[BaseMessage], stop: Optional[list[str]], **kwargs: Any
+    ) -> str:
+        return LLMResponseCache.make_key(
+            self._get_llm_string(stop=stop, **kwargs), messages
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.streaming:
+            # Goes through the cached `_stream`
+            return super()._generate(messages, stop, run_manager, **kwargs)
+        key = self._get_cache_key(messages, stop, **kwargs)
+        cached = self._response_cache.lookup(key)
+        if cached is not None:
+            return generate_from_stream(replay_chunks(cached))
+        result = super()._generate(messages, stop, run_manager, **kwargs)
+        self._cache_result(key, result)
+        return result
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.streaming:
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+        key = self._get_cache_key(messages, stop, **kwargs)
+        cached = await self._response_cache.alookup(key)
+        if cached is not None:
+            return generate_from_stream(replay_chunks(cached))
+        result = await super()._agenerate(messages, stop, run_manager, **kwargs)
+        await self._acache_result(key, result)
+        return result
+
+    def _cache_result(self, key: str, result: ChatResult) -> None:
+        if len(result.generations) == 1 and _is_cacheable(
+            result.generations[0].message
+        ):
+            self._response_cache.update(key, result.generations[0].message)
+
+    async def _acache_result(self, key: str, result: ChatResult) -> None:
+        if len(result.generations) == 1 and _is_cacheable(
+            result.generations[0].message
+        ):
+            await self._response_cache.aupdate(key, result.generations[0].message)
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        key = self._get_cache_key(messages, stop, **kwargs)
+        cached = self._response_cache.lookup(key)
+        if cached is not None:
+            yield from replay_chunks(cached)
+            return
+        chunks = []
+        for chunk in super()._stream(messages, stop, run_manager, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        # Only reached when the stream was read to the end
+        if chunks:
+            self._cache_result(key, generate_from_stream(iter(chunks)))
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        key = self._get_cache_key(messages, stop, **kwargs)
+        cached = await self._response_cache.alookup(key)
+        if cached is not None:
+            for chunk in replay_chunks(cached):
+                yield chunk
+            return
+        chunks = []
+        async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        if chunks:
+            await self._acache_result(key, generate_from_stream(iter(chunks)))
+
+
+class ReplayChatModel(BaseChatModel):
+    """A chat model answering every call with the same message.
+
+    Used to send a cached answer through the callbacks of a run, so that it
+    is streamed like an answer of the LLM.
+    """
+
+    message: AIMessage
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay"
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        return generate_from_stream(replay_chunks(self.message))
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        yield from replay_chunks(self.message)
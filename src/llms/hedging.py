@@ -0,0 +1,543 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+import httpx
+
+from src.llms.http import aon_close, call_once, on_close, replace_stream
+from src.llms.scheduler import LLMScheduler
+
+# Latencies kept to compute the hedging thresholds of a model
+LATENCY_WINDOW = 200
+# Unused hedges saved up by a model, bounds the hedges fired in a burst
+MAX_SAVED_HEDGES = 10.0
+# Threads sending the hedged requests of the synchronous clients of a model
+MAX_HEDGE_THREADS = 64
+
+# Streamed completions are hedged on their first token, the others on the
+# whole response
+FIRST_TOKEN = "first_token"
+RESPONSE = "response"
+
+# Monotonic time by which the LLM requests of the current run must be answered
+_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+
+@contextmanager
+def llm_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Fail the LLM requests made in this context after `seconds`.
+
+    A nested deadline never extends the one of the enclosing context.
+    """
+    if not seconds:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _remaining(deadline: Optional[float]) -> Optional[float]:
+    return None if deadline is None else max(deadline - time.monotonic(), 0.0)
+
+
+def _wait_timeout(delay: float, deadline: Optional[float]) -> float:
+    remaining = _remaining(deadline)
+    return delay if remaining is None else min(delay, remaining)
+
+
+# Streamed completions are requested with `"stream": true` in their body. Quotes
+# are escaped inside JSON strings, so the bytes cannot come from the messages.
+_STREAM_FIELDS = (b'"stream": true', b'"stream":true')
+
+
+def _request_kind(request: httpx.Request) -> str:
+    try:
+        content = request.content
+    except httpx.RequestNotRead:
+        return RESPONSE
+    # Searched for rather than parsing the whole body, prompts can be large
+    if any(field in content for field in _STREAM_FIELDS):
+        return FIRST_TOKEN
+    return RESPONSE
+
+
+class HedgingPolicy:
+    """Decides when to send a second copy of a slow request to a model.
+
+    A request is hedged once it has been waiting for its first token, or its
+    whole response when not streamed, longer than the `percentile` of the
+    recent latencies, but never earlier than `min_delay` seconds. Each
+    request earns `budget` hedges, so at most that share of the requests is
+    sent twice.
+
+    Args:
+        name: Name of the model in logs and metrics.
+        percentile: Percentile of the latencies after which requests are hedged.
+        min_delay: Seconds a request waits at least before being hedged.
+        min_samples: Latencies measured before the first request is hedged.
+        budget: Hedges allowed per request.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        percentile: float = 95.0,
+        min_delay: float = 1.0,
+        min_samples: int = 20,
+        budget: float = 0.1,
+    ):
+        self.name = name
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.budget = budget
+
+        self._lock = threading.Lock()
+        self._latencies = {
+            kind: deque(maxlen=LATENCY_WINDOW) for kind in (FIRST_TOKEN, RESPONSE)
+        }
+        self._saved_hedges = 0.0
+        self._counts = {
+            "requests": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "budget_exhausted": 0,
+            "rate_limited": 0,
+            "deadline_exceeded": 0,
+        }
+
+    def _threshold(self, kind: str) -> Optional[float]:
+        latencies = sorted(self._latencies[kind])
+        if len(latencies) < self.min_samples:
+            return None
+        index = max(math.ceil(self.percentile / 100 * len(latencies)) - 1, 0)
+        return max(latencies[index], self.min_delay)
+
+    def start(self, kind: str) -> Optional[float]:
+        """Count a new request, returns the seconds after which to hedge it."""
+        with self._lock:
+            self._counts["requests"] += 1
+            self._saved_hedges = min(self._saved_hedges + self.budget, MAX_SAVED_HEDGES)
+            return self._threshold(kind)
+
+    def try_hedge(self) -> bool:
+        """Spend a hedge from the budget, `False` when it is used up."""
+        with self._lock:
+            if self._saved_hedges < 1:
+                self._counts["budget_exhausted"] += 1
+                return False
+            self._saved_hedges -= 1
+            self._counts["hedged"] += 1
+            return True
+
+    def record(self, kind: str, latency: float, hedge: bool) -> None:
+        """Record the latency of the copy of a request that answered first."""
+        with self._lock:
+            self._latencies[kind].append(latency)
+            if hedge:
+                self._counts["hedge_wins"] += 1
+
+    def record_rate_limited(self) -> None:
+        with self._lock:
+            self._counts["rate_limited"] += 1
+
+    def record_deadline_exceeded(self) -> None:
+        with self._lock:
+            self._counts["deadline_exceeded"] += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counts,
+                "thresholds": {
+                    kind: self._threshold(kind) for kind in (FIRST_TOKEN, RESPONSE)
+                },
+            }
+
+
+class _PrefetchedStream(httpx.SyncByteStream):
+    """Body of an answered request, failing once the deadline has passed.
+
+    A blocking read cannot be interrupted, the deadline is checked when each
+    chunk arrives.
+    """
+
+    def __init__(
+        self,
+        first: bytes,
+        rest: Iterator[bytes],
+        stream,
+        deadline: Optional[float] = None,
+        on_deadline: Optional[Callable[[], Exception]] = None,
+    ):
+        self._first = first
+        self._rest = rest
+        self._stream = stream
+        self._deadline = deadline
+        self._on_deadline = on_deadline
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self._first:
+            yield self._first
+        for chunk in self._rest:
+            if _remaining(self._deadline) == 0:
+                raise self._on_deadline()
+            yield chunk
+
+    def close(self) -> None:
+        self._stream.close()
+
+
+class _AsyncPrefetchedStream(httpx.AsyncByteStream):
+    """Async version of `_PrefetchedStream`, a read fails at the deadline."""
+
+    def __init__(
+        self,
+        first: bytes,
+        rest: AsyncIterator[bytes],
+        stream,
+        deadline: Optional[float] = None,
+        on_deadline: Optional[Callable[[], Exception]] = None,
+    ):
+        self._first = first
+        self._rest = rest
+        self._stream = stream
+        self._deadline = deadline
+        self._on_deadline = on_deadline
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        if self._first:
+            yield self._first
+        if self._deadline is None:
+            async for chunk in self._rest:
+                yield chunk
+            return
+        while True:
+            try:
+                chunk = await asyncio.wait_for(
+                    self._rest.__anext__(), _remaining(self._deadline)
+                )
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise self._on_deadline()
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+
+def _deadline_exceeded(request: httpx.Request) -> httpx.TimeoutException:
+    return httpx.ReadTimeout("LLM run deadline exceeded", request=request)
+
+
+def _release_if_cancelled(attempt, release: Callable[[], None]) -> None:
+    """Release the slot of a hedge cancelled before it was sent."""
+
+    def callback(attempt) -> None:
+        if attempt.cancelled():
+            release()
+
+    attempt.add_done_callback(callback)
+
+
+class _HedgedTransportBase:
+    def __init__(
+        self,
+        policy: HedgingPolicy,
+        transport,
+        scheduler: Optional[LLMScheduler] = None,
+    ):
+        self.policy = policy
+        self._transport = transport
+        self._scheduler = scheduler
+
+    def _deadline_exceeded(self, request: httpx.Request) -> httpx.TimeoutException:
+        self.policy.record_deadline_exceeded()
+        return _deadline_exceeded(request)
+
+    def _try_hedge(self) -> Optional[Callable[[], None]]:
+        """Admit a hedge, returns the callback releasing its scheduler slot.
+
+        Returns None when the hedge is not sent, because the scheduler has no
+        free slot or token right away or the budget is used up.
+        """
+        if self._scheduler is None:
+            return (lambda: None) if self.policy.try_hedge() else None
+        if not self._scheduler.try_acquire():
+            self.policy.record_rate_limited()
+            return None
+        release = call_once(self._scheduler.release)
+        if not self.policy.try_hedge():
+            release()
+            return None
+        return release
+
+
+class HedgedTransport(_HedgedTransportBase, httpx.BaseTransport):
+    """Sends a second copy of the requests slow to answer, keeps the fastest.
+
+    A request is answered once its first body chunk arrives, so streamed
+    completions race on their first token. The copy answering last is closed,
+    which aborts its generation. Requests and the reads of their body fail
+    with a timeout once the deadline of the run set by `llm_deadline` has
+    passed.
+
+    The first copy of a request is admitted by the `ScheduledTransport` of the
+    model, above this one. With a `scheduler`, the second copy is only sent if
+    the scheduler admits it at once, and holds its own slot until closed.
+    """
+
+    def __init__(
+        self,
+        policy: HedgingPolicy,
+        transport: httpx.BaseTransport,
+        scheduler: Optional[LLMScheduler] = None,
+    ):
+        super().__init__(policy, transport, scheduler)
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=MAX_HEDGE_THREADS,
+            thread_name_prefix=f"llm-hedge-{policy.name}",
+        )
+
+    def _attempt(
+        self, request: httpx.Request, release: Optional[Callable[[], None]] = None
+    ):
+        started_at = time.monotonic()
+        try:
+            response = self._transport.handle_request(request)
+        except BaseException:
+            if release is not None:
+                release()
+            raise
+        if release is not None:
+            response = on_close(response, release)
+        try:
+            chunks = iter(response.stream)
+            first = next(chunks, b"")
+        except BaseException:
+            response.close()
+            raise
+        return response, chunks, first, time.monotonic() - started_at
+
+    def _submit(
+        self, request: httpx.Request, release: Optional[Callable[[], None]] = None
+    ) -> concurrent.futures.Future:
+        # The threads see the priority and deadline of the caller
+        context = contextvars.copy_context()
+        attempt = self._executor.submit(context.run, self._attempt, request, release)
+        if release is not None:
+            _release_if_cancelled(attempt, release)
+        return attempt
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        deadline = _deadline.get()
+        if _remaining(deadline) == 0:
+            raise self._deadline_exceeded(request)
+        kind = _request_kind(request)
+        delay = self.policy.start(kind)
+        if delay is None and deadline is None:
+            response, chunks, first, latency = self._attempt(request)
+            self.policy.record(kind, latency, hedge=False)
+            return replace_stream(
+                response, _PrefetchedStream(first, chunks, response.stream)
+            )
+
+        attempts = [self._submit(request)]
+        winner = None
+        try:
+            if delay is not None:
+                done, _ = concurrent.futures.wait(
+                    attempts, timeout=_wait_timeout(delay, deadline)
+                )
+                if not done and _remaining(deadline) != 0:
+                    release = self._try_hedge()
+                    if release is not None:
+                        attempts.append(self._submit(request, release))
+            winner = self._first_answer(request, attempts, deadline)
+        finally:
+            for attempt in attempts:
+                if attempt is not winner:
+                    self._discard(attempt)
+
+        response, chunks, first, latency = winner.result()
+        self.policy.record(kind, latency, hedge=winner is not attempts[0])
+        return replace_stream(
+            response,
+            _PrefetchedStream(
+                first,
+                chunks,
+                response.stream,
+                deadline,
+                functools.partial(self._deadline_exceeded, request),
+            ),
+        )
+
+    def _first_answer(self, request, attempts, deadline) -> concurrent.futures.Future:
+        pending = set(attempts)
+        error = None
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending,
+                timeout=_remaining(deadline),
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            if not done:
+                raise self._deadline_exceeded(request)
+            for attempt in attempts:
+                if attempt in done and attempt.exception() is None:
+                    return attempt
+            error = next(iter(done)).exception()
+        raise error
+
+    @staticmethod
+    def _discard(attempt: concurrent.futures.Future) -> None:
+        def close(attempt: concurrent.futures.Future) -> None:
+            if not attempt.cancelled() and attempt.exception() is None:
+                attempt.result()[0].close()
+
+        if not attempt.cancel():
+            attempt.add_done_callback(close)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self._transport.close()
+
+
+class AsyncHedgedTransport(_HedgedTransportBase, httpx.AsyncBaseTransport):
+    """Async version of `HedgedTransport`."""
+
+    async def _attempt(
+        self, request: httpx.Request, release: Optional[Callable[[], None]] = None
+    ):
+        started_at = time.monotonic()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            if release is not None:
+                release()
+            raise
+        if release is not None:
+            response = aon_close(response, release)
+        try:
+            chunks = response.stream.__aiter__()
+            try:
+                first = await chunks.__anext__()
+            except StopAsyncIteration:
+                first = b""
+        except BaseException:
+            await response.aclose()
+            raise
+        return response, chunks, first, time.monotonic() - started_at
+
+    def _submit(
+        self, request: httpx.Request, release: Optional[Callable[[], None]] = None
+    ) -> asyncio.Task:
+        attempt = asyncio.create_task(self._attempt(request, release))
+        if release is not None:
+            _release_if_cancelled(attempt, release)
+        return attempt
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        deadline = _deadline.get()
+        if _remaining(deadline) == 0:
+            raise self._deadline_exceeded(request)
+        kind = _request_kind(request)
+        delay = self.policy.start(kind)
+
+        attempts = [self._submit(request)]
+        winner = None
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(
+                    attempts, timeout=_wait_timeout(delay, deadline)
+                )
+                if not done and _remaining(deadline) != 0:
+                    release = self._try_hedge()
+                    if release is not None:
+                        attempts.append(self._submit(request, release))
+            winner = await self._first_answer(request, attempts, deadline)
+        finally:
+            for attempt in attempts:
+                if attempt is not winner:
+                    await self._discard(attempt)
+
+        response, chunks, first, latency = winner.result()
+        self.policy.record(kind, latency, hedge=winner is not attempts[0])
+        return replace_stream(
+            response,
+            _AsyncPrefetchedStream(
+                first,
+                chunks,
+                response.stream,
+                deadline,
+                functools.partial(self._deadline_exceeded, request),
+            ),
+        )
+
+    async def _first_answer(self, request, attempts, deadline) -> asyncio.Task:
+        pending = set(attempts)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=_remaining(deadline),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                raise self._deadline_exceeded(request)
+            for attempt in attempts:
+                if attempt in done and attempt.exception() is None:
+                    return attempt
+            error = next(iter(done)).exception()
+        raise error
+
+    @staticmethod
+    async def _discard(attempt: asyncio.Task) -> None:
+        if not attempt.done():
+            attempt.cancel()
+        elif not attempt.cancelled() and attempt.exception() is None:
+            await attempt.result()[0].aclose()
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+# Hedging policies of the configured models, by LLM type
+_llm_hedging_policies: dict[str, HedgingPolicy] = {}
+
+
+def get_llm_hedging_policy(llm_type: str, conf: dict[str, Any]) -> HedgingPolicy:
+    """Get the hedging policy of a LLM type, created from its `hedging` settings."""
+    if llm_type not in _llm_hedging_policies:
+        _llm_hedging_policies[llm_type] = HedgingPolicy(
+            llm_type,
+            percentile=float(conf.get("percentile", 95)),
+            min_delay=float(conf.get("min_delay", 1.0)),
+            min_samples=int(conf.get("min_samples", 20)),
+            budget=float(conf.get("budget", 0.1)),
+        )
+    return _llm_hedging_policies[llm_type]
+
+
+def get_llm_hedging_stats() -> dict[str, dict[str, Any]]:
+    """Hedged requests and latency thresholds of the hedged models, by LLM type."""
+    return {
+        llm_type: policy.stats() for llm_type, policy in _llm_hedging_policies.items()
+    }
@@ -0,0 +1,74 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from typing import AsyncIterator, Callable, Iterator
+
+import httpx
+
+
+def call_once(callback: Callable[[], None]) -> Callable[[], None]:
+    """Wrap a callback so that calls after the first one do nothing."""
+    called = False
+
+    def wrapper() -> None:
+        nonlocal called
+        if not called:
+            called = True
+            callback()
+
+    return wrapper
+
+
+class _ClosingStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, callback: Callable[[], None]):
+        self._stream = stream
+        self._callback = callback
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._callback()
+
+
+class _AsyncClosingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, callback: Callable[[], None]):
+        self._stream = stream
+        self._callback = callback
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._callback()
+
+
+def replace_stream(response: httpx.Response, stream) -> httpx.Response:
+    """Copy a transport response with another body stream."""
+    return httpx.Response(
+        status_code=response.status_code,
+        headers=response.headers,
+        stream=stream,
+        extensions=response.extensions,
+    )
+
+
+def on_close(response: httpx.Response, callback: Callable[[], None]) -> httpx.Response:
+    """Call `callback` once the body of a transport response is closed.
+
+    A streamed completion is only done after its last chunk, long after the
+    transport returned the response.
+    """
+    return replace_stream(response, _ClosingStream(response.stream, callback))
+
+
+def aon_close(response: httpx.Response, callback: Callable[[], None]) -> httpx.Response:
+    """Async version of `on_close`."""
+    return replace_stream(response, _AsyncClosingStream(response.stream, callback))
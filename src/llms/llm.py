@@ -2,19 +2,46 @@
 # SPDX-License-Identifier: MIT
 
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 import os
 
+import httpx
 from langchain_openai import ChatOpenAI
+from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
 from langchain_deepseek import ChatDeepSeek
 from typing import get_args
 
 from src.config import load_yaml_config
 from src.config.agents import LLMType
+from src.llms.balancer import (
+    AsyncBalancedTransport,
+    BalancedTransport,
+    get_llm_balancer,
+)
+from src.llms.cache import CachedChatOpenAI, LLMResponseCache
+from src.llms.hedging import (
+    AsyncHedgedTransport,
+    HedgedTransport,
+    get_llm_hedging_policy,
+)
+from src.llms.scheduler import (
+    AsyncScheduledTransport,
+    ScheduledTransport,
+    get_llm_scheduler,
+)
 
 # Cache for LLM instances
 _llm_cache: dict[LLMType, ChatOpenAI] = {}
 
+# Context window assumed for models without a `token_limit` setting
+DEFAULT_TOKEN_LIMIT = 32768
+
+# DeerFlow settings in a model section that are not ChatOpenAI arguments
+_NON_MODEL_CONF_KEYS = ("token_limit", "scheduler", "endpoints", "hedging")
+
+# Response cache shared by all LLM types, `None` until it is configured
+_llm_response_cache: Optional[LLMResponseCache] = None
+
 
 def _get_config_file_path() -> str:
     """Get the path to the configuration file."""
@@ -45,10 +72,8 @@ def _get_env_llm_conf(llm_type: str) -> Dict[str, Any]:
     return conf
 
 
-def _create_llm_use_conf(
-    llm_type: LLMType, conf: Dict[str, Any]
-) -> ChatOpenAI:
-    """Create LLM instance using configuration."""
+def _get_merged_llm_conf(llm_type: LLMType, conf: Dict[str, Any]) -> Dict[str, Any]:
+    """Get the configuration of a LLM type, environment variables taking precedence."""
     llm_type_config_keys = _get_llm_type_config_keys()
     config_key = llm_type_config_keys.get(llm_type)
 
@@ -63,12 +88,85 @@ def _create_llm_use_conf(
     env_conf = _get_env_llm_conf(llm_type)
 
     # Merge configurations, with environment variables taking precedence
-    merged_conf = {**llm_conf, **env_conf}
+    return {**llm_conf, **env_conf}
+
+
+def get_llm_response_cache(
+    conf: Optional[Dict[str, Any]] = None,
+) -> Optional[LLMResponseCache]:
+    """
+    Get the LLM response cache configured in the `LLM_CACHE` section of
+    conf.yaml, or `None` if it is not enabled.
+    """
+    global _llm_response_cache
+    if _llm_response_cache is None:
+        if conf is None:
+            conf = load_yaml_config(_get_config_file_path())
+        cache_conf = conf.get("LLM_CACHE") or {}
+        if not cache_conf.get("enabled", False):
+            return None
+        ttl = cache_conf.get("ttl", 86400)
+        _llm_response_cache = LLMResponseCache(
+            max_entries=int(cache_conf.get("max_entries", 1024)),
+            path=cache_conf.get("path"),
+            ttl=float(ttl) if ttl is not None else None,
+        )
+    return _llm_response_cache
+
+
+def _set_http_clients(
+    llm_type: LLMType, merged_conf: Dict[str, Any], model_conf: Dict[str, Any]
+) -> None:
+    """Route the requests of a model through its load balancer, hedging and scheduler."""
+    transport = httpx.HTTPTransport()
+    async_transport = httpx.AsyncHTTPTransport()
+
+    endpoints = merged_conf.get("endpoints")
+    if endpoints:
+        balancer = get_llm_balancer(llm_type, endpoints)
+        # Requests to the base URL of the client are sent to the chosen endpoint
+        model_conf.setdefault("base_url", endpoints[0]["base_url"])
+        model_conf.setdefault("api_key", endpoints[0].get("api_key"))
+        transport = BalancedTransport(balancer, model_conf["base_url"], transport)
+        async_transport = AsyncBalancedTransport(
+            balancer, model_conf["base_url"], async_transport
+        )
+
+    scheduler = None
+    if merged_conf.get("scheduler"):
+        scheduler = get_llm_scheduler(llm_type, merged_conf["scheduler"])
+
+    if merged_conf.get("hedging"):
+        # Hedges go through the load balancer, to another endpoint when possible,
+        # and are charged to the scheduler
+        policy = get_llm_hedging_policy(llm_type, merged_conf["hedging"])
+        transport = HedgedTransport(policy, transport, scheduler)
+        async_transport = AsyncHedgedTransport(policy, async_transport, scheduler)
+
+    if scheduler is not None:
+        transport = ScheduledTransport(scheduler, transport)
+        async_transport = AsyncScheduledTransport(scheduler, async_transport)
+
+    model_conf["http_client"] = DefaultHttpxClient(transport=transport)
+    model_conf["http_async_client"] = DefaultAsyncHttpxClient(transport=async_transport)
+
+
+def _create_llm_use_conf(
+    llm_type: LLMType, conf: Dict[str, Any]
+) -> ChatOpenAI:
+    """Create LLM instance using configuration."""
+    merged_conf = _get_merged_llm_conf(llm_type, conf)
 
     if not merged_conf:
         raise ValueError(f"No configuration found for LLM type: {llm_type}")
 
-    return ChatOpenAI(**merged_conf)
+    model_conf = {k: v for k, v in merged_conf.items() if k not in _NON_MODEL_CONF_KEYS}
+    if any(merged_conf.get(key) for key in ("endpoints", "hedging", "scheduler")):
+        _set_http_clients(llm_type, merged_conf, model_conf)
+    response_cache = get_llm_response_cache(conf)
+    if response_cache is not None:
+        return CachedChatOpenAI(response_cache=response_cache, **model_conf)
+    return ChatOpenAI(**model_conf)
 
 
 def get_llm_by_type(
@@ -86,6 +184,18 @@ def get_llm_by_type(
     return llm
 
 
+def get_llm_token_limit(llm_type: LLMType) -> int:
+    """
+    Get the context window size of a LLM type from its `token_limit` setting.
+    """
+    try:
+        conf = load_yaml_config(_get_config_file_path())
+        token_limit = _get_merged_llm_conf(llm_type, conf).get("token_limit")
+        return int(token_limit) if token_limit else DEFAULT_TOKEN_LIMIT
+    except ValueError:
+        return DEFAULT_TOKEN_LIMIT
+
+
 def get_configured_llm_models() -> dict[str, list[str]]:
     """
     Get all configured LLM models grouped by type.
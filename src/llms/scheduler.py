@@ -0,0 +1,315 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import enum
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Optional
+
+import httpx
+
+from src.llms.http import aon_close, call_once, on_close
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(enum.IntEnum):
+    """Priority classes of LLM requests, lower values are served first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+# Priority of the LLM requests sent from the current context
+_priority: ContextVar[Priority] = ContextVar(
+    "llm_priority", default=Priority.INTERACTIVE
+)
+
+
+@contextmanager
+def llm_priority(priority: Priority) -> Iterator[None]:
+    """Send the LLM requests made in this context with the given priority."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    enqueued_at: float = field(compare=False)
+    wake: Callable[[], None] = field(compare=False)
+    granted: bool = field(default=False, compare=False)
+    cancelled: bool = field(default=False, compare=False)
+
+
+class LLMScheduler:
+    """Admits the requests to a model in priority order.
+
+    At most `max_concurrent_requests` requests are in flight, and a token
+    bucket refilled with `requests_per_minute` tokens a minute, holding up to
+    `burst` tokens, limits how fast they start. Waiting requests are served
+    by priority, then in arrival order. Works for threads and coroutines.
+
+    Args:
+        name: Name of the model in logs and metrics.
+        max_concurrent_requests: Requests in flight, `None` for no limit.
+        requests_per_minute: Requests started a minute, `None` for no limit.
+        burst: Requests started at once after an idle period.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrent_requests: Optional[int] = None,
+        requests_per_minute: Optional[float] = None,
+        burst: Optional[int] = None,
+    ):
+        self.name = name
+        self.max_concurrent_requests = max_concurrent_requests
+        self.rate = requests_per_minute / 60 if requests_per_minute else None
+        self.burst = burst or 1
+        self.in_flight = 0
+
+        self._tokens = float(self.burst)
+        self._refilled_at = time.monotonic()
+        self._queue: list[_Waiter] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._queued = {priority: 0 for priority in Priority}
+        self._waits = {priority: [0, 0.0, 0.0] for priority in Priority}
+
+    def _refill(self, now: float) -> None:
+        if self.rate:
+            elapsed = now - self._refilled_at
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._refilled_at = now
+
+    def _poll_interval(self) -> Optional[float]:
+        """Seconds to wait before dispatching again, `None` to wait for a release.
+
+        Nothing wakes the waiters when the bucket refills, so they poll.
+        """
+        if not self.rate:
+            return None
+        with self._lock:
+            missing = max(1 - self._tokens, 0.0) or 1.0
+        return max(missing / self.rate, 0.01)
+
+    def _dispatch(self) -> None:
+        """Start the waiting requests that can start, must hold the lock."""
+        now = time.monotonic()
+        self._refill(now)
+        while self._queue:
+            waiter = self._queue[0]
+            if waiter.cancelled:
+                heapq.heappop(self._queue)
+                continue
+            if (
+                self.max_concurrent_requests is not None
+                and self.in_flight >= self.max_concurrent_requests
+            ):
+                break
+            if self.rate and self._tokens < 1:
+                break
+            heapq.heappop(self._queue)
+            if self.rate:
+                self._tokens -= 1
+            self.in_flight += 1
+            waiter.granted = True
+            priority = Priority(waiter.priority)
+            self._queued[priority] -= 1
+            waited = now - waiter.enqueued_at
+            waits = self._waits[priority]
+            waits[0] += 1
+            waits[1] += waited
+            waits[2] = max(waits[2], waited)
+            waiter.wake()
+
+    def _enqueue(self, wake: Callable[[], None]) -> _Waiter:
+        priority = _priority.get()
+        with self._lock:
+            waiter = _Waiter(priority, next(self._seq), time.monotonic(), wake)
+            heapq.heappush(self._queue, waiter)
+            self._queued[priority] += 1
+            self._dispatch()
+        return waiter
+
+    def _cancel(self, waiter: _Waiter) -> None:
+        with self._lock:
+            if waiter.granted:
+                self.in_flight -= 1
+                self._dispatch()
+            elif not waiter.cancelled:
+                waiter.cancelled = True
+                self._queued[Priority(waiter.priority)] -= 1
+
+    def try_acquire(self) -> bool:
+        """Admit a request only if it can be sent at once, without waiting.
+
+        Never admits a request ahead of the waiting ones. Must be released
+        with `release` when it returns `True`.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if any(not waiter.cancelled for waiter in self._queue):
+                return False
+            if (
+                self.max_concurrent_requests is not None
+                and self.in_flight >= self.max_concurrent_requests
+            ):
+                return False
+            if self.rate and self._tokens < 1:
+                return False
+            if self.rate:
+                self._tokens -= 1
+            self.in_flight += 1
+            return True
+
+    def acquire(self) -> None:
+        """Wait until a request may be sent, blocking the thread."""
+        event = threading.Event()
+        waiter = self._enqueue(event.set)
+        try:
+            while not event.wait(self._poll_interval()):
+                with self._lock:
+                    self._dispatch()
+        except BaseException:
+            self._cancel(waiter)
+            raise
+
+    async def aacquire(self) -> None:
+        """Wait until a request may be sent."""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(
+                lambda: granted.done() or granted.set_result(None)
+            )
+
+        waiter = self._enqueue(wake)
+        if waiter.granted:
+            return
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(granted), self._poll_interval()
+                    )
+                    return
+                except asyncio.TimeoutError:
+                    with self._lock:
+                        self._dispatch()
+                    if waiter.granted:
+                        return
+        except BaseException:
+            self._cancel(waiter)
+            raise
+
+    def release(self) -> None:
+        """Mark a request admitted by `acquire` as done."""
+        with self._lock:
+            self.in_flight -= 1
+            self._dispatch()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "queued": {
+                    priority.name.lower(): count
+                    for priority, count in self._queued.items()
+                },
+                "wait_seconds": {
+                    priority.name.lower(): {
+                        "count": count,
+                        "sum": total,
+                        "max": longest,
+                    }
+                    for priority, (count, total, longest) in self._waits.items()
+                },
+            }
+
+
+class ScheduledTransport(httpx.BaseTransport):
+    """Sends requests once the scheduler admits them.
+
+    A request holds its slot until its response is closed, so streamed
+    completions count as in flight until the last token.
+    """
+
+    def __init__(self, scheduler: LLMScheduler, transport: httpx.BaseTransport):
+        self.scheduler = scheduler
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.scheduler.acquire()
+        try:
+            response = self._transport.handle_request(request)
+        except BaseException:
+            self.scheduler.release()
+            raise
+        return on_close(response, call_once(self.scheduler.release))
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncScheduledTransport(httpx.AsyncBaseTransport):
+    """Async version of `ScheduledTransport`."""
+
+    def __init__(self, scheduler: LLMScheduler, transport: httpx.AsyncBaseTransport):
+        self.scheduler = scheduler
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await self.scheduler.aacquire()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            self.scheduler.release()
+            raise
+        return aon_close(response, call_once(self.scheduler.release))
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+# Schedulers of the configured models, by LLM type
+_llm_schedulers: dict[str, LLMScheduler] = {}
+
+
+def get_llm_scheduler(llm_type: str, conf: dict[str, Any]) -> LLMScheduler:
+    """Get the scheduler of a LLM type, created from its `scheduler` settings."""
+    if llm_type not in _llm_schedulers:
+        requests_per_minute = conf.get("requests_per_minute")
+        max_concurrent_requests = conf.get("max_concurrent_requests")
+        _llm_schedulers[llm_type] = LLMScheduler(
+            llm_type,
+            max_concurrent_requests=(
+                int(max_concurrent_requests) if max_concurrent_requests else None
+            ),
+            requests_per_minute=(
+                float(requests_per_minute) if requests_per_minute else None
+            ),
+            burst=int(conf.get("burst", 1)),
+        )
+    return _llm_schedulers[llm_type]
+
+
+def get_llm_scheduler_stats() -> dict[str, dict[str, Any]]:
+    """Queue metrics of the scheduled models, by LLM type."""
+    return {
+        llm_type: scheduler.stats() for llm_type, scheduler in _llm_schedulers.items()
+    }
@@ -7,6 +7,7 @@ import os
 
 from src.podcast.graph.state import PodcastState
 from src.tools.tts import VolcengineTTS
+from src.utils.cancellation import raise_if_cancelled
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +16,7 @@ def tts_node(state: PodcastState):
     logger.info("Generating audio chunks for podcast...")
     tts_client = _create_tts_client()
     for line in state["script"].lines:
+        raise_if_cancelled()
         tts_client.voice_type = (
             "BV002_streaming" if line.speaker == "male" else "BV001_streaming"
         )
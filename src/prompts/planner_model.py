@@ -1,11 +1,19 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import hashlib
+import threading
+from collections import OrderedDict
 from enum import Enum
 from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
+from src.utils.json_utils import parse_json_output
+
+# Number of parsed plans kept, a plan is parsed by the planner and again once accepted
+PLAN_CACHE_SIZE = 128
+
 
 class StepType(str, Enum):
     RESEARCH = "research"
@@ -20,6 +28,13 @@ class Step(BaseModel):
     execution_res: Optional[str] = Field(
         default=None, description="The Step execution result"
     )
+    depends_on: Optional[List[int]] = Field(
+        default=None,
+        description=(
+            "Zero-based indices of earlier steps whose results this step needs. "
+            "Omit to depend on all previous steps, use [] for an independent step"
+        ),
+    )
 
 
 class Plan(BaseModel):
@@ -56,3 +71,57 @@ class Plan(BaseModel):
                 }
             ]
         }
+
+
+_parsed_plans: OrderedDict[bytes, dict] = OrderedDict()
+_parsed_plans_lock = threading.Lock()
+
+
+def parse_plan(content: str) -> Plan:
+    """Parse a plan generated by the planner.
+
+    The parsed JSON is cached by the hash of the content, so the same response
+    is only parsed, and repaired if needed, once. A new `Plan` is returned on
+    each call since the steps are updated with their results.
+
+    Raises:
+        json.JSONDecodeError: If the content is not JSON
+        pydantic.ValidationError: If the JSON is not a plan
+    """
+    key = hashlib.sha256(content.encode("utf-8")).digest()
+    with _parsed_plans_lock:
+        data = _parsed_plans.get(key)
+        if data is not None:
+            _parsed_plans.move_to_end(key)
+    if data is None:
+        data = parse_json_output(content)
+    plan = Plan.model_validate(data)
+    with _parsed_plans_lock:
+        _parsed_plans[key] = data
+        if len(_parsed_plans) > PLAN_CACHE_SIZE:
+            _parsed_plans.popitem(last=False)
+    return plan
+
+
+def get_step_dependencies(plan: Plan, index: int) -> List[int]:
+    """Return the indices of the steps that must finish before step `index`.
+
+    Only references to earlier steps are honored, so a malformed plan can never
+    produce a cycle. A step without `depends_on` depends on every previous step,
+    which keeps the original sequential behavior for plans that do not declare
+    dependencies.
+    """
+    depends_on = getattr(plan.steps[index], "depends_on", None)
+    if depends_on is None:
+        return list(range(index))
+    return sorted({i for i in depends_on if isinstance(i, int) and 0 <= i < index})
+
+
+def get_ready_step_indices(plan: Plan) -> List[int]:
+    """Return the indices of unexecuted steps whose dependencies are all done."""
+    return [
+        index
+        for index, step in enumerate(plan.steps)
+        if not step.execution_res
+        and all(plan.steps[i].execution_res for i in get_step_dependencies(plan, index))
+    ]
@@ -3,10 +3,15 @@
 
 import os
 import dataclasses
+import enum
+import logging
 from datetime import datetime
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from functools import lru_cache
+from typing import Optional
+from jinja2 import Environment, FileSystemLoader, meta, select_autoescape
 from langgraph.prebuilt.chat_agent_executor import AgentState
 from src.config.configuration import Configuration
+from src.rag.retriever import Resource
 
 # Initialize Jinja2 environment
 env = Environment(
@@ -16,6 +21,51 @@ env = Environment(
     lstrip_blocks=True,
 )
 
+logger = logging.getLogger(__name__)
+
+
+class PromptLayout(enum.Enum):
+    """How the variables changing on every call are laid out in the messages.
+
+    `inline` renders them into the system prompt. `stable` keeps the system
+    prompt byte-identical across the calls of a run, and across runs with the
+    same locale, so that providers can reuse its cached prefix: the current
+    time is rounded to the day in the system prompt, and sent in full in a
+    message after the conversation.
+    """
+
+    INLINE = "inline"
+    STABLE = "stable"
+
+
+def get_prompt_layout() -> PromptLayout:
+    """Get the prompt layout selected by the `PROMPT_LAYOUT` environment variable."""
+    value = os.getenv("PROMPT_LAYOUT") or PromptLayout.INLINE.value
+    try:
+        return PromptLayout(value.lower())
+    except ValueError:
+        logger.warning(f"Unknown PROMPT_LAYOUT {value}, using inline")
+        return PromptLayout.INLINE
+
+
+@lru_cache(maxsize=None)
+def _template_variables(prompt_name: str) -> frozenset:
+    source = env.loader.get_source(env, f"{prompt_name}.md")[0]
+    return frozenset(meta.find_undeclared_variables(env.parse(source)))
+
+
+def preload_prompt_templates() -> int:
+    """
+    Compile every prompt template into the Jinja2 cache ahead of first use.
+
+    Returns:
+        The number of templates loaded
+    """
+    templates = env.list_templates(extensions=["md"])
+    for template_name in templates:
+        env.get_template(template_name)
+    return len(templates)
+
 
 def get_prompt_template(prompt_name: str) -> str:
     """
@@ -35,7 +85,11 @@ def get_prompt_template(prompt_name: str) -> str:
 
 
 def apply_prompt_template(
-    prompt_name: str, state: AgentState, configurable: Configuration = None
+    prompt_name: str,
+    state: AgentState,
+    configurable: Configuration = None,
+    layout: Optional[PromptLayout] = None,
+    now: Optional[datetime] = None,
 ) -> list:
     """
     Apply template variables to a prompt template and return formatted messages.
@@ -43,13 +97,23 @@ def apply_prompt_template(
     Args:
         prompt_name: Name of the prompt template to use
         state: Current agent state containing variables to substitute
+        configurable: Configuration whose fields are also template variables
+        layout: Layout of the volatile variables, defaults to `get_prompt_layout()`
+        now: Current time, defaults to the time of the call
 
     Returns:
         List of messages with the system prompt as the first message
     """
+    layout = layout or get_prompt_layout()
+    now = now or datetime.now()
+    if layout == PromptLayout.STABLE:
+        current_time = now.strftime("%a %b %d %Y")
+    else:
+        current_time = now.strftime("%a %b %d %Y %H:%M:%S %z")
+
     # Convert state to dict for template rendering
     state_vars = {
-        "CURRENT_TIME": datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"),
+        "CURRENT_TIME": current_time,
         **state,
     }
 
@@ -60,6 +124,92 @@ def apply_prompt_template(
     try:
         template = env.get_template(f"{prompt_name}.md")
         system_prompt = template.render(**state_vars)
-        return [{"role": "system", "content": system_prompt}] + state["messages"]
+        messages = [{"role": "system", "content": system_prompt}] + state["messages"]
+        uses_time = "CURRENT_TIME" in _template_variables(prompt_name)
+        if layout == PromptLayout.STABLE and uses_time:
+            # After the conversation, so that it does not break the cached prefix
+            full_time = now.strftime("%a %b %d %Y %H:%M:%S %z").rstrip()
+            messages.append(
+                {
+                    "role": "user",
+                    "name": "system",
+                    "content": f"CURRENT_TIME: {full_time}",
+                }
+            )
+        return messages
     except Exception as e:
         raise ValueError(f"Error applying template {prompt_name}: {e}")
+
+
+@dataclasses.dataclass
+class PrefixStability:
+    """How much of the system prompt of a template is the same on every call."""
+
+    template: str
+    stable: bool
+    stable_prefix_chars: int
+    system_prompt_chars: int
+
+
+def check_prefix_stability(
+    prompt_name: str,
+    state: Optional[dict] = None,
+    configurable: Configuration = None,
+    layout: Optional[PromptLayout] = None,
+) -> PrefixStability:
+    """
+    Render the system prompt of a template for two calls of different runs a
+    few seconds apart, with the same locale and other resources, and measure
+    the prefix they share.
+
+    Args:
+        prompt_name: Name of the prompt template to check
+        state: State of the first run, only `messages` is set by default
+        configurable: Configuration of the runs
+        layout: Layout to check, defaults to `get_prompt_layout()`
+
+    Returns:
+        The length of the shared prefix and whether it is the whole prompt
+    """
+    state = state or {"messages": []}
+    calls = [
+        (
+            {
+                "locale": "en-US",
+                "resources": [Resource(uri="rag://dataset/1", title="Report")],
+                **state,
+            },
+            datetime(2025, 1, 1, 10, 0, 0),
+        ),
+        (
+            {
+                "locale": "en-US",
+                **state,
+                "resources": [Resource(uri="rag://dataset/2", title="Notes")],
+            },
+            datetime(2025, 1, 1, 10, 0, 42),
+        ),
+    ]
+    first, second = (
+        apply_prompt_template(prompt_name, call_state, configurable, layout, now)[0][
+            "content"
+        ]
+        for call_state, now in calls
+    )
+    prefix = os.path.commonprefix([first, second])
+    return PrefixStability(
+        template=prompt_name,
+        stable=first == second,
+        stable_prefix_chars=len(prefix),
+        system_prompt_chars=len(first),
+    )
+
+
+def check_all_prefix_stability(
+    layout: Optional[PromptLayout] = None,
+) -> list[PrefixStability]:
+    """Check the prefix stability of every prompt template."""
+    return [
+        check_prefix_stability(template_name[: -len(".md")], layout=layout)
+        for template_name in env.list_templates(extensions=["md"])
+    ]
@@ -1,22 +1,33 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import asyncio
 import base64
-import json
 import logging
+import math
 import os
-from typing import Annotated, List, cast
+import shutil
+import threading
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Annotated, Any, AsyncIterator, Callable, List, Optional, cast
 from uuid import uuid4
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response, StreamingResponse
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    Response,
+    StreamingResponse,
+)
 from langchain_core.messages import AIMessageChunk, ToolMessage, BaseMessage
 from langgraph.types import Command
 
 from src.config.report_style import ReportStyle
 from src.config.tools import SELECTED_RAG_PROVIDER
 from src.graph.builder import build_graph_with_memory
+from src.graph.types import Reset
 from src.podcast.graph.builder import build_graph as build_podcast_graph
 from src.ppt.graph.builder import build_graph as build_ppt_graph
 from src.prose.graph.builder import build_graph as build_prose_graph
@@ -31,25 +42,73 @@ from src.server.chat_request import (
     GenerateProseRequest,
     TTSRequest,
 )
+from src.server.job_request import JobResponse
+from src.server.jobs import Job, SaveArtifact, create_job_manager
 from src.server.mcp_request import MCPServerMetadataRequest, MCPServerMetadataResponse
 from src.server.mcp_utils import load_mcp_tools
+from src.server.run_request import RunResponse, RunsResponse
+from src.server.runs import Run, RunQueueFullError, create_run_manager
 from src.server.rag_request import (
     RAGConfigResponse,
     RAGResourceRequest,
     RAGResourcesResponse,
 )
 from src.server.config_request import ConfigResponse
-from src.llms.llm import get_configured_llm_models
+from src.server.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from src.server.metrics import render_metrics
+from src.server.sse import SSEEventEncoder
+from src.server.streaming import (
+    coalesce_message_chunks,
+    get_coalesce_max_bytes,
+    get_coalesce_window,
+)
+from src.server.warmup import WarmupStatus, warm_up
+from src.llms.balancer import get_llm_balancer_stats
+from src.llms.hedging import get_llm_hedging_stats, llm_deadline
+from src.llms.llm import get_configured_llm_models, get_llm_response_cache
+from src.llms.scheduler import Priority, get_llm_scheduler_stats, llm_priority
 from src.tools import VolcengineTTS
+from src.tools.mcp_session_pool import get_mcp_session_pool
+from src.utils.cancellation import CancellationCallbackHandler, get_cancel_token
+from src.utils.metrics import get_metrics_callback
 
 logger = logging.getLogger(__name__)
 
 INTERNAL_SERVER_ERROR_DETAIL = "Internal Server Error"
 
+PPT_MEDIA_TYPE = (
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+)
+
+warmup_status = WarmupStatus()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so that /api/ready can answer meanwhile
+    warmup_task = asyncio.create_task(
+        warm_up(
+            {
+                "chat": lambda: graph,
+                "podcast": lambda: _get_workflow(build_podcast_graph),
+                "ppt": lambda: _get_workflow(build_ppt_graph),
+                "prose": lambda: _get_workflow(build_prose_graph),
+                "prompt_enhancer": lambda: _get_workflow(build_prompt_enhancer_graph),
+            },
+            warmup_status,
+        )
+    )
+    yield
+    warmup_task.cancel()
+    job_manager.shutdown()
+    await get_mcp_session_pool().close()
+
+
 app = FastAPI(
     title="DeerFlow API",
     description="API for Deer",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -59,32 +118,188 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    expose_headers=["X-Run-ID"],  # The run of a chat stream, to cancel it
 )
 
 graph = build_graph_with_memory()
 
+# Research runs in the background, that clients follow and reconnect to
+run_manager = create_run_manager()
+
+# Podcasts and presentations generated by worker threads
+job_manager = create_job_manager()
+
+# Compiled graphs by the function building them
+_workflows: dict[Callable[[], Any], Any] = {}
+# Handlers running in worker threads may ask for the same graph at once
+_workflows_lock = threading.Lock()
+
+
+def _get_workflow(build_workflow: Callable[[], Any]) -> Any:
+    """Return the graph built by `build_workflow`, compiling it only once."""
+    with _workflows_lock:
+        if build_workflow not in _workflows:
+            _workflows[build_workflow] = build_workflow()
+        return _workflows[build_workflow]
+
+
+@app.get("/api/ready")
+async def ready():
+    """Report whether the warm-up is done, with 503 until it succeeded."""
+    return JSONResponse(
+        content=warmup_status.to_dict(),
+        status_code=200 if warmup_status.ready else 503,
+    )
+
 
 @app.post("/api/chat/stream")
-async def chat_stream(request: ChatRequest):
+async def chat_stream(
+    request: ChatRequest,
+    last_event_id: Annotated[Optional[int], Header()] = None,
+    x_client_id: Annotated[Optional[str], Header()] = None,
+):
     thread_id = request.thread_id
+    if last_event_id is not None:
+        # A client reconnecting to the stream of the thread
+        if thread_id == "__default__":
+            raise HTTPException(
+                status_code=400,
+                detail="Resuming a stream requires the thread_id it was started with",
+            )
+        return _resume_chat_stream(thread_id, last_event_id)
     if thread_id == "__default__":
         thread_id = str(uuid4())
+    run = _start_run(
+        thread_id,
+        _chat_workflow_events(request, thread_id),
+        x_client_id,
+        resumable=bool(request.resumable),
+        deadline_seconds=request.deadline_seconds,
+    )
+    # The run stops when the client disconnects, unless it is resumable
     return StreamingResponse(
-        _astream_workflow_generator(
-            request.model_dump()["messages"],
-            thread_id,
-            request.resources,
-            request.max_plan_iterations,
-            request.max_step_num,
-            request.max_search_results,
-            request.auto_accepted_plan,
-            request.interrupt_feedback,
-            request.mcp_settings,
-            request.enable_background_investigation,
-            request.report_style,
-            request.enable_deep_thinking,
-        ),
+        run.events.subscribe(),
         media_type="text/event-stream",
+        headers={"X-Run-ID": run.id},
+    )
+
+
+@app.get("/api/chat/stream/{thread_id}")
+async def resume_chat_stream(
+    thread_id: str, last_event_id: Annotated[Optional[int], Header()] = None
+):
+    """Follow the stream of a thread, replaying the events after `Last-Event-ID`."""
+    return _resume_chat_stream(thread_id, last_event_id or 0)
+
+
+def _resume_chat_stream(thread_id: str, last_event_id: int) -> StreamingResponse:
+    run = run_manager.latest(thread_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Stream not found")
+    return StreamingResponse(
+        run.events.subscribe(last_event_id), media_type="text/event-stream"
+    )
+
+
+@app.post("/api/runs", response_model=RunResponse, status_code=202)
+async def start_run(
+    request: ChatRequest, x_client_id: Annotated[Optional[str], Header()] = None
+):
+    """Start a research run that goes on without any client following it."""
+    thread_id = request.thread_id
+    if thread_id == "__default__":
+        thread_id = str(uuid4())
+    run = _start_run(
+        thread_id,
+        _chat_workflow_events(request, thread_id),
+        x_client_id,
+        detached=True,
+        deadline_seconds=request.deadline_seconds,
+    )
+    return run.to_dict()
+
+
+@app.get("/api/runs", response_model=RunsResponse)
+async def list_runs():
+    """List the runs, with the number of runs waiting and executing."""
+    return {
+        "runs": [run.to_dict() for run in run_manager.list()],
+        **run_manager.stats(),
+    }
+
+
+@app.get("/api/runs/{run_id}", response_model=RunResponse)
+async def get_run(run_id: str):
+    """Get the status of a run."""
+    return _get_run(run_id).to_dict()
+
+
+@app.get("/api/runs/{run_id}/stream")
+async def stream_run(
+    run_id: str, last_event_id: Annotated[Optional[int], Header()] = None
+):
+    """Follow the events of a run, replaying the events after `Last-Event-ID`."""
+    run = _get_run(run_id)
+    return StreamingResponse(
+        run.events.subscribe(last_event_id or 0), media_type="text/event-stream"
+    )
+
+
+@app.post("/api/runs/{run_id}/cancel", response_model=RunResponse)
+async def cancel_run(run_id: str):
+    """Cancel a run, the runs already finished are left as they are."""
+    run = run_manager.cancel(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run.to_dict()
+
+
+def _start_run(
+    thread_id: str,
+    events: AsyncIterator[str],
+    client_id: Optional[str],
+    detached: bool = False,
+    resumable: bool = False,
+    deadline_seconds: Optional[float] = None,
+) -> Run:
+    try:
+        return run_manager.start(
+            thread_id, events, detached, client_id, resumable, deadline_seconds
+        )
+    except RunQueueFullError as e:
+        # Refused at once rather than waiting, the client retries later
+        headers = None
+        if e.retry_after is not None:
+            headers = {"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+        raise HTTPException(status_code=429, detail=str(e), headers=headers)
+
+
+def _get_run(run_id: str):
+    run = run_manager.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return run
+
+
+def _chat_workflow_events(request: ChatRequest, thread_id: str):
+    return _astream_workflow_generator(
+        request.model_dump()["messages"],
+        thread_id,
+        request.resources,
+        request.max_plan_iterations,
+        request.max_step_num,
+        request.max_search_results,
+        request.auto_accepted_plan,
+        request.interrupt_feedback,
+        request.mcp_settings,
+        request.enable_background_investigation,
+        request.report_style,
+        request.enable_deep_thinking,
+        request.max_parallel_steps,
+        request.speculative_search,
+        request.research_cache,
+        request.deadline_seconds,
+        request.stream_plan_steps,
     )
 
 
@@ -101,13 +316,22 @@ async def _astream_workflow_generator(
     enable_background_investigation: bool,
     report_style: ReportStyle,
     enable_deep_thinking: bool,
+    max_parallel_steps: int = 3,
+    speculative_search: bool = False,
+    research_cache: Optional[str] = None,
+    deadline_seconds: Optional[float] = None,
+    stream_plan_steps: bool = False,
 ):
     input_ = {
         "messages": messages,
         "plan_iterations": 0,
         "final_report": "",
+        "cached_report": "",
+        "early_step_results": [],
+        "step_results": Reset(),
         "current_plan": None,
-        "observations": [],
+        "observations": Reset(),
+        "context_tokens_saved": Reset(),
         "auto_accepted_plan": auto_accepted_plan,
         "enable_background_investigation": enable_background_investigation,
         "research_topic": messages[-1]["content"] if messages else "",
@@ -118,7 +342,7 @@ async def _astream_workflow_generator(
         if messages:
             resume_msg += f" {messages[-1]['content']}"
         input_ = Command(resume=resume_msg)
-    async for agent, _, event_data in graph.astream(
+    events = graph.astream(
         input_,
         config={
             "thread_id": thread_id,
@@ -129,13 +353,52 @@ async def _astream_workflow_generator(
             "mcp_settings": mcp_settings,
             "report_style": report_style.value,
             "enable_deep_thinking": enable_deep_thinking,
+            "max_parallel_steps": max_parallel_steps,
+            "speculative_search": speculative_search,
+            "research_cache": research_cache,
+            "stream_plan_steps": stream_plan_steps,
+            "callbacks": _run_callbacks(),
         },
-        stream_mode=["messages", "updates"],
+        stream_mode=["messages", "updates", "custom"],
         subgraphs=True,
+    )
+    workflow_events = _workflow_events(
+        thread_id, _with_llm_deadline(deadline_seconds, events)
+    )
+    # Token chunks are merged into fewer, larger frames
+    encoder = SSEEventEncoder()
+    async for event_type, data in coalesce_message_chunks(
+        workflow_events, get_coalesce_window(), get_coalesce_max_bytes()
     ):
+        yield encoder.encode(event_type, data)
+
+
+def _run_callbacks() -> list:
+    callbacks = [get_metrics_callback()]
+    cancel_token = get_cancel_token()
+    if cancel_token is not None:
+        # Stops the calls of the run once it is cancelled, in worker threads too
+        callbacks.append(CancellationCallbackHandler(cancel_token))
+    return callbacks
+
+
+async def _workflow_events(thread_id: str, events: AsyncIterator[Any]):
+    """Turn the chunks of a graph stream into pairs of SSE event type and data."""
+    async for agent, mode, event_data in events:
+        if mode == "custom":
+            # Events sent by the nodes, e.g. the steps of the plan being generated
+            yield (
+                event_data["event"],
+                {
+                    "thread_id": thread_id,
+                    "agent": event_data["agent"],
+                    **event_data["data"],
+                },
+            )
+            continue
         if isinstance(event_data, dict):
             if "__interrupt__" in event_data:
-                yield _make_event(
+                yield (
                     "interrupt",
                     {
                         "thread_id": thread_id,
@@ -155,7 +418,8 @@ async def _astream_workflow_generator(
         )
         event_stream_message: dict[str, any] = {
             "thread_id": thread_id,
-            "agent": agent[0].split(":")[0],
+            # Steps started by the planner stream under the name of their agent
+            "agent": message_metadata.get("step_agent") or agent[0].split(":")[0],
             "id": message_chunk.id,
             "role": "assistant",
             "content": message_chunk.content,
@@ -171,7 +435,7 @@ async def _astream_workflow_generator(
         if isinstance(message_chunk, ToolMessage):
             # Tool Message - Return the result of the tool call
             event_stream_message["tool_call_id"] = message_chunk.tool_call_id
-            yield _make_event("tool_call_result", event_stream_message)
+            yield "tool_call_result", event_stream_message
         elif isinstance(message_chunk, AIMessageChunk):
             # AI Message - Raw message tokens
             if message_chunk.tool_calls:
@@ -180,22 +444,16 @@ async def _astream_workflow_generator(
                 event_stream_message["tool_call_chunks"] = (
                     message_chunk.tool_call_chunks
                 )
-                yield _make_event("tool_calls", event_stream_message)
+                yield "tool_calls", event_stream_message
             elif message_chunk.tool_call_chunks:
                 # AI Message - Tool Call Chunks
                 event_stream_message["tool_call_chunks"] = (
                     message_chunk.tool_call_chunks
                 )
-                yield _make_event("tool_call_chunks", event_stream_message)
+                yield "tool_call_chunks", event_stream_message
             else:
                 # AI Message - Raw message tokens
-                yield _make_event("message_chunk", event_stream_message)
-
-
-def _make_event(event_type: str, data: dict[str, any]):
-    if data.get("content") == "":
-        data.pop("content")
-    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+                yield "message_chunk", event_stream_message
 
 
 @app.post("/api/tts")
@@ -259,8 +517,12 @@ async def generate_podcast(request: GeneratePodcastRequest):
     try:
         report_content = request.content
         print(report_content)
-        workflow = build_podcast_graph()
-        final_state = workflow.invoke({"input": report_content})
+        workflow = _get_workflow(build_podcast_graph)
+        with llm_priority(Priority.BACKGROUND):
+            # The thread inherits the priority of the context
+            final_state = await asyncio.to_thread(
+                workflow.invoke, {"input": report_content}
+            )
         audio_bytes = final_state["output"]
         return Response(content=audio_bytes, media_type="audio/mp3")
     except Exception as e:
@@ -273,26 +535,135 @@ async def generate_ppt(request: GeneratePPTRequest):
     try:
         report_content = request.content
         print(report_content)
-        workflow = build_ppt_graph()
-        final_state = workflow.invoke({"input": report_content})
+        workflow = _get_workflow(build_ppt_graph)
+        with llm_priority(Priority.BACKGROUND):
+            final_state = await asyncio.to_thread(
+                workflow.invoke, {"input": report_content}
+            )
         generated_file_path = final_state["generated_file_path"]
         with open(generated_file_path, "rb") as f:
             ppt_bytes = f.read()
-        return Response(
-            content=ppt_bytes,
-            media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-        )
+        return Response(content=ppt_bytes, media_type=PPT_MEDIA_TYPE)
     except Exception as e:
         logger.exception(f"Error occurred during ppt generation: {str(e)}")
         raise HTTPException(status_code=500, detail=INTERNAL_SERVER_ERROR_DETAIL)
 
 
+@app.post("/api/podcast/jobs", response_model=JobResponse, status_code=202)
+async def submit_podcast_job(request: GeneratePodcastRequest):
+    """Generate a podcast in the background, see `/api/jobs/{job_id}`."""
+    return _submit_job(
+        "podcast", build_podcast_graph, request.content, _save_podcast, "audio/mp3"
+    )
+
+
+@app.post("/api/ppt/jobs", response_model=JobResponse, status_code=202)
+async def submit_ppt_job(request: GeneratePPTRequest):
+    """Generate a presentation in the background, see `/api/jobs/{job_id}`."""
+    return _submit_job(
+        "ppt", build_ppt_graph, request.content, _save_ppt, PPT_MEDIA_TYPE
+    )
+
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    """Get the status and progress of a job."""
+    return _get_job(job_id).to_dict()
+
+
+@app.get("/api/jobs/{job_id}/stream")
+async def stream_job(
+    job_id: str, last_event_id: Annotated[Optional[int], Header()] = None
+):
+    """Follow the progress of a job, replaying the events after `Last-Event-ID`."""
+    job = _get_job(job_id)
+    return StreamingResponse(
+        job.events.subscribe(last_event_id or 0), media_type="text/event-stream"
+    )
+
+
+@app.get("/api/jobs/{job_id}/artifact")
+async def download_job_artifact(job_id: str):
+    """Download the file generated by a job."""
+    job = _get_job(job_id)
+    if job.artifact_path is None:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status.value}")
+    return FileResponse(
+        job.artifact_path, media_type=job.media_type, filename=job.artifact_path.name
+    )
+
+
+@app.post("/api/jobs/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    """Cancel a job, the jobs already finished are left as they are."""
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+
+def _submit_job(
+    kind: str,
+    build_workflow: Callable[[], Any],
+    content: str,
+    save_artifact: SaveArtifact,
+    media_type: str,
+) -> dict[str, Any]:
+    try:
+        workflow = _get_workflow(build_workflow)
+    except Exception as e:
+        logger.exception(f"Error occurred during {kind} job submission: {str(e)}")
+        raise HTTPException(status_code=500, detail=INTERNAL_SERVER_ERROR_DETAIL)
+    with llm_priority(Priority.BACKGROUND):
+        # The worker thread inherits the priority of the context
+        job = job_manager.submit(
+            kind, workflow, {"input": content}, save_artifact, media_type
+        )
+    return job.to_dict()
+
+
+def _get_job(job_id: str) -> Job:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+def _save_podcast(state: dict[str, Any], directory: Path) -> Path:
+    path = directory / "podcast.mp3"
+    path.write_bytes(state["output"])
+    return path
+
+
+def _save_ppt(state: dict[str, Any], directory: Path) -> Path:
+    path = directory / "presentation.pptx"
+    shutil.move(state["generated_file_path"], path)
+    return path
+
+
+async def _with_llm_deadline(seconds: Optional[float], events: AsyncIterator[Any]):
+    """Iterate over a graph stream, failing its hedged LLM requests after `seconds`.
+
+    The run itself is stopped at its deadline by the run manager.
+    """
+    with llm_deadline(seconds):
+        async for event in events:
+            yield event
+
+
+async def _with_llm_priority(priority: Priority, events: AsyncIterator[Any]):
+    """Iterate over a graph stream, sending its LLM requests with the given priority."""
+    with llm_priority(priority):
+        async for event in events:
+            yield event
+
+
 @app.post("/api/prose/generate")
 async def generate_prose(request: GenerateProseRequest):
     try:
         sanitized_prompt = request.prompt.replace("\r\n", "").replace("\n", "")
         logger.info(f"Generating prose for prompt: {sanitized_prompt}")
-        workflow = build_prose_graph()
+        workflow = _get_workflow(build_prose_graph)
         events = workflow.astream(
             {
                 "content": request.prompt,
@@ -303,7 +674,10 @@ async def generate_prose(request: GenerateProseRequest):
             subgraphs=True,
         )
         return StreamingResponse(
-            (f"data: {event[0].content}\n\n" async for _, event in events),
+            (
+                f"data: {event[0].content}\n\n"
+                async for _, event in _with_llm_priority(Priority.BACKGROUND, events)
+            ),
             media_type="text/event-stream",
         )
     except Exception as e:
@@ -341,7 +715,7 @@ async def enhance_prompt(request: EnhancePromptRequest):
         else:
             report_style = ReportStyle.ACADEMIC
 
-        workflow = build_prompt_enhancer_graph()
+        workflow = _get_workflow(build_prompt_enhancer_graph)
         final_state = workflow.invoke(
             {
                 "prompt": request.prompt,
@@ -414,3 +788,38 @@ async def config():
         rag=RAGConfigResponse(provider=SELECTED_RAG_PROVIDER),
         models=get_configured_llm_models(),
     )
+
+
+@app.get("/api/metrics")
+async def metrics():
+    """Get the metrics of the LLM and tool calls in the Prometheus text format."""
+    return Response(
+        content=render_metrics(graph.checkpointer), media_type=METRICS_CONTENT_TYPE
+    )
+
+
+@app.get("/api/llm/cache")
+async def llm_cache_stats():
+    """Get the hit metrics of the LLM response cache."""
+    response_cache = get_llm_response_cache()
+    if response_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **response_cache.stats()}
+
+
+@app.get("/api/llm/scheduler")
+async def llm_scheduler_stats():
+    """Get the queue depth and wait times of the scheduled LLM requests."""
+    return get_llm_scheduler_stats()
+
+
+@app.get("/api/llm/hedging")
+async def llm_hedging_stats():
+    """Get the hedged requests and latency thresholds of the hedged LLMs."""
+    return get_llm_hedging_stats()
+
+
+@app.get("/api/llm/endpoints")
+async def llm_endpoint_stats():
+    """Get the load, latency and health of the endpoints of the balanced LLMs."""
+    return get_llm_balancer_stats()
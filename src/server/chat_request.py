@@ -1,7 +1,7 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
-from typing import List, Optional, Union
+from typing import List, Literal, Optional, Union
 
 from pydantic import BaseModel, Field
 
@@ -47,6 +47,9 @@ class ChatRequest(BaseModel):
     max_search_results: Optional[int] = Field(
         3, description="The maximum number of search results"
     )
+    max_parallel_steps: Optional[int] = Field(
+        3, description="The maximum number of plan steps executed in parallel"
+    )
     auto_accepted_plan: Optional[bool] = Field(
         False, description="Whether to automatically accept the plan"
     )
@@ -59,6 +62,26 @@ class ChatRequest(BaseModel):
     enable_background_investigation: Optional[bool] = Field(
         True, description="Whether to get background investigation before plan"
     )
+    speculative_search: Optional[bool] = Field(
+        False,
+        description="Whether to start the background investigation while the coordinator is still answering",
+    )
+    research_cache: Optional[Literal["plan", "report"]] = Field(
+        None,
+        description="Reuse the plan, or the report, of a similar recent question",
+    )
+    stream_plan_steps: Optional[bool] = Field(
+        False,
+        description="Whether to send the plan steps as they are generated, and start the first ones early when the plan is auto accepted",
+    )
+    resumable: Optional[bool] = Field(
+        False,
+        description="Whether the run goes on for a while after the client disconnects, for it to reconnect with Last-Event-ID, instead of stopping at once",
+    )
+    deadline_seconds: Optional[float] = Field(
+        None,
+        description="Seconds the run may execute once started, after which it is cancelled and fails, no deadline if unset",
+    )
     report_style: Optional[ReportStyle] = Field(
         ReportStyle.ACADEMIC, description="The style of the report"
     )
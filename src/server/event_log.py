@@ -0,0 +1,135 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Numbered logs of the server-sent events of the chat streams, so that clients
+can reconnect with `Last-Event-ID` and receive the events they missed.
+"""
+
+import asyncio
+import json
+import logging
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Events of a stream kept in memory
+DEFAULT_MAX_EVENTS = 2048
+
+
+class EventLog:
+    """
+    Events of a stream, numbered from 1.
+
+    The latest `max_events` events are kept in memory. With a `spill_path`, the
+    older events are appended to that file instead of being dropped.
+    """
+
+    def __init__(
+        self, max_events: int = DEFAULT_MAX_EVENTS, spill_path: Optional[Path] = None
+    ):
+        self.max_events = max(1, max_events)
+        self.spill_path = spill_path
+        self.last_id = 0
+        self.closed = False
+        self.subscribers = 0
+        # Called when the last subscriber leaves
+        self.on_detach: Optional[Callable[[], None]] = None
+        self._events: deque[tuple[int, str]] = deque()
+        self._spill_file = None
+        self._spilled_id = 0
+        self._changed = asyncio.Event()
+
+    def append(self, event: str) -> int:
+        """Add an event in the server-sent events format, return its id."""
+        self.last_id += 1
+        self._events.append((self.last_id, f"id: {self.last_id}\n{event}"))
+        if len(self._events) > self.max_events:
+            self._spill(self._events.popleft())
+        self._notify()
+        return self.last_id
+
+    def close(self) -> None:
+        """Mark the end of the stream, subscribers stop after the last event."""
+        self.closed = True
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        self._notify()
+
+    def discard(self) -> None:
+        """Drop the events spilled to disk."""
+        self.close()
+        if self.spill_path is not None and self._spilled_id:
+            self.spill_path.unlink(missing_ok=True)
+            self._spilled_id = 0
+
+    def events_after(self, last_id: int) -> list[tuple[int, str]]:
+        """The events still available after `last_id`, oldest first."""
+        events = []
+        if self._spilled_id > last_id:
+            events = self._read_spilled(last_id)
+        first_id = self._events[0][0] if self._events else self.last_id + 1
+        start = max(0, last_id + 1 - first_id)
+        events.extend(self._events[i] for i in range(start, len(self._events)))
+        return events
+
+    async def subscribe(self, last_id: int = 0) -> AsyncIterator[str]:
+        """Replay the events after `last_id`, then follow the stream to its end."""
+        self.subscribers += 1
+        try:
+            while True:
+                changed = self._changed
+                if last_id < self.last_id:
+                    events = self.events_after(last_id)
+                    if not events or events[0][0] > last_id + 1:
+                        first_id = events[0][0] if events else self.last_id + 1
+                        yield _missed_event(last_id + 1, first_id - 1)
+                    for event_id, event in events:
+                        yield event
+                        last_id = event_id
+                    continue
+                if self.closed:
+                    return
+                await changed.wait()
+        finally:
+            self.subscribers -= 1
+            if not self.subscribers and self.on_detach is not None:
+                self.on_detach()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _spill(self, event: tuple[int, str]) -> None:
+        if self.spill_path is None:
+            return
+        try:
+            if self._spill_file is None:
+                self._spill_file = open(self.spill_path, "a", encoding="utf-8")
+            self._spill_file.write(json.dumps(event, ensure_ascii=False) + "\n")
+            self._spilled_id = event[0]
+        except OSError as e:
+            logger.warning(f"Failed to spill events to {self.spill_path}: {e}")
+
+    def _read_spilled(self, last_id: int) -> list[tuple[int, str]]:
+        if self._spill_file is not None:
+            self._spill_file.flush()
+        events = []
+        try:
+            with open(self.spill_path, encoding="utf-8") as file:
+                for line in file:
+                    event_id, event = json.loads(line)
+                    if event_id > last_id:
+                        events.append((event_id, event))
+        except OSError as e:
+            logger.warning(f"Failed to read events from {self.spill_path}: {e}")
+        return events
+
+
+def _missed_event(first_id: int, last_id: int) -> str:
+    """Event telling a client that events are no longer available."""
+    data = json.dumps({"first_id": first_id, "last_id": last_id})
+    return f"event: events_missed\ndata: {data}\n\n"
@@ -0,0 +1,30 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class JobResponse(BaseModel):
+    """Response model for a job generating a file."""
+
+    job_id: str = Field(..., description="The id of the job")
+    kind: str = Field(..., description="What the job generates, podcast or ppt")
+    status: str = Field(
+        ...,
+        description="One of pending, running, succeeded, failed and cancelled",
+    )
+    stage: Optional[str] = Field(
+        None, description="The last step of the workflow executed"
+    )
+    progress: float = Field(..., description="The progress of the job, from 0 to 1")
+    error: Optional[str] = Field(None, description="The error of a failed job")
+    artifact_url: Optional[str] = Field(
+        None, description="Where to download the file of a succeeded job"
+    )
+    created_at: float = Field(..., description="When the job was submitted")
+    started_at: Optional[float] = Field(
+        None, description="When a worker began executing the job"
+    )
+    finished_at: Optional[float] = Field(None, description="When the job ended")
@@ -0,0 +1,283 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Jobs generating files, e.g. podcasts and presentations, executed by a pool of
+worker threads outside of the event loop.
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Optional
+from uuid import uuid4
+
+from src.server.event_log import EventLog
+from src.utils.cancellation import (
+    CancellationCallbackHandler,
+    CancelToken,
+    RunCancelledError,
+    set_cancel_token,
+)
+from src.utils.env import env_float
+
+logger = logging.getLogger(__name__)
+
+# Jobs executed at once, the others wait for a worker
+DEFAULT_MAX_WORKERS = 2
+# Seconds a finished job and its file stay available
+DEFAULT_RETENTION = 3600.0
+
+# Saves the file of a job from the final state of its workflow, in a directory
+SaveArtifact = Callable[[dict[str, Any], Path], Path]
+
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class Job:
+    """A job, its progress and the file it generated."""
+
+    def __init__(self, kind: str, media_type: str, stages: int):
+        self.id = str(uuid4())
+        self.kind = kind
+        self.media_type = media_type
+        self.status = JobStatus.PENDING
+        # Nodes of the workflow executed, out of `stages`
+        self.stage: Optional[str] = None
+        self.completed_stages = 0
+        self.stages = stages
+        self.error: Optional[str] = None
+        self.artifact_path: Optional[Path] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.events = EventLog()
+        self.cancel_token = CancelToken()
+        self.task: Optional[asyncio.Task] = None
+        # Execution of the workflow by the worker threads
+        self.future: Optional[Future] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (
+            JobStatus.SUCCEEDED,
+            JobStatus.FAILED,
+            JobStatus.CANCELLED,
+        )
+
+    @property
+    def progress(self) -> float:
+        if self.status == JobStatus.SUCCEEDED:
+            return 1.0
+        return round(self.completed_stages / self.stages, 3) if self.stages else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status.value,
+            "stage": self.stage,
+            "progress": self.progress,
+            "error": self.error,
+            "artifact_url": (
+                f"/api/jobs/{self.id}/artifact" if self.artifact_path else None
+            ),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """
+    Execute the workflows of jobs on `max_workers` worker threads.
+
+    Jobs wait for a free worker in submission order. Their progress is sent
+    as `job_progress` events after each node of their workflow, and their file
+    is saved in `artifact_dir`. Finished jobs and their files are deleted after
+    `retention` seconds.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        artifact_dir: Optional[str] = None,
+        retention: float = DEFAULT_RETENTION,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.artifact_dir = Path(
+            artifact_dir or os.path.join(tempfile.gettempdir(), "deerflow_jobs")
+        )
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(
+            self.max_workers, thread_name_prefix="deerflow-job"
+        )
+        self._jobs: dict[str, Job] = {}
+
+    def submit(
+        self,
+        kind: str,
+        workflow: Any,
+        input_: dict[str, Any],
+        save_artifact: SaveArtifact,
+        media_type: str,
+    ) -> Job:
+        """
+        Start a job executing `workflow` with `input_`.
+
+        The worker thread inherits the context variables of the caller, e.g.
+        the priority of the LLM requests.
+        """
+        stages = sum(node != "__start__" for node in getattr(workflow, "nodes", ()))
+        job = Job(kind, media_type, stages)
+        self._jobs[job.id] = job
+        self._send_progress(job)
+        job.task = asyncio.create_task(self._run(job, workflow, input_, save_artifact))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a job, return None if it is unknown.
+
+        A pending job is cancelled at once, a running one once its worker
+        reaches its next check of the cancel token.
+        """
+        job = self._jobs.get(job_id)
+        if job is not None and not job.done:
+            logger.info(f"Cancelling job {job.id}")
+            job.cancel_token.cancel()
+            if job.status == JobStatus.PENDING:
+                if job.future is not None:
+                    job.future.cancel()
+                self._finish(job, JobStatus.CANCELLED)
+        return job
+
+    def stats(self) -> dict[str, int]:
+        statuses = [job.status for job in self._jobs.values()]
+        return {
+            "max_workers": self.max_workers,
+            "pending": statuses.count(JobStatus.PENDING),
+            "running": statuses.count(JobStatus.RUNNING),
+        }
+
+    def shutdown(self) -> None:
+        for job in self._jobs.values():
+            job.cancel_token.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(
+        self,
+        job: Job,
+        workflow: Any,
+        input_: dict[str, Any],
+        save_artifact: SaveArtifact,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        job.future = self._executor.submit(
+            context.run,
+            self._execute,
+            loop,
+            job,
+            workflow,
+            input_,
+            save_artifact,
+        )
+        try:
+            artifact_path = await asyncio.wrap_future(job.future)
+        except (RunCancelledError, asyncio.CancelledError):
+            logger.info(f"Job {job.id} cancelled")
+            job.cancel_token.cancel()
+            self._finish(job, JobStatus.CANCELLED)
+        except Exception as e:
+            logger.exception(f"Job {job.id} of kind {job.kind} failed")
+            self._finish(job, JobStatus.FAILED, str(e))
+        else:
+            job.artifact_path = artifact_path
+            self._finish(job, JobStatus.SUCCEEDED)
+
+    def _execute(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        job: Job,
+        workflow: Any,
+        input_: dict[str, Any],
+        save_artifact: SaveArtifact,
+    ) -> Path:
+        """Execute the workflow of a job in a worker thread, return its file."""
+        set_cancel_token(job.cancel_token)
+        job.cancel_token.raise_if_cancelled()
+        loop.call_soon_threadsafe(self._set_running, job)
+        state: dict[str, Any] = {}
+        events = workflow.stream(
+            input_,
+            # Stops the LLM calls of the workflow once the job is cancelled
+            config={"callbacks": [CancellationCallbackHandler(job.cancel_token)]},
+            stream_mode=["updates", "values"],
+        )
+        for mode, chunk in events:
+            job.cancel_token.raise_if_cancelled()
+            if mode == "values":
+                state = chunk
+                continue
+            for node in chunk:
+                loop.call_soon_threadsafe(self._complete_stage, job, node)
+        directory = self.artifact_dir / job.id
+        directory.mkdir(parents=True, exist_ok=True)
+        return save_artifact(state, directory)
+
+    def _set_running(self, job: Job) -> None:
+        if not job.done:
+            job.status = JobStatus.RUNNING
+            job.started_at = time.time()
+            self._send_progress(job)
+
+    def _complete_stage(self, job: Job, node: str) -> None:
+        if not job.done:
+            job.stage = node
+            job.completed_stages += 1
+            self._send_progress(job)
+
+    def _finish(self, job: Job, status: JobStatus, error: Optional[str] = None) -> None:
+        if job.done:
+            return
+        job.status = status
+        job.error = error
+        job.finished_at = time.time()
+        self._send_progress(job)
+        job.events.close()
+        asyncio.get_running_loop().call_later(self.retention, self._remove, job)
+
+    def _send_progress(self, job: Job) -> None:
+        data = json.dumps(job.to_dict(), ensure_ascii=False)
+        job.events.append(f"event: job_progress\ndata: {data}\n\n")
+
+    def _remove(self, job: Job) -> None:
+        self._jobs.pop(job.id, None)
+        job.events.discard()
+        shutil.rmtree(self.artifact_dir / job.id, ignore_errors=True)
+
+
+def create_job_manager() -> JobManager:
+    """Create the job manager configured by the environment."""
+    return JobManager(
+        max_workers=int(env_float("JOB_MAX_WORKERS", DEFAULT_MAX_WORKERS)),
+        artifact_dir=os.getenv("JOB_ARTIFACT_DIR") or None,
+        retention=env_float("JOB_RETENTION", DEFAULT_RETENTION),
+    )
@@ -0,0 +1,154 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from typing import Any, Optional
+
+from src.checkpointer import BoundedMemorySaver
+from src.llms.balancer import get_llm_balancer_stats
+from src.llms.hedging import get_llm_hedging_stats
+from src.llms.llm import get_llm_response_cache
+from src.llms.scheduler import get_llm_scheduler_stats
+from src.utils.metrics import registry, render_samples
+
+# Content type of the Prometheus text format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _llm_stats_lines() -> list[str]:
+    """Current state of the response cache, schedulers, balancers and hedging."""
+    lines = []
+    response_cache = get_llm_response_cache()
+    if response_cache is not None:
+        stats = response_cache.stats()
+        lines += render_samples(
+            "deerflow_llm_cache_entries",
+            "Responses in the LLM response cache.",
+            [({}, stats["size"])],
+        )
+        lines += render_samples(
+            "deerflow_llm_cache_lookups_total",
+            "Lookups of the LLM response cache by result.",
+            [
+                ({"result": "memory_hit"}, stats["memory_hits"]),
+                ({"result": "disk_hit"}, stats["disk_hits"]),
+                ({"result": "miss"}, stats["misses"]),
+            ],
+            type="counter",
+        )
+
+    schedulers = get_llm_scheduler_stats()
+    if schedulers:
+        lines += render_samples(
+            "deerflow_llm_scheduler_in_flight",
+            "LLM requests in flight by LLM type.",
+            [
+                ({"llm_type": name}, stats["in_flight"])
+                for name, stats in schedulers.items()
+            ],
+        )
+        lines += render_samples(
+            "deerflow_llm_scheduler_queued",
+            "LLM requests waiting to be sent by LLM type and priority.",
+            [
+                ({"llm_type": name, "priority": priority}, count)
+                for name, stats in schedulers.items()
+                for priority, count in stats["queued"].items()
+            ],
+        )
+        lines += render_samples(
+            "deerflow_llm_scheduler_wait_seconds_total",
+            "Seconds the LLM requests waited to be sent by LLM type and priority.",
+            [
+                ({"llm_type": name, "priority": priority}, waits["sum"])
+                for name, stats in schedulers.items()
+                for priority, waits in stats["wait_seconds"].items()
+            ],
+            type="counter",
+        )
+
+    balancers = get_llm_balancer_stats()
+    if balancers:
+        endpoints = [
+            ({"llm_type": name, "endpoint": endpoint["base_url"]}, endpoint)
+            for name, stats in balancers.items()
+            for endpoint in stats
+        ]
+        lines += render_samples(
+            "deerflow_llm_endpoint_outstanding",
+            "LLM requests outstanding on an endpoint.",
+            [(labels, endpoint["outstanding"]) for labels, endpoint in endpoints],
+        )
+        lines += render_samples(
+            "deerflow_llm_endpoint_latency_seconds",
+            "Moving average of the latency of an endpoint.",
+            [
+                (labels, endpoint["latency"])
+                for labels, endpoint in endpoints
+                if endpoint["latency"] is not None
+            ],
+        )
+        lines += render_samples(
+            "deerflow_llm_endpoint_ejected",
+            "Whether an endpoint is ejected after failing.",
+            [(labels, int(endpoint["ejected"])) for labels, endpoint in endpoints],
+        )
+
+    policies = get_llm_hedging_stats()
+    if policies:
+        lines += render_samples(
+            "deerflow_llm_hedging_requests_total",
+            "Requests seen by the hedging of a LLM type, by outcome.",
+            [
+                ({"llm_type": name, "outcome": outcome}, stats[outcome])
+                for name, stats in policies.items()
+                for outcome in (
+                    "requests",
+                    "hedged",
+                    "hedge_wins",
+                    "budget_exhausted",
+                    "rate_limited",
+                    "deadline_exceeded",
+                )
+            ],
+            type="counter",
+        )
+    return lines
+
+
+def _checkpointer_stats_lines(checkpointer: Any) -> list[str]:
+    """Current size and evictions of the in-memory checkpointer."""
+    if not isinstance(checkpointer, BoundedMemorySaver):
+        return []
+    stats = checkpointer.stats()
+    return [
+        *render_samples(
+            "deerflow_checkpointer_threads",
+            "Conversation threads kept by the in-memory checkpointer.",
+            [({}, stats["threads"])],
+        ),
+        *render_samples(
+            "deerflow_checkpointer_bytes",
+            "Size of the checkpoints kept by the in-memory checkpointer.",
+            [({}, stats["bytes"])],
+        ),
+        *render_samples(
+            "deerflow_checkpointer_evictions_total",
+            "Threads evicted by the in-memory checkpointer by reason.",
+            [
+                ({"reason": reason}, count)
+                for reason, count in stats["evictions"].items()
+            ],
+            type="counter",
+        ),
+    ]
+
+
+def render_metrics(checkpointer: Optional[Any] = None) -> str:
+    """Render the metrics of the server in the Prometheus text format.
+
+    Args:
+        checkpointer: Checkpointer of the research graph, whose evictions are
+            reported when it is kept in memory
+    """
+    lines = _llm_stats_lines() + _checkpointer_stats_lines(checkpointer)
+    return registry.render() + ("\n".join(lines) + "\n" if lines else "")
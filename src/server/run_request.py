@@ -0,0 +1,53 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class RunResponse(BaseModel):
+    """Response model for a workflow run."""
+
+    run_id: str = Field(..., description="The id of the run")
+    thread_id: str = Field(..., description="The thread of the run")
+    status: str = Field(
+        ...,
+        description="One of pending, running, succeeded, failed and cancelled",
+    )
+    detached: bool = Field(
+        ..., description="Whether the run goes on when no client follows it"
+    )
+    resumable: bool = Field(
+        False,
+        description="Whether the run waits for its client to reconnect before stopping",
+    )
+    client_id: Optional[str] = Field(
+        None, description="The client of the run, from the X-Client-ID header"
+    )
+    events: int = Field(..., description="The number of events of the run so far")
+    subscribers: int = Field(..., description="The clients following the run")
+    error: Optional[str] = Field(None, description="The error of a failed run")
+    created_at: float = Field(..., description="When the run was started")
+    started_at: Optional[float] = Field(
+        None, description="When the run began executing, after waiting its turn"
+    )
+    finished_at: Optional[float] = Field(None, description="When the run ended")
+
+
+class RunsResponse(BaseModel):
+    """Response model for the list of workflow runs."""
+
+    runs: list[RunResponse] = Field(..., description="The runs, finished or not")
+    max_concurrent_runs: int = Field(
+        ..., description="The runs executing at once at most, 0 for no limit"
+    )
+    max_queued_runs: int = Field(
+        ..., description="The runs waiting their turn at most, 0 for no limit"
+    )
+    pending: int = Field(..., description="The runs waiting their turn")
+    running: int = Field(..., description="The runs executing")
+    finished: int = Field(..., description="The runs ended and still available")
+    mean_run_seconds: Optional[float] = Field(
+        None, description="The mean duration of the latest runs"
+    )
@@ -0,0 +1,379 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Workflow runs executed in the background of the server, independently of the
+connections following their events.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from enum import Enum
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+from uuid import uuid4
+
+from src.server.event_log import DEFAULT_MAX_EVENTS, EventLog
+from src.utils.cancellation import CancelToken, set_cancel_token
+from src.utils.env import env_float
+
+logger = logging.getLogger(__name__)
+
+# Seconds a resumable chat stream run keeps running without any client
+DEFAULT_DETACH_TIMEOUT = 60.0
+# Seconds a finished run and its events stay available
+DEFAULT_RETENTION = 300.0
+# Durations of the latest runs, the queue wait of new runs is estimated from
+RUN_DURATIONS_KEPT = 20
+
+
+class RunQueueFullError(Exception):
+    """Raised when a run can't wait for its turn, the queue being full."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        # Estimated seconds before a place frees up, None if unknown
+        self.retry_after = retry_after
+
+
+class RunStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class Run:
+    """A workflow run and the log of its events."""
+
+    def __init__(
+        self,
+        thread_id: str,
+        events: EventLog,
+        detached: bool,
+        client_id: Optional[str] = None,
+        resumable: bool = False,
+        deadline_seconds: Optional[float] = None,
+    ):
+        self.id = str(uuid4())
+        self.thread_id = thread_id
+        self.events = events
+        # Detached runs go on when no client follows them
+        self.detached = detached
+        # Resumable runs wait for their client to reconnect before stopping
+        self.resumable = resumable
+        # Runs of different clients take turns when waiting
+        self.client_id = client_id
+        # Seconds the run may execute once out of the queue, no limit if unset
+        self.deadline_seconds = deadline_seconds
+        self.status = RunStatus.PENDING
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        # Stops the sync calls of the run, executed in worker threads
+        self.cancel_token = CancelToken()
+
+    @property
+    def done(self) -> bool:
+        return self.status in (
+            RunStatus.SUCCEEDED,
+            RunStatus.FAILED,
+            RunStatus.CANCELLED,
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "run_id": self.id,
+            "thread_id": self.thread_id,
+            "status": self.status.value,
+            "detached": self.detached,
+            "resumable": self.resumable,
+            "client_id": self.client_id,
+            "events": self.events.last_id,
+            "subscribers": self.events.subscribers,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class RunManager:
+    """
+    Run workflows as background tasks, by run id.
+
+    At most `max_concurrent_runs` runs execute at once, 0 for no limit. The
+    others wait their turn in a queue of `max_queued_runs` runs, 0 for no
+    limit, and new runs are refused once it is full. A client, identified by
+    the optional client id of its runs, has at most `max_queued_runs_per_client`
+    runs waiting, and the waiting runs of the clients with the fewest runs
+    executing go first. Waiting runs send `queued` events with their position
+    and estimated wait.
+
+    Runs started by a chat stream are cancelled as soon as no client follows
+    them, or once no client has followed them for `detach_timeout` seconds for
+    resumable runs. Detached runs go on until they end or are cancelled. Finished runs stay available for `retention` seconds.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_runs: int = 0,
+        max_events: int = DEFAULT_MAX_EVENTS,
+        spill_dir: Optional[str] = None,
+        detach_timeout: float = DEFAULT_DETACH_TIMEOUT,
+        retention: float = DEFAULT_RETENTION,
+        max_queued_runs: int = 0,
+        max_queued_runs_per_client: int = 0,
+    ):
+        self.max_concurrent_runs = max(0, max_concurrent_runs)
+        self.max_queued_runs = max(0, max_queued_runs)
+        self.max_queued_runs_per_client = max(0, max_queued_runs_per_client)
+        self.max_events = max_events
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.detach_timeout = detach_timeout
+        self.retention = retention
+        self._runs: dict[str, Run] = {}
+        # Latest run of each thread
+        self._thread_runs: dict[str, str] = {}
+        # Runs waiting their turn, oldest first, with the future of their turn
+        self._queue: dict[Run, asyncio.Future] = {}
+        self._executing: list[Run] = []
+        self._durations: deque[float] = deque(maxlen=RUN_DURATIONS_KEPT)
+
+    def start(
+        self,
+        thread_id: str,
+        events: AsyncIterator[str],
+        detached: bool = False,
+        client_id: Optional[str] = None,
+        resumable: bool = False,
+        deadline_seconds: Optional[float] = None,
+    ) -> Run:
+        """
+        Start a run producing `events`, in the server-sent events format.
+
+        A run still executing `deadline_seconds` after it left the queue is
+        cancelled and fails. Raises `RunQueueFullError` if the run would have
+        to wait and the queue is full.
+        """
+        self._admit(client_id)
+        spill_path = None
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            spill_path = self.spill_dir / f"{uuid4().hex}.jsonl"
+        run = Run(
+            thread_id,
+            EventLog(self.max_events, spill_path),
+            detached,
+            client_id,
+            resumable,
+            deadline_seconds,
+        )
+        if not detached:
+            run.events.on_detach = lambda: self._on_detach(run)
+        if self._has_free_slot():
+            self._executing.append(run)
+        else:
+            self._queue[run] = asyncio.get_running_loop().create_future()
+            self._send_queued_event(run, len(self._queue))
+        run.task = asyncio.create_task(self._run(run, events))
+        run.task.add_done_callback(lambda _: self._on_task_done(run))
+        self._runs[run.id] = run
+        self._thread_runs[thread_id] = run.id
+        return run
+
+    def get(self, run_id: str) -> Optional[Run]:
+        return self._runs.get(run_id)
+
+    def latest(self, thread_id: str) -> Optional[Run]:
+        """The latest run of a thread."""
+        run_id = self._thread_runs.get(thread_id)
+        return self._runs.get(run_id) if run_id else None
+
+    def list(self) -> list[Run]:
+        return list(self._runs.values())
+
+    def cancel(self, run_id: str) -> Optional[Run]:
+        """Cancel a run, return None if it is unknown."""
+        run = self._runs.get(run_id)
+        if run is not None and not run.done:
+            logger.info(f"Cancelling run {run.id}")
+            run.cancel_token.cancel()
+            run.task.cancel()
+            if run in self._queue:
+                # Its place in the queue is free at once
+                self._release(run)
+        return run
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_concurrent_runs": self.max_concurrent_runs,
+            "max_queued_runs": self.max_queued_runs,
+            "pending": len(self._queue),
+            "running": len(self._executing),
+            "finished": sum(run.done for run in self._runs.values()),
+            "mean_run_seconds": self._mean_duration(),
+        }
+
+    def estimated_wait(self, position: int) -> Optional[float]:
+        """Seconds a run at `position` in the queue should wait, None if unknown."""
+        mean_duration = self._mean_duration()
+        if mean_duration is None or not self.max_concurrent_runs:
+            return None
+        return round(position * mean_duration / self.max_concurrent_runs, 1)
+
+    def _has_free_slot(self) -> bool:
+        return (
+            not self.max_concurrent_runs
+            or len(self._executing) < self.max_concurrent_runs
+        )
+
+    def _admit(self, client_id: Optional[str]) -> None:
+        if self._has_free_slot() and not self._queue:
+            return
+        queued = len(self._queue)
+        if self.max_queued_runs and queued >= self.max_queued_runs:
+            raise RunQueueFullError(
+                f"{queued} runs are already waiting",
+                self.estimated_wait(1),
+            )
+        if client_id is not None and self.max_queued_runs_per_client:
+            queued = sum(run.client_id == client_id for run in self._queue)
+            if queued >= self.max_queued_runs_per_client:
+                raise RunQueueFullError(
+                    f"{queued} runs of the client are already waiting",
+                    self.estimated_wait(1),
+                )
+
+    async def _run(self, run: Run, events: AsyncIterator[str]) -> None:
+        # Inherited by the tasks and worker threads of the run
+        set_cancel_token(run.cancel_token)
+        deadline = None
+        try:
+            turn = self._queue.get(run)
+            if turn is not None:
+                await turn
+            run.status = RunStatus.RUNNING
+            run.started_at = time.time()
+            # The deadline starts once the run leaves the queue
+            deadline = asyncio.timeout(run.deadline_seconds or None)
+            async with deadline:
+                async for event in events:
+                    run.events.append(event)
+            run.status = RunStatus.SUCCEEDED
+            self._durations.append(time.time() - run.started_at)
+        except asyncio.CancelledError:
+            logger.info(f"Run {run.id} of thread {run.thread_id} cancelled")
+            run.cancel_token.cancel()
+            run.status = RunStatus.CANCELLED
+        except Exception as e:
+            run.status = RunStatus.FAILED
+            if deadline is not None and deadline.expired():
+                logger.warning(
+                    f"Run {run.id} of thread {run.thread_id} exceeded its deadline"
+                )
+                # Stops the calls still executing in worker threads
+                run.cancel_token.cancel()
+                run.error = (
+                    f"The run exceeded its deadline of {run.deadline_seconds} seconds"
+                )
+            else:
+                logger.exception(f"Run {run.id} of thread {run.thread_id} failed")
+                run.error = str(e)
+        finally:
+            run.finished_at = time.time()
+            run.events.close()
+            self._release(run)
+            asyncio.get_running_loop().call_later(self.retention, self._remove, run)
+
+    def _on_task_done(self, run: Run) -> None:
+        if run.finished_at is None:
+            # Cancelled before it began, `_run` did not execute at all
+            run.status = RunStatus.CANCELLED
+            run.finished_at = time.time()
+            run.events.close()
+            self._release(run)
+            asyncio.get_running_loop().call_later(self.retention, self._remove, run)
+
+    def _release(self, run: Run) -> None:
+        """Give the place of a run leaving the queue or ending to the next runs."""
+        if run in self._executing:
+            self._executing.remove(run)
+        left_queue = self._queue.pop(run, None) is not None
+        while self._queue and self._has_free_slot():
+            following = self._next_in_turn()
+            self._queue.pop(following).set_result(None)
+            self._executing.append(following)
+            left_queue = True
+        if left_queue:
+            for position, queued in enumerate(self._queue, 1):
+                self._send_queued_event(queued, position)
+
+    def _next_in_turn(self) -> Run:
+        """The waiting run of the client with the fewest runs executing."""
+        executing: dict[Optional[str], int] = {}
+        for run in self._executing:
+            executing[run.client_id] = executing.get(run.client_id, 0) + 1
+        return min(
+            self._queue,
+            key=lambda run: (
+                executing.get(run.client_id, 0) if run.client_id is not None else 0
+            ),
+        )
+
+    def _send_queued_event(self, run: Run, position: int) -> None:
+        data = json.dumps(
+            {
+                "thread_id": run.thread_id,
+                "position": position,
+                "estimated_wait": self.estimated_wait(position),
+            }
+        )
+        run.events.append(f"event: queued\ndata: {data}\n\n")
+
+    def _mean_duration(self) -> Optional[float]:
+        if not self._durations:
+            return None
+        return sum(self._durations) / len(self._durations)
+
+    def _on_detach(self, run: Run) -> None:
+        def cancel_if_detached():
+            if not run.events.subscribers and not run.done:
+                logger.info(f"No client left on run {run.id}")
+                self.cancel(run.id)
+
+        if run.done:
+            return
+        if run.resumable:
+            asyncio.get_running_loop().call_later(
+                self.detach_timeout, cancel_if_detached
+            )
+        else:
+            # The client disconnected or pressed stop, nothing waits for the run
+            cancel_if_detached()
+
+    def _remove(self, run: Run) -> None:
+        self._runs.pop(run.id, None)
+        if self._thread_runs.get(run.thread_id) == run.id:
+            del self._thread_runs[run.thread_id]
+        run.events.discard()
+
+
+def create_run_manager() -> RunManager:
+    """Create the run manager configured by the environment."""
+    return RunManager(
+        max_concurrent_runs=int(env_float("MAX_CONCURRENT_RUNS", 0)),
+        max_queued_runs=int(env_float("MAX_QUEUED_RUNS", 0)),
+        max_queued_runs_per_client=int(env_float("MAX_QUEUED_RUNS_PER_CLIENT", 0)),
+        max_events=int(env_float("CHAT_STREAM_BUFFER_EVENTS", DEFAULT_MAX_EVENTS)),
+        spill_dir=os.getenv("CHAT_STREAM_SPILL_DIR") or None,
+        detach_timeout=env_float("CHAT_STREAM_DETACH_TIMEOUT", DEFAULT_DETACH_TIMEOUT),
+        retention=env_float("CHAT_STREAM_RETENTION", DEFAULT_RETENTION),
+    )
@@ -0,0 +1,115 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Serialization of the server-sent events of the chat stream.
+"""
+
+import json
+import logging
+import os
+from json.encoder import encode_basestring
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Leading fields of the message chunks, the same for all the chunks of a message.
+# Chunks are built with these fields first, the order json.dumps writes them in
+_ENVELOPE_FIELDS = ("thread_id", "agent", "id", "role")
+# Fields following the envelope, encoded for each chunk
+_CHUNK_FIELD_PREFIXES = {
+    field: f", {encode_basestring(field)}: "
+    for field in ("content", "reasoning_content", "finish_reason")
+}
+# Envelopes kept per stream, one per message being streamed
+_MAX_ENVELOPES = 64
+
+
+def _json_dumps(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _load_orjson() -> Optional[Callable[[Any], str]]:
+    try:
+        import orjson
+    except ImportError:
+        return None
+
+    def dumps(data: Any) -> str:
+        try:
+            return orjson.dumps(data).decode("utf-8")
+        except TypeError:
+            # e.g. integers over 64 bits or lone surrogates, that json accepts
+            return _json_dumps(data)
+
+    return dumps
+
+
+def get_json_dumps() -> Callable[[Any], str]:
+    """
+    Get the function serializing the data of the events.
+
+    Set by `SSE_JSON_ENCODER`: `orjson`, `json`, or `auto` (default) to use
+    orjson when it is installed.
+    """
+    name = os.getenv("SSE_JSON_ENCODER", "auto").lower()
+    if name not in ("auto", "json", "orjson"):
+        logger.warning(f"Unknown SSE_JSON_ENCODER {name!r}, using auto")
+        name = "auto"
+    if name != "json":
+        dumps = _load_orjson()
+        if dumps is not None:
+            return dumps
+        if name == "orjson":
+            logger.warning("SSE_JSON_ENCODER is orjson but it is not installed")
+    return _json_dumps
+
+
+class SSEEventEncoder:
+    """
+    Encode the events of a stream in the server-sent events format.
+
+    The fields shared by the chunks of a message, thread id, agent, message id
+    and role, are encoded once per message and only the content of the chunks
+    is encoded for each chunk. Other events are serialized with `dumps`.
+    """
+
+    def __init__(self, dumps: Optional[Callable[[Any], str]] = None):
+        self.dumps = dumps or get_json_dumps()
+        self._envelopes: dict[tuple, str] = {}
+
+    def encode(self, event_type: str, data: dict[str, Any]) -> str:
+        if data.get("content") == "":
+            data.pop("content")
+        if event_type == "message_chunk":
+            event = self._encode_chunk(data)
+            if event is not None:
+                return event
+        return f"event: {event_type}\ndata: {self.dumps(data)}\n\n"
+
+    def _encode_chunk(self, data: dict[str, Any]) -> Optional[str]:
+        """Encode a message chunk from its envelope, None if it has other fields."""
+        try:
+            key = (data["thread_id"], data["agent"], data["id"], data["role"])
+            envelope = self._envelopes.get(key)
+        except (KeyError, TypeError):
+            return None
+        if envelope is None:
+            if not all(isinstance(value, str) for value in key):
+                return None
+            if len(self._envelopes) >= _MAX_ENVELOPES:
+                self._envelopes.clear()
+            envelope = "event: message_chunk\ndata: {" + ", ".join(
+                f"{encode_basestring(field)}: {encode_basestring(value)}"
+                for field, value in zip(_ENVELOPE_FIELDS, key)
+            )
+            self._envelopes[key] = envelope
+        event = envelope
+        for field, value in data.items():
+            if field in _ENVELOPE_FIELDS:
+                continue
+            prefix = _CHUNK_FIELD_PREFIXES.get(field)
+            if prefix is None or not isinstance(value, str):
+                return None
+            event += prefix + encode_basestring(value)
+        return event + "}\n\n"
@@ -0,0 +1,179 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Any, AsyncIterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds a message chunk waits for the next chunks before being sent
+DEFAULT_COALESCE_WINDOW = 0.03
+# Size of the content of a merged message chunk after which it is sent
+DEFAULT_COALESCE_MAX_BYTES = 4096
+# Events waiting to be sent to the client before the stream is paused
+DEFAULT_MAX_BUFFERED_EVENTS = 256
+
+# Fields of the message chunks concatenated when they are merged
+_MERGED_FIELDS = ("content", "reasoning_content")
+
+Event = tuple[str, dict[str, Any]]
+
+
+def get_coalesce_window() -> float:
+    """Coalescing window in seconds, set by `SSE_COALESCE_WINDOW_MS`."""
+    value = os.getenv("SSE_COALESCE_WINDOW_MS")
+    if not value:
+        return DEFAULT_COALESCE_WINDOW
+    try:
+        return max(0.0, float(value) / 1000)
+    except ValueError:
+        logger.warning(f"Invalid SSE_COALESCE_WINDOW_MS {value!r}, using the default")
+        return DEFAULT_COALESCE_WINDOW
+
+
+def get_coalesce_max_bytes() -> int:
+    """Size at which merged chunks are sent, set by `SSE_COALESCE_MAX_BYTES`."""
+    value = os.getenv("SSE_COALESCE_MAX_BYTES")
+    if not value:
+        return DEFAULT_COALESCE_MAX_BYTES
+    try:
+        return max(1, int(value))
+    except ValueError:
+        logger.warning(f"Invalid SSE_COALESCE_MAX_BYTES {value!r}, using the default")
+        return DEFAULT_COALESCE_MAX_BYTES
+
+
+class _PendingEvent:
+    def __init__(self, event: Event, created_at: float):
+        self.event_type, self.data = event
+        self.created_at = created_at
+        self.size = sum(_size(self.data.get(field)) for field in _MERGED_FIELDS)
+        self.closed = not self._mergeable()
+
+    def _mergeable(self) -> bool:
+        return (
+            self.event_type == "message_chunk"
+            and not self.data.get("finish_reason")
+            and all(
+                isinstance(self.data.get(field, ""), str) for field in _MERGED_FIELDS
+            )
+        )
+
+    def merge(self, event: Event, max_bytes: int) -> bool:
+        """Append a message chunk of the same message, return whether it was merged."""
+        event_type, data = event
+        if (
+            self.closed
+            or event_type != "message_chunk"
+            or data.get("agent") != self.data.get("agent")
+            or data.get("id") != self.data.get("id")
+            or not all(isinstance(data.get(field, ""), str) for field in _MERGED_FIELDS)
+        ):
+            return False
+        for field in _MERGED_FIELDS:
+            if data.get(field):
+                self.data[field] = self.data.get(field, "") + data[field]
+                self.size += _size(data[field])
+        if data.get("finish_reason"):
+            self.data["finish_reason"] = data["finish_reason"]
+            self.closed = True
+        if self.size >= max_bytes:
+            self.closed = True
+        return True
+
+
+def _size(value: Optional[str]) -> int:
+    return len(value.encode("utf-8")) if isinstance(value, str) else 0
+
+
+async def coalesce_message_chunks(
+    events: AsyncIterator[Event],
+    window: float = DEFAULT_COALESCE_WINDOW,
+    max_bytes: int = DEFAULT_COALESCE_MAX_BYTES,
+    max_buffered: int = DEFAULT_MAX_BUFFERED_EVENTS,
+) -> AsyncIterator[Event]:
+    """
+    Merge the consecutive `message_chunk` events of a message.
+
+    A message chunk is held for up to `window` seconds, or until its content
+    reaches `max_bytes`, and the next chunks of the same agent and message are
+    appended to it. Any other event, such as tool calls or interrupts, and
+    chunks with a finish reason are sent right away, after the held chunk.
+
+    The events are read from `events` in a task of their own. While the client
+    is slow to read, the chunks keep being merged, and reading stops once
+    `max_buffered` events are waiting to be sent.
+
+    Args:
+        events: Pairs of event type and data
+        window: Seconds a chunk waits for the next ones, 0 disables merging
+        max_bytes: Size of the merged content after which a chunk is sent
+        max_buffered: Events waiting to be sent before reading is paused
+    """
+    if window <= 0:
+        async for event in events:
+            yield event
+        return
+
+    loop = asyncio.get_running_loop()
+    pending: deque[_PendingEvent] = deque()
+    changed = asyncio.Event()
+    drained = asyncio.Event()
+    done = False
+    error: Optional[BaseException] = None
+
+    async def read_events():
+        nonlocal done, error
+        try:
+            async for event in events:
+                if pending and pending[-1].merge(event, max_bytes):
+                    changed.set()
+                    continue
+                if pending:
+                    pending[-1].closed = True
+                while len(pending) >= max_buffered:
+                    drained.clear()
+                    await drained.wait()
+                pending.append(_PendingEvent(event, loop.time()))
+                changed.set()
+        except Exception as e:
+            error = e
+        finally:
+            done = True
+            changed.set()
+
+    reader = asyncio.create_task(read_events())
+    try:
+        while True:
+            if not pending:
+                if done:
+                    break
+                changed.clear()
+                await changed.wait()
+                continue
+            head = pending[0]
+            if not (head.closed or done):
+                timeout = head.created_at + window - loop.time()
+                if timeout > 0:
+                    changed.clear()
+                    try:
+                        await asyncio.wait_for(changed.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+            # The head is sent, nothing can be merged into it anymore
+            head.closed = True
+            pending.popleft()
+            drained.set()
+            yield head.event_type, head.data
+        if error is not None:
+            raise error
+    finally:
+        reader.cancel()
+        try:
+            await reader
+        except asyncio.CancelledError:
+            pass
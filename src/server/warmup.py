@@ -0,0 +1,111 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from src.llms.llm import get_configured_llm_models, get_llm_by_type
+from src.prompts.template import (
+    PromptLayout,
+    check_all_prefix_stability,
+    get_prompt_layout,
+    preload_prompt_templates,
+)
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for an upstream connection to open
+CONNECTION_TIMEOUT = 5.0
+
+
+@dataclass
+class WarmupStatus:
+    """Progress of the warm-up, the server is ready once it succeeded."""
+
+    ready: bool = False
+    done: bool = False
+    steps: Dict[str, str] = field(default_factory=dict)
+    duration: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "done": self.done,
+            "steps": dict(self.steps),
+            "duration": self.duration,
+        }
+
+
+def _load_prompt_templates() -> int:
+    """Compile the prompt templates, and report those defeating prefix caching."""
+    count = preload_prompt_templates()
+    if get_prompt_layout() == PromptLayout.STABLE:
+        for result in check_all_prefix_stability(PromptLayout.STABLE):
+            if not result.stable:
+                logger.warning(
+                    f"System prompt of {result.template} changes between calls "
+                    f"after {result.stable_prefix_chars} of "
+                    f"{result.system_prompt_chars} characters"
+                )
+    return count
+
+
+async def _open_llm_connection(llm_type: str, llm) -> None:
+    # Any response, even an error status, leaves an open connection in the
+    # pool of the client. Not every provider lists its models.
+    try:
+        await asyncio.wait_for(
+            llm.root_async_client.models.list(), timeout=CONNECTION_TIMEOUT
+        )
+    except Exception as e:
+        logger.debug(f"Listing models of {llm_type} LLM failed: {e}")
+
+
+async def warm_up(graphs: Dict[str, Callable[[], Any]], status: WarmupStatus) -> None:
+    """
+    Warm up the server before it reports ready.
+
+    Compiles the given graphs, compiles the prompt templates, creates the
+    configured LLM clients and opens a connection to each LLM endpoint.
+    Failing to open a connection does not prevent the server from being
+    ready, any other failure does.
+
+    Args:
+        graphs: Functions returning the compiled graphs to reuse, by name
+        status: Status updated as the warm-up progresses
+    """
+    started_at = time.monotonic()
+    failed = False
+
+    async def run_step(name: str, func: Callable[[], Any]) -> Any:
+        nonlocal failed
+        try:
+            result = await asyncio.to_thread(func)
+            status.steps[name] = "ok"
+            return result
+        except Exception as e:
+            logger.exception(f"Warm-up step {name} failed: {e}")
+            status.steps[name] = f"error: {e}"
+            failed = True
+
+    for name, get_graph in graphs.items():
+        await run_step(f"graph:{name}", get_graph)
+    await run_step("prompt_templates", _load_prompt_templates)
+
+    llms = {}
+    for llm_type in get_configured_llm_models():
+        llm = await run_step(f"llm:{llm_type}", partial(get_llm_by_type, llm_type))
+        if llm is not None:
+            llms[llm_type] = llm
+    await asyncio.gather(
+        *(_open_llm_connection(llm_type, llm) for llm_type, llm in llms.items())
+    )
+
+    status.duration = time.monotonic() - started_at
+    status.ready = not failed
+    status.done = True
+    logger.info(f"Warm-up finished in {status.duration:.2f}s, ready: {status.ready}")
@@ -8,6 +8,7 @@ from langchain_core.tools import tool
 from .decorators import log_io
 
 from src.crawler import Crawler
+from src.utils.cancellation import RunCancelledError
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +23,8 @@ def crawl_tool(
         crawler = Crawler()
         article = crawler.crawl(url)
         return {"url": url, "crawled_content": article.to_markdown()[:1000]}
+    except RunCancelledError:
+        raise
     except BaseException as e:
         error_msg = f"Failed to crawl. Error: {repr(e)}"
         logger.error(error_msg)
@@ -0,0 +1,296 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+
+from src.config import load_yaml_config
+
+logger = logging.getLogger(__name__)
+
+
+def get_server_config_key(server_config: Dict[str, Any]) -> str:
+    """Hash of an MCP server config, servers with the same key share sessions."""
+    return hashlib.sha256(
+        json.dumps(server_config, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class _PooledSession:
+    """An MCP session owned by a background task for as long as it is pooled.
+
+    The MCP transports must be closed by the task that opened them, so the
+    session is opened, kept and closed by `_run` instead of by the callers.
+    """
+
+    def __init__(self, server_name: str, server_config: Dict[str, Any]):
+        self.server_name = server_name
+        self.server_config = server_config
+        self.session = None
+        self.tools: list[BaseTool] = []
+        self.leases = 0
+        self.last_used = time.monotonic()
+        self.last_checked = self.last_used
+        self._ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._closing = asyncio.Event()
+        # The session outlives the step opening it, so its task must not keep
+        # the step's context variables (cancel token, callbacks, priority)
+        self._task = asyncio.create_task(self._run(), context=contextvars.Context())
+
+    async def _run(self) -> None:
+        try:
+            async with MultiServerMCPClient(
+                {self.server_name: self.server_config}
+            ) as client:
+                self.session = client.sessions[self.server_name]
+                self.tools = client.get_tools()
+                self._ready.set_result(None)
+                await self._closing.wait()
+        except BaseException as e:
+            if not self._ready.done():
+                self._ready.set_exception(e)
+            elif not isinstance(e, asyncio.CancelledError):
+                logger.warning(f"MCP session of {self.server_name} ended: {e}")
+            if isinstance(e, (asyncio.CancelledError, KeyboardInterrupt)):
+                raise
+
+    async def wait_ready(self) -> None:
+        await self._ready
+
+    @property
+    def alive(self) -> bool:
+        return not self._task.done() and not self._closing.is_set()
+
+    @property
+    def pending_requests(self) -> int:
+        """Requests sent to the server and still waiting for their response."""
+        return len(getattr(self.session, "_response_streams", None) or ())
+
+    async def ping(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+            return True
+        except Exception as e:
+            logger.warning(
+                f"MCP session of {self.server_name} failed health check: {e}"
+            )
+            return False
+
+    async def close(self) -> None:
+        self._closing.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout=5)
+        except Exception:
+            self._task.cancel()
+
+
+class MCPSessionPool:
+    """A process-wide pool of MCP sessions keyed by a hash of the server config.
+
+    Sessions and their tool listings are shared by every agent step that uses
+    the same server config. Sessions idle for longer than `idle_timeout`
+    seconds are closed, sessions unused for `health_check_interval` seconds
+    are pinged before being handed out again, and at most `max_sessions` are
+    kept open. When the pool is full of leased sessions, a step gets a session
+    of its own that is closed after the step.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_sessions: int = 16,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 60.0,
+        health_check_timeout: float = 5.0,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "overflows": 0}
+
+        self._sessions: dict[str, _PooledSession] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reaper: Optional[asyncio.Task] = None
+
+    def _bind_loop(self) -> None:
+        # Sessions belong to the event loop that opened them, a new loop
+        # (e.g. one `asyncio.run` per CLI run) starts with an empty pool
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._sessions = {}
+            self._locks = {}
+            self._reaper = None
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(
+                self._reap_idle_sessions(), context=contextvars.Context()
+            )
+
+    async def _reap_idle_sessions(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_timeout / 2))
+            await self.evict_idle()
+
+    async def evict_idle(self) -> int:
+        """Close sessions that are not leased and idle for too long, return how many."""
+        deadline = time.monotonic() - self.idle_timeout
+        expired = [
+            key
+            for key, pooled in self._sessions.items()
+            if pooled.leases == 0 and (pooled.last_used <= deadline or not pooled.alive)
+        ]
+        for key in expired:
+            await self._evict(key)
+        return len(expired)
+
+    async def _evict(self, key: str) -> None:
+        pooled = self._sessions.pop(key, None)
+        if pooled:
+            self.stats["evictions"] += 1
+            logger.info(f"Closing pooled MCP session of {pooled.server_name}")
+            await pooled.close()
+
+    async def _make_room(self) -> bool:
+        """Evict the least recently used idle session if the pool is full."""
+        if len(self._sessions) < self.max_sessions:
+            return True
+        idle = [
+            (pooled.last_used, key)
+            for key, pooled in self._sessions.items()
+            if pooled.leases == 0
+        ]
+        if not idle:
+            return False
+        await self._evict(min(idle)[1])
+        return True
+
+    async def _get_session(
+        self, server_name: str, server_config: Dict[str, Any]
+    ) -> Optional[_PooledSession]:
+        key = get_server_config_key(server_config)
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            pooled = self._sessions.get(key)
+            if pooled and pooled.alive:
+                stale = (
+                    time.monotonic() - pooled.last_checked > self.health_check_interval
+                )
+                if pooled.leases or not stale:
+                    self.stats["hits"] += 1
+                    return pooled
+                if await pooled.ping(self.health_check_timeout):
+                    pooled.last_checked = time.monotonic()
+                    self.stats["hits"] += 1
+                    return pooled
+            if pooled:
+                await self._evict(key)
+
+            self.stats["misses"] += 1
+            if not await self._make_room():
+                return None
+            pooled = _PooledSession(server_name, server_config)
+            try:
+                await pooled.wait_ready()
+            except BaseException:
+                await pooled.close()
+                raise
+            self._sessions[key] = pooled
+            return pooled
+
+    @asynccontextmanager
+    async def acquire(
+        self, servers: Dict[str, Dict[str, Any]]
+    ) -> AsyncIterator[list[BaseTool]]:
+        """Lease sessions to the given MCP servers and yield their tools.
+
+        Leased sessions are not evicted until the context exits. The tools
+        are shared with other leases and must not be modified.
+        """
+        self._bind_loop()
+        leased: list[_PooledSession] = []
+        async with AsyncExitStack() as overflow:
+            try:
+                tools: list[BaseTool] = []
+                for server_name, server_config in servers.items():
+                    pooled = await self._get_session(server_name, server_config)
+                    if pooled is None:
+                        self.stats["overflows"] += 1
+                        logger.warning(
+                            f"MCP session pool is full, opening a dedicated session to {server_name}"
+                        )
+                        client = await overflow.enter_async_context(
+                            MultiServerMCPClient({server_name: server_config})
+                        )
+                        tools.extend(client.get_tools())
+                        continue
+                    pooled.leases += 1
+                    leased.append(pooled)
+                    tools.extend(pooled.tools)
+                yield tools
+            except asyncio.CancelledError:
+                await self._close_abandoned(leased)
+                raise
+            finally:
+                now = time.monotonic()
+                for pooled in leased:
+                    pooled.leases -= 1
+                    pooled.last_used = now
+
+    async def _close_abandoned(self, leased: list[_PooledSession]) -> None:
+        """Close the sessions left with calls of a cancelled step in flight.
+
+        The servers would keep working on calls nobody waits for, closing the
+        session stops their process. Sessions leased by other steps are kept.
+        """
+        for pooled in leased:
+            key = get_server_config_key(pooled.server_config)
+            if (
+                pooled.leases == 1
+                and pooled.pending_requests
+                and self._sessions.get(key) is pooled
+            ):
+                logger.info(
+                    f"Closing MCP session of {pooled.server_name} with cancelled calls in flight"
+                )
+                await self._evict(key)
+
+    async def close(self) -> None:
+        """Close all pooled sessions."""
+        if self._reaper:
+            self._reaper.cancel()
+            self._reaper = None
+        for key in list(self._sessions):
+            await self._evict(key)
+
+
+def _get_config_file_path() -> str:
+    """Get the path to the configuration file."""
+    return str((Path(__file__).parent.parent.parent / "conf.yaml").resolve())
+
+
+_mcp_session_pool: Optional[MCPSessionPool] = None
+
+
+def get_mcp_session_pool() -> MCPSessionPool:
+    """Get the process-wide MCP session pool configured in the `MCP_SESSION_POOL`
+    section of conf.yaml."""
+    global _mcp_session_pool
+    if _mcp_session_pool is None:
+        conf = load_yaml_config(_get_config_file_path()).get("MCP_SESSION_POOL") or {}
+        _mcp_session_pool = MCPSessionPool(
+            max_sessions=int(conf.get("max_sessions", 16)),
+            idle_timeout=float(conf.get("idle_timeout", 300)),
+            health_check_interval=float(conf.get("health_check_interval", 60)),
+        )
+    return _mcp_session_pool
@@ -0,0 +1,185 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Cooperative cancellation of the work of a workflow run.
+
+Cancelling the task of a run stops its async calls, but the sync tools and
+nodes executed in worker threads go on. They check the cancel token of their
+run, found in a context variable copied to the worker threads, and stop at the
+next check.
+"""
+
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.utils.metrics import llm_latency, node_name, registry, tool_latency
+
+logger = logging.getLogger(__name__)
+
+upstream_seconds_avoided = registry.counter(
+    "deerflow_cancelled_upstream_seconds_avoided_total",
+    "Estimated seconds of LLM and tool calls not waited for after their run was "
+    "cancelled, by kind of call.",
+    ("kind",),
+)
+
+
+class RunCancelledError(Exception):
+    """Raised in the calls of a run once it is cancelled."""
+
+
+class CancelToken:
+    """Cancellation state of a run, shared by its tasks and worker threads."""
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: list[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """Cancel the run and call the callbacks, once."""
+        with self._lock:
+            if self._cancelled.is_set():
+                return
+            self._cancelled.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Cancel callback failed: {e}")
+
+    def raise_if_cancelled(self) -> None:
+        if self._cancelled.is_set():
+            raise RunCancelledError("The run was cancelled")
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """Call `callback` on cancellation, at once if the run is cancelled."""
+        with self._lock:
+            if not self._cancelled.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def child(self) -> "CancelToken":
+        """A token cancelled with this one, which can also be cancelled alone."""
+        child = CancelToken()
+        self.add_callback(child.cancel)
+        child.add_callback(lambda: self.remove_callback(child.cancel))
+        return child
+
+
+_cancel_token: ContextVar[Optional[CancelToken]] = ContextVar(
+    "cancel_token", default=None
+)
+
+
+def get_cancel_token() -> Optional[CancelToken]:
+    """The cancel token of the current run, None outside of a run."""
+    return _cancel_token.get()
+
+
+def set_cancel_token(token: Optional[CancelToken]) -> None:
+    """Set the cancel token of the current task and of the tasks it starts."""
+    _cancel_token.set(token)
+
+
+def raise_if_cancelled() -> None:
+    """Raise `RunCancelledError` if the current run is cancelled."""
+    token = _cancel_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def _mean(histogram, **labels: Any) -> float:
+    count = histogram.count(**labels)
+    return histogram.sum(**labels) / count if count else 0.0
+
+
+class CancellationCallbackHandler(BaseCallbackHandler):
+    """Stops the LLM and tool calls of a cancelled run.
+
+    Calls fail when they start or stream a token after the cancellation. The
+    calls in flight when the run is cancelled are recorded in the
+    `deerflow_cancelled_upstream_seconds_avoided_total` metric, with the
+    duration they were still expected to take, from the mean latency of the
+    same calls.
+    """
+
+    run_inline = True
+    raise_error = True
+
+    def __init__(self, token: CancelToken):
+        self.token = token
+        self._lock = threading.Lock()
+        # Start time and latency labels of the calls in flight, by kind
+        self._calls: dict[UUID, tuple[str, float, dict[str, str]]] = {}
+        token.add_callback(self._record_avoided_seconds)
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id, metadata=None, **kwargs
+    ) -> None:
+        self.token.raise_if_cancelled()
+        model = (metadata or {}).get("ls_model_name") or (
+            (serialized or {}).get("kwargs", {}).get("model_name", "unknown")
+        )
+        self._start(run_id, "llm", {"node": node_name(metadata), "model": model})
+
+    def on_llm_new_token(self, token, **kwargs) -> None:
+        self.token.raise_if_cancelled()
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        self._end(run_id)
+
+    def on_tool_start(
+        self, serialized, input_str, *, run_id, metadata=None, **kwargs
+    ) -> None:
+        self.token.raise_if_cancelled()
+        tool = (serialized or {}).get("name") or "unknown"
+        self._start(run_id, "tool", {"tool": tool, "node": node_name(metadata)})
+
+    def on_tool_end(self, output, *, run_id, **kwargs) -> None:
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs) -> None:
+        self._end(run_id)
+
+    def on_retriever_start(self, serialized, query, **kwargs) -> None:
+        self.token.raise_if_cancelled()
+
+    def _start(self, run_id: UUID, kind: str, labels: dict[str, str]) -> None:
+        with self._lock:
+            self._calls[run_id] = (kind, time.monotonic(), labels)
+
+    def _end(self, run_id: UUID) -> None:
+        with self._lock:
+            self._calls.pop(run_id, None)
+
+    def _record_avoided_seconds(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            calls, self._calls = list(self._calls.values()), {}
+        for kind, started_at, labels in calls:
+            histogram = llm_latency if kind == "llm" else tool_latency
+            remaining = _mean(histogram, **labels) - (now - started_at)
+            if remaining > 0:
+                upstream_seconds_avoided.inc(remaining, kind=kind)
@@ -0,0 +1,115 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import logging
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+_CJK_PATTERN = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+_LINK_PATTERN = re.compile(r"\[[^\]]*\]\([^)]+\)|https?://\S+")
+_SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?。！？])\s+")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens of a text without loading a tokenizer.
+
+    CJK characters count as one token each, any other text as one token
+    per four characters, which is close enough for budgeting prompts.
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+@lru_cache(maxsize=256)
+def summarize_text(text: str, max_tokens: int) -> str:
+    """
+    Extractive summary of a markdown text that fits in `max_tokens`.
+
+    Headings and reference lines (links) are kept first, then the first
+    sentence of each paragraph. The kept lines stay in their original order.
+    Summaries are cached, so a finding is only summarized once per run.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    candidates = []  # (priority, position, line)
+    for position, paragraph in enumerate(re.split(r"\n\s*\n", text.strip())):
+        for offset, line in enumerate(paragraph.splitlines()):
+            line = line.strip()
+            if not line:
+                continue
+            key = (position, offset)
+            if line.startswith("#"):
+                candidates.append((0, key, line))
+            elif _LINK_PATTERN.search(line):
+                candidates.append((1, key, line))
+            elif offset == 0:
+                first_sentence = _SENTENCE_END_PATTERN.split(line, maxsplit=1)[0]
+                candidates.append((2, key, first_sentence))
+
+    kept = []
+    used = 0
+    for candidate in sorted(candidates):
+        tokens = count_tokens(candidate[2]) + 1
+        if used + tokens > max_tokens:
+            continue
+        kept.append(candidate)
+        used += tokens
+    return "\n".join(line for _, _, line in sorted(kept, key=lambda c: c[1]))
+
+
+class ContextBuilder:
+    """
+    Fits a list of texts, ordered from oldest to newest, into a token budget.
+
+    Every text is first reduced to its summary. The newest texts are then
+    restored to their full content as long as the budget allows, and the
+    oldest texts are dropped if even the summaries do not fit.
+    """
+
+    def __init__(self, token_budget: int, summary_tokens: int = 200):
+        self.token_budget = max(0, token_budget)
+        self.summary_tokens = summary_tokens
+        self.tokens_saved = 0
+
+    def fit(self, texts: List[str]) -> List[Optional[str]]:
+        """
+        Return the text to use for each entry, `None` for dropped entries.
+        """
+        full_tokens = [count_tokens(text) for text in texts]
+        fitted: List[Optional[str]] = [
+            summarize_text(text, self.summary_tokens) for text in texts
+        ]
+        fitted_tokens = [count_tokens(text) for text in fitted]
+        total = sum(fitted_tokens)
+
+        # Drop the oldest summaries until the rest fits
+        for i in range(len(texts)):
+            if total <= self.token_budget:
+                break
+            total -= fitted_tokens[i]
+            fitted[i], fitted_tokens[i] = None, 0
+
+        # Restore the full text of the newest entries
+        for i in reversed(range(len(texts))):
+            if fitted[i] is None:
+                break
+            extra = full_tokens[i] - fitted_tokens[i]
+            if extra > 0 and total + extra <= self.token_budget:
+                fitted[i], fitted_tokens[i] = texts[i], full_tokens[i]
+                total += extra
+
+        saved = sum(full_tokens) - total
+        self.tokens_saved += saved
+        if saved:
+            logger.info(
+                f"Context fitted into {total}/{self.token_budget} tokens, "
+                f"saved {saved} tokens"
+            )
+        return fitted
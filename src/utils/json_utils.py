@@ -3,11 +3,30 @@
 
 import logging
 import json
+from typing import Any
+
 import json_repair
 
 logger = logging.getLogger(__name__)
 
 
+def _looks_like_json(content: str) -> bool:
+    return content.startswith(("{", "[")) or "```json" in content or "```ts" in content
+
+
+def _strip_code_fence(content: str) -> str:
+    # If content is wrapped in ```json code block, extract the JSON part
+    if content.startswith("```json"):
+        content = content.removeprefix("```json")
+
+    if content.startswith("```ts"):
+        content = content.removeprefix("```ts")
+
+    if content.endswith("```"):
+        content = content.removesuffix("```")
+    return content
+
+
 def repair_json_output(content: str) -> str:
     """
     Repair and normalize JSON output.
@@ -19,17 +38,9 @@ def repair_json_output(content: str) -> str:
         str: Repaired JSON string, or original content if not JSON
     """
     content = content.strip()
-    if content.startswith(("{", "[")) or "```json" in content or "```ts" in content:
+    if _looks_like_json(content):
         try:
-            # If content is wrapped in ```json code block, extract the JSON part
-            if content.startswith("```json"):
-                content = content.removeprefix("```json")
-
-            if content.startswith("```ts"):
-                content = content.removeprefix("```ts")
-
-            if content.endswith("```"):
-                content = content.removesuffix("```")
+            content = _strip_code_fence(content)
 
             # Try to repair and parse JSON
             repaired_content = json_repair.loads(content)
@@ -37,3 +48,138 @@ def repair_json_output(content: str) -> str:
         except Exception as e:
             logger.warning(f"JSON repair failed: {e}")
     return content
+
+
+def parse_json_output(content: str) -> Any:
+    """
+    Parse JSON output, repairing it only when it is not valid JSON.
+
+    Unlike `json.loads(repair_json_output(content))`, valid JSON is parsed once
+    and never serialized again.
+
+    Args:
+        content (str): String content that may contain JSON
+
+    Returns:
+        Any: The parsed value
+
+    Raises:
+        json.JSONDecodeError: If the content is not JSON and cannot be repaired
+    """
+    content = content.strip()
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        if not _looks_like_json(content):
+            raise
+    content = _strip_code_fence(content).strip()
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json_repair.loads(content)
+    except Exception as e:
+        logger.warning(f"JSON repair failed: {e}")
+        raise json.JSONDecodeError("Cannot repair JSON output", content, 0) from e
+
+
+class IncrementalJSONParser:
+    """
+    Parse a JSON object while it is being generated.
+
+    The items of the array under `array_key` are returned as soon as they are
+    complete, and the other fields of the object are collected in `fields` once
+    their value is complete. Anything before the opening brace, such as a code
+    fence, is skipped.
+
+    Args:
+        array_key: Key of the array whose items are returned
+    """
+
+    def __init__(self, array_key: str):
+        self.array_key = array_key
+        self.fields: dict = {}
+        self._buffer = ""
+        self._pos = 0
+        self._stack: list[str] = []
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string = ""
+        self._key = None
+        self._value_start = None
+        self._in_array = False
+        self._item_start = None
+
+    def _end_value(self, end: int) -> None:
+        if self._key is None or self._key == self.array_key:
+            return
+        try:
+            self.fields[self._key] = json.loads(self._buffer[self._value_start : end])
+        except ValueError:
+            logger.debug(f"Invalid JSON value of {self._key}")
+        self._key = None
+
+    def _parse_item(self, text: str):
+        try:
+            return parse_json_output(text)
+        except ValueError:
+            logger.warning(f"Invalid JSON item in {self.array_key}: {text}")
+            return None
+
+    def feed(self, text: str) -> list:
+        """Add generated text, return the items it completed."""
+        items = []
+        self._buffer += text
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            if self._done:
+                break
+            c = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._last_string = buffer[self._string_start + 1 : i]
+                continue
+            if not self._stack:
+                if c == "{":
+                    self._stack.append(c)
+                continue
+            depth = len(self._stack)
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                if depth == 1 and c == "[" and self._key == self.array_key:
+                    self._in_array = True
+                elif depth == 2 and self._in_array and c == "{":
+                    self._item_start = i
+                self._stack.append(c)
+            elif c in "}]":
+                self._stack.pop()
+                if depth == 3 and self._in_array and self._item_start is not None:
+                    item = self._parse_item(buffer[self._item_start : i + 1])
+                    if item is not None:
+                        items.append(item)
+                    self._item_start = None
+                elif depth == 2 and self._in_array:
+                    self._in_array = False
+                elif depth == 1:
+                    self._end_value(i)
+                    self._done = True
+            elif depth == 1 and c == ":":
+                try:
+                    self._key = json.loads(f'"{self._last_string}"')
+                except ValueError:
+                    self._key = self._last_string
+                self._value_start = i + 1
+            elif depth == 1 and c == ",":
+                self._end_value(i)
+        self._pos = len(buffer)
+        return items
@@ -0,0 +1,335 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+In-process metrics of the LLM calls and tool calls of the workflows, rendered in
+the Prometheus text format.
+"""
+
+import bisect
+import threading
+import time
+from typing import Any, Iterable, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+# Upper bounds of the latency buckets, in seconds
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, value: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} "
+            f"{_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # Observations per bucket, the last one past the largest bound, sum
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            counts, _ = self._values.get(self._key(labels), ([0], [0.0]))
+            return sum(counts)
+
+    def sum(self, **labels: Any) -> float:
+        with self._lock:
+            _, total = self._values.get(self._key(labels), ([0], [0.0]))
+            return total[0]
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = [
+                (key, list(counts), total[0])
+                for key, (counts, total) in self._values.items()
+            ]
+        lines = self._header()
+        for key, counts, total in values:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+def render_samples(
+    name: str,
+    documentation: str,
+    samples: Iterable[tuple[dict[str, Any], float]],
+    type: str = "gauge",
+) -> list[str]:
+    """Render values collected elsewhere, e.g. read from the stats of a cache."""
+    return [
+        f"# HELP {name} {documentation}",
+        f"# TYPE {name} {type}",
+        *(
+            f"{name}{_format_labels(labels)} {_format_value(value)}"
+            for labels, value in samples
+        ),
+    ]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> None:
+        with self._lock:
+            self._metrics.append(metric)
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        metric = Counter(name, documentation, tuple(labelnames))
+        self._register(metric)
+        return metric
+
+    def histogram(
+        self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS
+    ) -> Histogram:
+        metric = Histogram(name, documentation, tuple(labelnames), buckets)
+        self._register(metric)
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+llm_requests = registry.counter(
+    "deerflow_llm_requests_total",
+    "LLM calls by graph node, model and status.",
+    ("node", "model", "status"),
+)
+llm_tokens = registry.counter(
+    "deerflow_llm_tokens_total",
+    "Tokens of the LLM calls by graph node, model and type (prompt or completion).",
+    ("node", "model", "type"),
+)
+llm_latency = registry.histogram(
+    "deerflow_llm_latency_seconds",
+    "Duration of the LLM calls by graph node and model.",
+    ("node", "model"),
+)
+llm_time_to_first_token = registry.histogram(
+    "deerflow_llm_time_to_first_token_seconds",
+    "Time to the first token of the streamed LLM calls by graph node and model.",
+    ("node", "model"),
+)
+tool_calls = registry.counter(
+    "deerflow_tool_calls_total",
+    "Tool calls by tool, graph node and status.",
+    ("tool", "node", "status"),
+)
+tool_latency = registry.histogram(
+    "deerflow_tool_latency_seconds",
+    "Duration of the tool calls by tool and graph node.",
+    ("tool", "node"),
+)
+
+
+def node_name(metadata: Optional[dict[str, Any]]) -> str:
+    """Name of the top level graph node a call was made from."""
+    if not metadata:
+        return "unknown"
+    # Calls of the agents of the researcher and coder are made in a subgraph
+    namespace = metadata.get("langgraph_checkpoint_ns")
+    if namespace:
+        return namespace.split("|")[0].split(":")[0]
+    return metadata.get("langgraph_node") or "unknown"
+
+
+def _token_usage(response: LLMResult) -> tuple[int, int]:
+    prompt_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(
+                getattr(generation, "message", None), "usage_metadata", None
+            )
+            if usage:
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+    if not (prompt_tokens or completion_tokens) and response.llm_output:
+        usage = response.llm_output.get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        completion_tokens = usage.get("completion_tokens") or 0
+    return prompt_tokens, completion_tokens
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Records the metrics of the LLM calls and tool calls of a graph run.
+
+    Only a start time is kept per call in flight, the rest is aggregated in
+    the counters and histograms of the registry. A single handler is shared by
+    the runs, whose callbacks come from worker threads and the event loop.
+    """
+
+    # Called in the thread or event loop of the call, no executor hop needed
+    run_inline = True
+
+    def __init__(self):
+        self._llm_runs: dict[UUID, tuple[float, str, str]] = {}
+        self._awaiting_first_token: set[UUID] = set()
+        self._tool_runs: dict[UUID, tuple[float, str, str]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id, metadata=None, **kwargs
+    ) -> None:
+        model = (metadata or {}).get("ls_model_name") or (
+            (serialized or {}).get("kwargs", {}).get("model_name", "unknown")
+        )
+        with self._lock:
+            self._llm_runs[run_id] = (time.monotonic(), node_name(metadata), model)
+            self._awaiting_first_token.add(run_id)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs) -> None:
+        with self._lock:
+            if run_id not in self._awaiting_first_token:
+                return
+            self._awaiting_first_token.discard(run_id)
+            run = self._llm_runs.get(run_id)
+        if run:
+            started_at, node, model = run
+            llm_time_to_first_token.observe(
+                time.monotonic() - started_at, node=node, model=model
+            )
+
+    def _end_llm(self, run_id: UUID) -> Optional[tuple[float, str, str]]:
+        with self._lock:
+            self._awaiting_first_token.discard(run_id)
+            return self._llm_runs.pop(run_id, None)
+
+    def on_llm_end(self, response: LLMResult, *, run_id, **kwargs) -> None:
+        run = self._end_llm(run_id)
+        if run is None:
+            return
+        started_at, node, model = run
+        llm_latency.observe(time.monotonic() - started_at, node=node, model=model)
+        llm_requests.inc(node=node, model=model, status="success")
+        prompt_tokens, completion_tokens = _token_usage(response)
+        if prompt_tokens:
+            llm_tokens.inc(prompt_tokens, node=node, model=model, type="prompt")
+        if completion_tokens:
+            llm_tokens.inc(completion_tokens, node=node, model=model, type="completion")
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        run = self._end_llm(run_id)
+        if run is not None:
+            _, node, model = run
+            llm_requests.inc(node=node, model=model, status="error")
+
+    def on_tool_start(
+        self, serialized, input_str, *, run_id, metadata=None, **kwargs
+    ) -> None:
+        tool = (serialized or {}).get("name") or "unknown"
+        with self._lock:
+            self._tool_runs[run_id] = (time.monotonic(), tool, node_name(metadata))
+
+    def on_tool_end(self, output, *, run_id, **kwargs) -> None:
+        self._end_tool(run_id, "success")
+
+    def on_tool_error(self, error, *, run_id, **kwargs) -> None:
+        self._end_tool(run_id, "error")
+
+    def _end_tool(self, run_id: UUID, status: str) -> None:
+        with self._lock:
+            run = self._tool_runs.pop(run_id, None)
+        if run is None:
+            return
+        started_at, tool, node = run
+        tool_latency.observe(time.monotonic() - started_at, tool=tool, node=node)
+        tool_calls.inc(tool=tool, node=node, status=status)
+
+
+_metrics_callback = MetricsCallbackHandler()
+
+
+def get_metrics_callback() -> MetricsCallbackHandler:
+    """Get the callback handler recording the metrics of the workflows."""
+    return _metrics_callback
@@ -0,0 +1,205 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from src.config import load_yaml_config
+
+logger = logging.getLogger(__name__)
+
+# Words, and single CJK characters as they are not separated by spaces
+_TOKEN_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af]|[^\W_]+")
+# Filler words that rephrasings add or drop without changing the question
+_STOP_WORDS = frozenset(
+    "a an the of to in on for and or about please me tell can could you is are".split()
+)
+
+# MinHash signatures are split into bands of rows, questions sharing a band
+# are compared. 16 bands of 4 rows find questions with a Jaccard similarity
+# of 0.8 with a probability above 0.999.
+NUM_PERMUTATIONS = 64
+ROWS_PER_BAND = 4
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Seeded, so that signatures are the same in every process
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+
+def question_shingles(question: str) -> frozenset[str]:
+    """The normalized words of a question, without filler words."""
+    text = unicodedata.normalize("NFKC", question).lower()
+    return frozenset(
+        token for token in _TOKEN_PATTERN.findall(text) if token not in _STOP_WORDS
+    )
+
+
+def _hash_shingle(shingle: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little"
+    )
+
+
+def minhash(shingles: frozenset[str]) -> tuple[int, ...]:
+    """MinHash signature of a set of shingles."""
+    hashes = [_hash_shingle(shingle) for shingle in shingles] or [0]
+    return tuple(
+        min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class _Entry:
+    locale: str
+    shingles: frozenset[str]
+    bands: list[tuple]
+    # Cached values with the time they were stored, by kind
+    values: dict[str, tuple[float, str]] = field(default_factory=dict)
+
+
+class QuestionCache:
+    """A cache of research results shared by similar questions.
+
+    Questions are compared by the Jaccard similarity of their normalized
+    words, only questions of the same locale match. Candidates are found by
+    locality sensitive hashing of their MinHash signatures, so a lookup does
+    not compare the question to every cached one. Values are stored by kind,
+    e.g. the plan or the report, and expire after `ttl` seconds.
+
+    Args:
+        max_entries: Questions to keep, the least recently used are dropped.
+        ttl: Seconds a cached value stays fresh.
+        similarity: Minimum Jaccard similarity of matching questions.
+    """
+
+    def __init__(
+        self, max_entries: int = 256, ttl: float = 3600.0, similarity: float = 0.8
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+
+        self._entries: OrderedDict[tuple[str, frozenset], _Entry] = OrderedDict()
+        self._buckets: dict[tuple, set[tuple[str, frozenset]]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bands(locale: str, shingles: frozenset[str]) -> list[tuple]:
+        signature = minhash(shingles)
+        return [
+            (locale, start, signature[start : start + ROWS_PER_BAND])
+            for start in range(0, NUM_PERMUTATIONS, ROWS_PER_BAND)
+        ]
+
+    def _remove(self, key: tuple[str, frozenset]) -> None:
+        entry = self._entries.pop(key)
+        for band in entry.bands:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+
+    def lookup(self, question: str, locale: str, kind: str) -> Optional[str]:
+        """Get the fresh value of a kind cached for the most similar question."""
+        shingles = question_shingles(question)
+        if not shingles:
+            return None
+        now = time.time()
+        best: Optional[tuple[float, tuple, str]] = None
+        with self._lock:
+            candidates = set()
+            for band in self._bands(locale, shingles):
+                candidates |= self._buckets.get(band, set())
+            for key in candidates:
+                entry = self._entries[key]
+                stored = entry.values.get(kind)
+                if stored is None or now - stored[0] > self.ttl:
+                    continue
+                similarity = jaccard(shingles, entry.shingles)
+                if similarity >= self.similarity and (
+                    best is None or similarity > best[0]
+                ):
+                    best = (similarity, key, stored[1])
+            if best is None:
+                self.misses[kind] = self.misses.get(kind, 0) + 1
+                return None
+            self.hits[kind] = self.hits.get(kind, 0) + 1
+            self._entries.move_to_end(best[1])
+        logger.info(
+            f"Reusing the {kind} of a similar question, similarity: {best[0]:.2f}"
+        )
+        return best[2]
+
+    def store(self, question: str, locale: str, kind: str, value: str) -> None:
+        """Cache a value of a kind for a question."""
+        shingles = question_shingles(question)
+        if not shingles or not value:
+            return
+        key = (locale, shingles)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Entry(locale, shingles, self._bands(locale, shingles))
+                self._entries[key] = entry
+                for band in entry.bands:
+                    self._buckets.setdefault(band, set()).add(key)
+            stored = entry.values.get(kind)
+            # Storing a reused value again does not make it fresher
+            if stored is None or stored[1] != value:
+                entry.values[kind] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": dict(self.hits),
+                "misses": dict(self.misses),
+            }
+
+
+def _get_config_file_path() -> str:
+    """Get the path to the configuration file."""
+    return str((Path(__file__).parent.parent.parent / "conf.yaml").resolve())
+
+
+_question_cache: Optional[QuestionCache] = None
+
+
+def get_question_cache() -> QuestionCache:
+    """Get the process-wide question cache configured in the `QUESTION_CACHE`
+    section of conf.yaml."""
+    global _question_cache
+    if _question_cache is None:
+        conf = load_yaml_config(_get_config_file_path()).get("QUESTION_CACHE") or {}
+        _question_cache = QuestionCache(
+            max_entries=int(conf.get("max_entries", 256)),
+            ttl=float(conf.get("ttl", 3600)),
+            similarity=float(conf.get("similarity", 0.8)),
+        )
+    return _question_cache
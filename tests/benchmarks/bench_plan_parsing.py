@@ -0,0 +1,69 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Micro-benchmark of the parsing of planner responses.
+
+Compares the repair based parsing, done by the planner and again when the plan
+is accepted, with `parse_plan`. Run from the root of the repository:
+
+    PYTHONPATH=. uv run python tests/benchmarks/bench_plan_parsing.py
+"""
+
+import json
+import timeit
+
+from src.prompts import planner_model
+from src.prompts.planner_model import Plan, parse_plan
+from src.utils.json_utils import repair_json_output
+
+
+def make_plan(num_steps: int) -> dict:
+    return {
+        "locale": "en-US",
+        "has_enough_context": False,
+        "thought": "Understand the market of the subject. " * 20,
+        "title": "Research plan",
+        "steps": [
+            {
+                "need_search": True,
+                "title": f"Step {index}: collect the data of a segment",
+                "description": "Collect market size, growth and major players. " * 20,
+                "step_type": "research",
+            }
+            for index in range(num_steps)
+        ],
+    }
+
+
+def repair_path(content: str) -> Plan:
+    # planner_node, then human_feedback_node on the stored string
+    json.loads(repair_json_output(content))
+    return Plan.model_validate(json.loads(repair_json_output(content)))
+
+
+def parse_plan_path(content: str) -> Plan:
+    planner_model._parsed_plans.clear()
+    parse_plan(content)
+    return parse_plan(content)
+
+
+def main(number: int = 200) -> None:
+    for num_steps in (5, 20, 50):
+        valid = json.dumps(make_plan(num_steps), indent=4, ensure_ascii=False)
+        # A fenced response with a trailing comma, which needs to be repaired
+        malformed = "```json\n" + valid[:-2] + ",\n}\n```"
+        for name, content in (("valid", valid), ("malformed", malformed)):
+            assert repair_path(content) == parse_plan_path(content)
+            before = timeit.timeit(lambda: repair_path(content), number=number)
+            after = timeit.timeit(lambda: parse_plan_path(content), number=number)
+            print(
+                f"{num_steps:3d} steps, {name:9s} {len(content) / 1024:6.1f} KiB: "
+                f"repair {before / number * 1e6:8.1f} us, "
+                f"parse_plan {after / number * 1e6:8.1f} us, "
+                f"x{before / after:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+"""
+Micro-benchmark of the serialization of the chat stream events.
+
+Measures the events encoded per second on one core, with a `json.dumps` of
+each event as before, and with `SSEEventEncoder` on each JSON backend. Run
+from the root of the repository:
+
+    PYTHONPATH=. uv run python tests/benchmarks/bench_sse_events.py
+"""
+
+import json
+import time
+
+from src.server import sse
+from src.server.sse import SSEEventEncoder
+
+
+def make_events(count: int = 10000) -> list[tuple[str, dict]]:
+    """Token chunks of a few messages, with some tool call chunks."""
+    events = []
+    for index in range(count):
+        message = index // 500
+        if index % 50 == 49:
+            events.append(
+                (
+                    "tool_call_chunks",
+                    {
+                        "thread_id": "4c1e6f0a-8d0b-4a47-9b7e-2f4c0e1a9d3b",
+                        "agent": "researcher",
+                        "id": f"run-{message}",
+                        "role": "assistant",
+                        "tool_call_chunks": [
+                            {"name": None, "args": '{"query": "ma', "id": None}
+                        ],
+                    },
+                )
+            )
+            continue
+        events.append(
+            (
+                "message_chunk",
+                {
+                    "thread_id": "4c1e6f0a-8d0b-4a47-9b7e-2f4c0e1a9d3b",
+                    "agent": "reporter",
+                    "id": f"run-{message}",
+                    "role": "assistant",
+                    "content": " market" if index % 3 else " 市场",
+                },
+            )
+        )
+    return events
+
+
+def make_event(event_type: str, data: dict) -> str:
+    # The encoding of every event before SSEEventEncoder
+    if data.get("content") == "":
+        data.pop("content")
+    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def events_per_second(encode, events, rounds: int = 20) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        started_at = time.perf_counter()
+        for event_type, data in events:
+            encode(event_type, dict(data))
+        best = min(best, time.perf_counter() - started_at)
+    return len(events) / best
+
+
+def main() -> None:
+    events = make_events()
+    before = events_per_second(make_event, events)
+    print(f"json.dumps per event:       {before:12,.0f} events/s")
+    backends = [("json", sse._json_dumps)]
+    orjson_dumps = sse._load_orjson()
+    if orjson_dumps is not None:
+        backends.append(("orjson", orjson_dumps))
+    for name, dumps in backends:
+        encoder = SSEEventEncoder(dumps)
+        after = events_per_second(encoder.encode, events)
+        print(
+            f"SSEEventEncoder ({name:6s}):  {after:12,.0f} events/s, "
+            f"x{after / before:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,20 +2,31 @@ from collections import namedtuple
 import json
 import pytest
 import asyncio
+import threading
+import time
 import types
+from contextlib import asynccontextmanager
 from unittest.mock import patch, MagicMock, AsyncMock
-from src.graph.nodes import planner_node
+from src.graph.nodes import planner_node, planner_node_async
 from src.graph.nodes import human_feedback_node
-from src.graph.nodes import coordinator_node
-from src.graph.nodes import reporter_node
+from src.graph.nodes import coordinator_node, coordinator_node_async, is_similar_topic
+from src.graph.nodes import reporter_node, reporter_node_async
 from src.graph.nodes import _execute_agent_step
 from src.graph.nodes import _setup_and_execute_agent_step
-from src.graph.nodes import researcher_node
+from src.graph.nodes import researcher_node, research_team_node
+from src.graph.types import Reset
+from src.prompts.planner_model import Plan, StepType
+from src.prompts.planner_model import Step as PlanStep
+from src.utils.question_cache import QuestionCache
+from src.utils.cancellation import CancelToken, get_cancel_token, set_cancel_token
 
 # 在这里 mock 掉 get_llm_by_type，避免 ValueError
 with patch("src.llms.llm.get_llm_by_type", return_value=MagicMock()):
     from langgraph.types import Command
-    from src.graph.nodes import background_investigation_node
+    from src.graph.nodes import (
+        background_investigation_node,
+        background_investigation_node_async,
+    )
     from src.config import SearchEngine
     from langchain_core.messages import HumanMessage
 
@@ -136,6 +147,24 @@ def test_background_investigation_node_malformed_response(
         assert json.loads(results) is None
 
 
+@pytest.mark.asyncio
+async def test_background_investigation_node_async(
+    mock_state, mock_tavily_search, patch_config_from_runnable_config, mock_config
+):
+    mock_tavily_search.return_value.ainvoke = AsyncMock(
+        return_value=MOCK_SEARCH_RESULTS
+    )
+    with patch("src.graph.nodes.SELECTED_SEARCH_ENGINE", SearchEngine.TAVILY.value):
+        result = await background_investigation_node_async(mock_state, mock_config)
+
+    mock_tavily_search.return_value.ainvoke.assert_awaited_once_with("test query")
+    mock_tavily_search.return_value.invoke.assert_not_called()
+    assert (
+        result["background_investigation_results"]
+        == "## Test Title 1\n\nTest Content 1\n\n## Test Title 2\n\nTest Content 2"
+    )
+
+
 @pytest.fixture
 def mock_plan():
     return {
@@ -183,18 +212,6 @@ def patch_apply_prompt_template():
         yield mock
 
 
-@pytest.fixture
-def patch_repair_json_output():
-    with patch("src.graph.nodes.repair_json_output", side_effect=lambda x: x) as mock:
-        yield mock
-
-
-@pytest.fixture
-def patch_plan_model_validate():
-    with patch("src.graph.nodes.Plan.model_validate", side_effect=lambda x: x) as mock:
-        yield mock
-
-
 @pytest.fixture
 def patch_ai_message():
     AIMessage = namedtuple("AIMessage", ["content", "name"])
@@ -209,8 +226,6 @@ def test_planner_node_basic_has_enough_context(
     mock_state_planner,
     patch_config_from_runnable_config_planner,
     patch_apply_prompt_template,
-    patch_repair_json_output,
-    patch_plan_model_validate,
     patch_ai_message,
     mock_plan,
 ):
@@ -230,7 +245,7 @@ def test_planner_node_basic_has_enough_context(
         assert isinstance(result, Command)
         assert result.goto == "reporter"
         assert "current_plan" in result.update
-        assert result.update["current_plan"]["has_enough_context"] is True
+        assert result.update["current_plan"].has_enough_context is True
         assert result.update["messages"][0].name == "planner"
 
 
@@ -238,8 +253,6 @@ def test_planner_node_basic_not_enough_context(
     mock_state_planner,
     patch_config_from_runnable_config_planner,
     patch_apply_prompt_template,
-    patch_repair_json_output,
-    patch_plan_model_validate,
     patch_ai_message,
 ):
     # AGENT_LLM_MAP["planner"] == "basic" and not thinking mode
@@ -273,8 +286,6 @@ def test_planner_node_stream_mode_has_enough_context(
     mock_state_planner,
     patch_config_from_runnable_config_planner,
     patch_apply_prompt_template,
-    patch_repair_json_output,
-    patch_plan_model_validate,
     patch_ai_message,
     mock_plan,
 ):
@@ -294,15 +305,13 @@ def test_planner_node_stream_mode_has_enough_context(
         assert isinstance(result, Command)
         assert result.goto == "reporter"
         assert "current_plan" in result.update
-        assert result.update["current_plan"]["has_enough_context"] is True
+        assert result.update["current_plan"].has_enough_context is True
 
 
 def test_planner_node_stream_mode_not_enough_context(
     mock_state_planner,
     patch_config_from_runnable_config_planner,
     patch_apply_prompt_template,
-    patch_repair_json_output,
-    patch_plan_model_validate,
     patch_ai_message,
 ):
     # AGENT_LLM_MAP["planner"] != "basic"
@@ -349,7 +358,7 @@ def test_planner_node_json_decode_error_first_iteration(mock_state_planner):
         patch("src.graph.nodes.AGENT_LLM_MAP", {"planner": "basic"}),
         patch("src.graph.nodes.get_llm_by_type") as mock_get_llm,
         patch(
-            "src.graph.nodes.json.loads",
+            "src.graph.nodes.parse_plan",
             side_effect=json.JSONDecodeError("err", "doc", 0),
         ),
     ):
@@ -373,7 +382,7 @@ def test_planner_node_json_decode_error_second_iteration(mock_state_planner):
         patch("src.graph.nodes.AGENT_LLM_MAP", {"planner": "basic"}),
         patch("src.graph.nodes.get_llm_by_type") as mock_get_llm,
         patch(
-            "src.graph.nodes.json.loads",
+            "src.graph.nodes.parse_plan",
             side_effect=json.JSONDecodeError("err", "doc", 0),
         ),
     ):
@@ -389,14 +398,6 @@ def test_planner_node_json_decode_error_second_iteration(mock_state_planner):
         assert result.goto == "reporter"
 
 
-# Patch Plan.model_validate and repair_json_output globally for these tests
-@pytest.fixture(autouse=True)
-def patch_plan_and_repair(monkeypatch):
-    monkeypatch.setattr("src.graph.nodes.Plan.model_validate", lambda x: x)
-    monkeypatch.setattr("src.graph.nodes.repair_json_output", lambda x: x)
-    yield
-
-
 @pytest.fixture
 def mock_state_base():
     return {
@@ -421,7 +422,7 @@ def test_human_feedback_node_auto_accepted(monkeypatch, mock_state_base):
     assert isinstance(result, Command)
     assert result.goto == "reporter"
     assert result.update["plan_iterations"] == 1
-    assert result.update["current_plan"]["has_enough_context"] is True
+    assert result.update["current_plan"].has_enough_context is True
 
 
 def test_human_feedback_node_edit_plan(monkeypatch, mock_state_base):
@@ -445,7 +446,7 @@ def test_human_feedback_node_accepted(monkeypatch, mock_state_base):
         assert isinstance(result, Command)
         assert result.goto == "reporter"
         assert result.update["plan_iterations"] == 1
-        assert result.update["current_plan"]["has_enough_context"] is True
+        assert result.update["current_plan"].has_enough_context is True
 
 
 def test_human_feedback_node_invalid_interrupt(monkeypatch, mock_state_base):
@@ -460,12 +461,12 @@ def test_human_feedback_node_invalid_interrupt(monkeypatch, mock_state_base):
 def test_human_feedback_node_json_decode_error_first_iteration(
     monkeypatch, mock_state_base
 ):
-    # repair_json_output returns bad json, json.loads raises JSONDecodeError, plan_iterations=0
+    # the plan is not valid JSON, plan_iterations=0
     state = dict(mock_state_base)
     state["auto_accepted_plan"] = True
     state["plan_iterations"] = 0
     with patch(
-        "src.graph.nodes.json.loads", side_effect=json.JSONDecodeError("err", "doc", 0)
+        "src.graph.nodes.parse_plan", side_effect=json.JSONDecodeError("err", "doc", 0)
     ):
         result = human_feedback_node(state)
         assert isinstance(result, Command)
@@ -475,12 +476,12 @@ def test_human_feedback_node_json_decode_error_first_iteration(
 def test_human_feedback_node_json_decode_error_second_iteration(
     monkeypatch, mock_state_base
 ):
-    # repair_json_output returns bad json, json.loads raises JSONDecodeError, plan_iterations>0
+    # the plan is not valid JSON, plan_iterations>0
     state = dict(mock_state_base)
     state["auto_accepted_plan"] = True
     state["plan_iterations"] = 2
     with patch(
-        "src.graph.nodes.json.loads", side_effect=json.JSONDecodeError("err", "doc", 0)
+        "src.graph.nodes.parse_plan", side_effect=json.JSONDecodeError("err", "doc", 0)
     ):
         result = human_feedback_node(state)
         assert isinstance(result, Command)
@@ -503,7 +504,144 @@ def test_human_feedback_node_not_enough_context(monkeypatch, mock_state_base):
     assert isinstance(result, Command)
     assert result.goto == "research_team"
     assert result.update["plan_iterations"] == 1
-    assert result.update["current_plan"]["has_enough_context"] is False
+    assert result.update["current_plan"].has_enough_context is False
+
+
+def test_human_feedback_node_applies_early_step_results(monkeypatch, mock_state_base):
+    step = {"need_search": True, "description": "d", "step_type": "research"}
+    plan = {
+        "has_enough_context": False,
+        "title": "Test Plan",
+        "thought": "Test Thought",
+        "steps": [{**step, "title": "A"}, {**step, "title": "B"}],
+        "locale": "en-US",
+    }
+    state = dict(mock_state_base)
+    state["current_plan"] = json.dumps(plan)
+    state["auto_accepted_plan"] = True
+    state["early_step_results"] = [
+        {"index": 0, "title": "A", "execution_res": "result of A"},
+        # The step was renamed by the final plan, it is executed again
+        {"index": 1, "title": "Old B", "execution_res": "result of old B"},
+    ]
+    result = human_feedback_node(state)
+    steps = result.update["current_plan"].steps
+    assert [s.execution_res for s in steps] == ["result of A", None]
+    assert result.update["early_step_results"] == []
+
+
+@pytest.mark.asyncio
+async def test_planner_node_async_basic(
+    mock_state_planner,
+    patch_config_from_runnable_config_planner,
+    patch_apply_prompt_template,
+    patch_ai_message,
+    mock_plan,
+):
+    with (
+        patch("src.graph.nodes.AGENT_LLM_MAP", {"planner": "basic"}),
+        patch("src.graph.nodes.get_llm_by_type") as mock_get_llm,
+    ):
+        mock_llm = MagicMock()
+        mock_llm.with_structured_output.return_value = mock_llm
+        mock_response = MagicMock()
+        mock_response.model_dump_json.return_value = json.dumps(mock_plan)
+        mock_llm.ainvoke = AsyncMock(return_value=mock_response)
+        mock_get_llm.return_value = mock_llm
+
+        result = await planner_node_async(mock_state_planner, MagicMock())
+        mock_llm.ainvoke.assert_awaited_once()
+        mock_llm.invoke.assert_not_called()
+        assert result.goto == "reporter"
+        assert result.update["current_plan"].has_enough_context is True
+
+
+@pytest.mark.asyncio
+async def test_planner_node_async_stream_mode(
+    mock_state_planner,
+    patch_config_from_runnable_config_planner,
+    patch_apply_prompt_template,
+    patch_ai_message,
+    mock_plan,
+):
+    content = json.dumps(mock_plan)
+
+    async def astream(messages):
+        for part in (content[:10], content[10:]):
+            chunk = MagicMock()
+            chunk.content = part
+            yield chunk
+
+    with (
+        patch("src.graph.nodes.AGENT_LLM_MAP", {"planner": "other"}),
+        patch("src.graph.nodes.get_llm_by_type") as mock_get_llm,
+    ):
+        mock_llm = MagicMock()
+        mock_llm.astream = astream
+        mock_get_llm.return_value = mock_llm
+
+        result = await planner_node_async(mock_state_planner, MagicMock())
+        mock_llm.stream.assert_not_called()
+        assert result.goto == "reporter"
+        assert result.update["messages"][0].content == content
+
+
+@pytest.mark.asyncio
+async def test_planner_node_async_starts_steps_early(
+    mock_state_planner,
+    mock_configurable_planner,
+    patch_config_from_runnable_config_planner,
+    patch_apply_prompt_template,
+    patch_ai_message,
+):
+    mock_configurable_planner.stream_plan_steps = True
+    mock_configurable_planner.max_parallel_steps = 2
+    step = {"need_search": True, "description": "d", "step_type": "research"}
+    plan = {
+        "locale": "en-US",
+        "has_enough_context": False,
+        "thought": "Test Thought",
+        "title": "Test Plan",
+        "steps": [
+            {**step, "title": "A"},
+            {**step, "title": "B", "depends_on": []},
+            {**step, "title": "C"},
+        ],
+    }
+    content = json.dumps(plan)
+
+    async def astream(messages):
+        for start in range(0, len(content), 16):
+            yield MagicMock(content=content[start : start + 16])
+
+    async def start_early_step(state, fields, index, step):
+        return {
+            "index": index,
+            "title": step["title"],
+            "execution_res": f"result of {step['title']}",
+            "update": {"observations": [f"result of {step['title']}"]},
+        }
+
+    events = []
+    state = {**mock_state_planner, "auto_accepted_plan": True}
+    with (
+        patch("src.graph.nodes.AGENT_LLM_MAP", {"planner": "basic"}),
+        patch("src.graph.nodes.get_llm_by_type") as mock_get_llm,
+        patch("src.graph.nodes.get_stream_writer", return_value=events.append),
+        patch("src.graph.nodes._start_early_step", side_effect=start_early_step),
+    ):
+        mock_llm = MagicMock()
+        mock_llm.bind.return_value.astream = astream
+        mock_get_llm.return_value = mock_llm
+
+        result = await planner_node_async(state, MagicMock())
+        mock_llm.with_structured_output.assert_not_called()
+
+    assert [event["data"]["step"]["title"] for event in events] == ["A", "B", "C"]
+    assert result.goto == "human_feedback"
+    assert result.update["current_plan"] == content
+    assert [r["title"] for r in result.update["early_step_results"]] == ["A", "B"]
+    assert result.update["observations"] == ["result of A", "result of B"]
 
 
 @pytest.fixture
@@ -630,6 +768,200 @@ def test_coordinator_node_with_tool_calls_background_investigator(
         assert result.update["resources"] == ["resource1", "resource2"]
 
 
+def _speculative_state(mock_state_coordinator):
+    state = dict(mock_state_coordinator)
+    state["enable_background_investigation"] = True
+    state["research_topic"] = "What is quantum computing?"
+    return state
+
+
+def _run_coordinator_with_search(state, tool_calls):
+    with (
+        patch("src.graph.nodes.AGENT_LLM_MAP", {"coordinator": "basic"}),
+        patch("src.graph.nodes.get_llm_by_type") as mock_get_llm,
+        patch(
+            "src.graph.nodes._search_background", return_value="## Quantum"
+        ) as mock_search,
+    ):
+        mock_llm = MagicMock()
+        mock_llm.bind_tools.return_value = mock_llm
+        mock_llm.invoke.return_value = make_mock_llm_response(tool_calls)
+        mock_get_llm.return_value = mock_llm
+
+        return coordinator_node(state, MagicMock()), mock_search
+
+
+def test_coordinator_node_speculative_search_kept(
+    mock_state_coordinator,
+    patch_config_from_runnable_config_coordinator,
+    patch_apply_prompt_template_coordinator,
+    patch_handoff_to_planner,
+    patch_logger,
+):
+    tool_calls = [
+        {
+            "name": "handoff_to_planner",
+            "args": {"locale": "en-US", "research_topic": "quantum computing"},
+        }
+    ]
+    result, mock_search = _run_coordinator_with_search(
+        _speculative_state(mock_state_coordinator), tool_calls
+    )
+    mock_search.assert_called_once()
+    assert mock_search.call_args.args[0] == "What is quantum computing?"
+    assert result.goto == "planner"
+    assert result.update["background_investigation_results"] == "## Quantum"
+
+
+def test_coordinator_node_speculative_search_discarded(
+    mock_state_coordinator,
+    patch_config_from_runnable_config_coordinator,
+    patch_apply_prompt_template_coordinator,
+    patch_handoff_to_planner,
+    patch_logger,
+):
+    tool_calls = [
+        {
+            "name": "handoff_to_planner",
+            "args": {
+                "locale": "en-US",
+                "research_topic": "history of the Roman Empire",
+            },
+        }
+    ]
+    result, _ = _run_coordinator_with_search(
+        _speculative_state(mock_state_coordinator), tool_calls
+    )
+    assert result.goto == "background_investigator"
+    assert "background_investigation_results" not in result.update
+
+    # No handoff at all
+    result, _ = _run_coordinator_with_search(
+        _speculative_state(mock_state_coordinator), []
+    )
+    assert result.goto == "__end__"
+    assert "background_investigation_results" not in result.update
+
+
+def test_coordinator_node_stops_speculative_search_on_error(
+    mock_state_coordinator,
+    patch_config_from_runnable_config_coordinator,
+    patch_apply_prompt_template_coordinator,
+    patch_handoff_to_planner,
+    patch_logger,
+):
+    run_token = CancelToken()
+    started, stopped = threading.Event(), threading.Event()
+
+    def search(query, max_search_results):
+        token = get_cancel_token()
+        started.set()
+        deadline = time.monotonic() + 5
+        while not token.cancelled and time.monotonic() < deadline:
+            time.sleep(0.01)
+        if token.cancelled:
+            stopped.set()
+
+    def fail(messages):
+        started.wait(1)
+        raise RuntimeError("LLM unavailable")
+
+    set_cancel_token(run_token)
+    try:
+        with (
+            patch("src.graph.nodes.AGENT_LLM_MAP", {"coordinator": "basic"}),
+            patch("src.graph.nodes.get_llm_by_type") as mock_get_llm,
+            patch("src.graph.nodes._search_background", side_effect=search),
+        ):
+            mock_llm = MagicMock()
+            mock_llm.bind_tools.return_value = mock_llm
+            mock_llm.invoke.side_effect = fail
+            mock_get_llm.return_value = mock_llm
+
+            with pytest.raises(RuntimeError):
+                coordinator_node(
+                    _speculative_state(mock_state_coordinator), MagicMock()
+                )
+    finally:
+        set_cancel_token(None)
+
+    # The search saw its own token, cancelled without cancelling the run
+    assert stopped.wait(1)
+    assert not run_token.cancelled
+
+
+def test_coordinator_node_speculative_search_disabled(
+    mock_state_coordinator,
+    mock_configurable_coordinator,
+    patch_config_from_runnable_config_coordinator,
+    patch_apply_prompt_template_coordinator,
+    patch_handoff_to_planner,
+    patch_logger,
+):
+    mock_configurable_coordinator.speculative_search = False
+    tool_calls = [
+        {
+            "name": "handoff_to_planner",
+            "args": {"locale": "en-US", "research_topic": "quantum computing"},
+        }
+    ]
+    result, mock_search = _run_coordinator_with_search(
+        _speculative_state(mock_state_coordinator), tool_calls
+    )
+    mock_search.assert_not_called()
+    assert result.goto == "background_investigator"
+
+
+@pytest.mark.asyncio
+async def test_coordinator_node_async(
+    mock_state_coordinator,
+    patch_config_from_runnable_config_coordinator,
+    patch_apply_prompt_template_coordinator,
+    patch_handoff_to_planner,
+    patch_logger,
+):
+    tool_calls = [
+        {
+            "name": "handoff_to_planner",
+            "args": {"locale": "en-US", "research_topic": "quantum computing"},
+        }
+    ]
+    with (
+        patch("src.graph.nodes.AGENT_LLM_MAP", {"coordinator": "basic"}),
+        patch("src.graph.nodes.get_llm_by_type") as mock_get_llm,
+        patch(
+            "src.graph.nodes._search_background_async",
+            AsyncMock(return_value="## Quantum"),
+        ) as mock_search,
+    ):
+        mock_llm = MagicMock()
+        mock_llm.bind_tools.return_value = mock_llm
+        mock_llm.ainvoke = AsyncMock(return_value=make_mock_llm_response(tool_calls))
+        mock_get_llm.return_value = mock_llm
+
+        result = await coordinator_node_async(
+            _speculative_state(mock_state_coordinator), MagicMock()
+        )
+        mock_llm.invoke.assert_not_called()
+        mock_search.assert_awaited_once()
+        assert result.goto == "planner"
+        assert result.update["research_topic"] == "quantum computing"
+        assert result.update["background_investigation_results"] == "## Quantum"
+
+
+@pytest.mark.parametrize(
+    "a, b, expected",
+    [
+        ("What is quantum computing?", "quantum computing", True),
+        ("What is quantum computing?", "history of the Roman Empire", False),
+        ("量子计算是什么？", "量子计算", True),
+        ("", "quantum computing", False),
+    ],
+)
+def test_is_similar_topic(a, b, expected):
+    assert is_similar_topic(a, b) is expected
+
+
 def test_coordinator_node_with_tool_calls_locale_override(
     mock_state_coordinator,
     patch_config_from_runnable_config_coordinator,
@@ -815,6 +1147,31 @@ def test_reporter_node_with_observations(
         mock_llm.invoke.assert_called()
 
 
+@pytest.mark.asyncio
+async def test_reporter_node_async(
+    mock_state_reporter_with_observations,
+    patch_config_from_runnable_config_reporter,
+    patch_apply_prompt_template_reporter,
+    patch_human_message,
+    patch_logger_reporter,
+):
+    with (
+        patch("src.graph.nodes.AGENT_LLM_MAP", {"reporter": "basic"}),
+        patch("src.graph.nodes.get_llm_by_type") as mock_get_llm,
+    ):
+        mock_llm = MagicMock()
+        mock_llm.ainvoke = AsyncMock(
+            return_value=make_mock_llm_response_reporter("Async Report")
+        )
+        mock_get_llm.return_value = mock_llm
+
+        result = await reporter_node_async(
+            mock_state_reporter_with_observations, MagicMock()
+        )
+        mock_llm.invoke.assert_not_called()
+        assert result["final_report"] == "Async Report"
+
+
 def test_reporter_node_locale_default(
     patch_config_from_runnable_config_reporter,
     patch_apply_prompt_template_reporter,
@@ -844,6 +1201,156 @@ def test_reporter_node_locale_default(
         assert result["final_report"] == "Default Locale Report"
 
 
+@pytest.fixture
+def question_cache():
+    cache = QuestionCache()
+    with patch("src.graph.nodes.get_question_cache", return_value=cache):
+        yield cache
+
+
+def test_planner_node_reuses_plan_of_similar_question(
+    question_cache,
+    mock_configurable_planner,
+    patch_config_from_runnable_config_planner,
+    patch_apply_prompt_template,
+    mock_plan,
+):
+    mock_configurable_planner.research_cache = "plan"
+    question_cache.store(
+        "what factors are influencing the AI adoption in healthcare",
+        "en-US",
+        "plan",
+        json.dumps(mock_plan),
+    )
+    state = {
+        "messages": [HumanMessage(content="plan this")],
+        "plan_iterations": 0,
+        "research_topic": "What factors are influencing AI adoption in healthcare?",
+        "locale": "en-US",
+    }
+    with patch("src.graph.nodes.get_llm_by_type") as mock_get_llm:
+        result = planner_node(state, MagicMock())
+    mock_get_llm.return_value.with_structured_output.return_value.invoke.assert_not_called()
+    assert result.goto == "reporter"
+    assert result.update["current_plan"].title == "Test Plan"
+
+
+def test_planner_node_does_not_reuse_plan_after_feedback(
+    question_cache,
+    mock_configurable_planner,
+    patch_config_from_runnable_config_planner,
+    patch_apply_prompt_template,
+    mock_plan,
+):
+    mock_configurable_planner.research_cache = "plan"
+    question_cache.store("AI adoption in healthcare", "en-US", "plan", "{}")
+    state = {
+        "messages": [HumanMessage(content="[EDIT_PLAN] more steps", name="feedback")],
+        "plan_iterations": 0,
+        "research_topic": "AI adoption in healthcare",
+    }
+    with (
+        patch("src.graph.nodes.AGENT_LLM_MAP", {"planner": "basic"}),
+        patch("src.graph.nodes.get_llm_by_type") as mock_get_llm,
+    ):
+        mock_llm = mock_get_llm.return_value.with_structured_output.return_value
+        mock_llm.invoke.return_value.model_dump_json.return_value = json.dumps(
+            mock_plan
+        )
+        planner_node(state, MagicMock())
+    mock_llm.invoke.assert_called_once()
+
+
+def test_human_feedback_node_stores_accepted_plan(question_cache, mock_state_base):
+    state = dict(mock_state_base)
+    state["auto_accepted_plan"] = True
+    state["research_topic"] = "AI adoption in healthcare"
+    human_feedback_node(state, {"configurable": {"research_cache": "plan"}})
+    assert (
+        question_cache.lookup("AI adoption in healthcare", "en-US", "plan")
+        == state["current_plan"]
+    )
+
+
+def test_coordinator_node_reuses_report_of_similar_question(
+    question_cache,
+    mock_state_coordinator,
+    mock_configurable_coordinator,
+    patch_config_from_runnable_config_coordinator,
+    patch_apply_prompt_template_coordinator,
+    patch_handoff_to_planner,
+    patch_logger,
+):
+    mock_configurable_coordinator.research_cache = "report"
+    mock_configurable_coordinator.report_style = "academic"
+    question_cache.store(
+        "Quantum computing and cryptography", "en-US", "report/academic", "Report"
+    )
+    tool_calls = [
+        {
+            "name": "handoff_to_planner",
+            "args": {
+                "locale": "en-US",
+                "research_topic": "quantum computing and cryptography",
+            },
+        }
+    ]
+    with patch("src.graph.nodes.get_llm_by_type") as mock_get_llm:
+        mock_llm = mock_get_llm.return_value.bind_tools.return_value
+        mock_llm.invoke.return_value = make_mock_llm_response(tool_calls)
+        result = coordinator_node(mock_state_coordinator, MagicMock())
+    assert result.goto == "reporter"
+    assert result.update["cached_report"] == "Report"
+
+    mock_configurable_coordinator.report_style = "news"
+    with patch("src.graph.nodes.get_llm_by_type") as mock_get_llm:
+        mock_llm = mock_get_llm.return_value.bind_tools.return_value
+        mock_llm.invoke.return_value = make_mock_llm_response(tool_calls)
+        result = coordinator_node(mock_state_coordinator, MagicMock())
+    assert result.goto == "planner"
+
+
+@pytest.mark.asyncio
+async def test_reporter_node_replays_cached_report(
+    question_cache,
+    mock_configurable_reporter,
+    patch_config_from_runnable_config_reporter,
+):
+    mock_configurable_reporter.research_cache = "report"
+    state = {"cached_report": "# Cached report", "research_topic": "topic"}
+    with patch("src.graph.nodes.get_llm_by_type") as mock_get_llm:
+        result = reporter_node(state, MagicMock())
+        async_result = await reporter_node_async(state, MagicMock())
+    mock_get_llm.assert_not_called()
+    assert result == {"final_report": "# Cached report", "cached_report": ""}
+    assert async_result == result
+
+
+def test_reporter_node_stores_report(
+    question_cache,
+    mock_state_reporter,
+    mock_configurable_reporter,
+    patch_config_from_runnable_config_reporter,
+    patch_apply_prompt_template_reporter,
+    patch_human_message,
+):
+    mock_configurable_reporter.research_cache = "plan"
+    mock_configurable_reporter.report_style = "academic"
+    state = dict(mock_state_reporter, research_topic="AI adoption in healthcare")
+    with (
+        patch("src.graph.nodes.AGENT_LLM_MAP", {"reporter": "basic"}),
+        patch("src.graph.nodes.get_llm_by_type") as mock_get_llm,
+    ):
+        mock_get_llm.return_value.invoke.return_value = make_mock_llm_response_reporter(
+            "Fresh report"
+        )
+        reporter_node(state, MagicMock())
+    assert (
+        question_cache.lookup("AI adoption in healthcare", "en-US", "report/academic")
+        == "Fresh report"
+    )
+
+
 # Create the real Step class for the tests
 class Step:
     def __init__(self, title, description, execution_res=None):
@@ -919,11 +1426,11 @@ async def test_execute_agent_step_basic(mock_state_with_steps, mock_agent):
         assert "observations" in result.update
         # The new observation should be appended
         assert result.update["observations"][-1] == "result content"
-        # The step's execution_res should be updated
-        assert (
-            mock_state_with_steps["current_plan"].steps[1].execution_res
-            == "result content"
-        )
+        # The step's result is returned for the research team to record
+        assert result.update["step_results"] == [
+            {"index": 1, "execution_res": "result content"}
+        ]
+        assert mock_state_with_steps["current_plan"].steps[1].execution_res is None
 
 
 @pytest.mark.asyncio
@@ -973,6 +1480,80 @@ async def test_execute_agent_step_with_resources_and_researcher(mock_step):
         assert result.update["observations"][-1] == "resource result"
 
 
+@pytest.mark.asyncio
+async def test_execute_agent_step_with_current_step_index():
+    # Should execute the selected step with only its dependencies as context
+    steps = [
+        Step(title="Step 0", description="Desc 0", execution_res="Done 0"),
+        Step(title="Step 1", description="Desc 1", execution_res="Done 1"),
+        Step(title="Step 2", description="Desc 2"),
+        Step(title="Step 3", description="Desc 3"),
+    ]
+    steps[3].depends_on = [1]
+    Plan = MagicMock()
+    Plan.steps = steps
+    state = {
+        "current_plan": Plan,
+        "current_step_index": 3,
+        "observations": [],
+        "locale": "en-US",
+        "resources": [],
+    }
+    agent = MagicMock()
+
+    async def ainvoke(input, config):
+        content = input["messages"][0].content
+        assert "Done 1" in content
+        assert "Done 0" not in content
+        assert "Desc 3" in content
+        return {"messages": [MagicMock(content="step 3 result")]}
+
+    agent.ainvoke = ainvoke
+    with patch(
+        "src.graph.nodes.HumanMessage",
+        side_effect=lambda content, name=None: MagicMock(content=content, name=name),
+    ):
+        result = await _execute_agent_step(state, agent, "researcher")
+    assert result.update["observations"] == ["step 3 result"]
+    assert result.update["step_results"] == [
+        {"index": 3, "execution_res": "step 3 result"}
+    ]
+    assert steps[3].execution_res is None
+
+
+def test_research_team_node_records_the_step_results():
+    plan = Plan(
+        locale="en-US",
+        has_enough_context=False,
+        thought="",
+        title="Plan",
+        steps=[
+            PlanStep(
+                need_search=True,
+                title=title,
+                description=title,
+                step_type=StepType.RESEARCH,
+            )
+            for title in ("A", "B", "C")
+        ],
+    )
+    state = {
+        "current_plan": plan,
+        "step_results": [
+            {"index": 2, "execution_res": "result of C"},
+            {"index": 0, "execution_res": "result of A"},
+        ],
+    }
+
+    update = research_team_node(state)
+
+    steps = update["current_plan"].steps
+    assert [s.execution_res for s in steps] == ["result of A", None, "result of C"]
+    assert update["step_results"] == Reset()
+    assert all(s.execution_res is None for s in plan.steps)
+    assert research_team_node({"current_plan": plan, "step_results": []}) is None
+
+
 @pytest.mark.asyncio
 async def test_execute_agent_step_recursion_limit_env(
     monkeypatch, mock_state_with_steps, mock_agent
@@ -1118,31 +1699,33 @@ def patch_execute_agent_step():
 
 
 @pytest.fixture
-def patch_multiserver_mcp_client():
-    # Patch MultiServerMCPClient as async context manager
+def patch_mcp_session_pool():
+    # Patch the MCP session pool, acquire() is an async context manager
     class FakeTool:
         def __init__(self, name, description="desc"):
             self.name = name
             self.description = description
 
-    class FakeClient:
-        async def __aenter__(self):
-            return self
+        def model_copy(self, update):
+            return FakeTool(self.name, update.get("description", self.description))
 
-        async def __aexit__(self, exc_type, exc, tb):
-            pass
-
-        def get_tools(self):
-            return [
+    class FakePool:
+        def __init__(self):
+            self.tools = [
                 FakeTool("toolA", "descA"),
                 FakeTool("toolB", "descB"),
                 FakeTool("toolC", "descC"),
             ]
+            self.servers = None
 
-    with patch(
-        "src.graph.nodes.MultiServerMCPClient", return_value=FakeClient()
-    ) as mock:
-        yield mock
+        @asynccontextmanager
+        async def acquire(self, servers):
+            self.servers = servers
+            yield self.tools
+
+    pool = FakePool()
+    with patch("src.graph.nodes.get_mcp_session_pool", return_value=pool):
+        yield pool
 
 
 @pytest.mark.asyncio
@@ -1152,9 +1735,9 @@ async def test_setup_and_execute_agent_step_with_mcp(
     patch_config_from_runnable_config_with_mcp,
     patch_create_agent,
     patch_execute_agent_step,
-    patch_multiserver_mcp_client,
+    patch_mcp_session_pool,
 ):
-    # Should use MCP client, load tools, and call create_agent with correct tools
+    # Should use pooled MCP sessions, load tools, and call create_agent with correct tools
     default_tools = [MagicMock(name="default_tool")]
     agent_type = "researcher"
 
@@ -1170,6 +1753,9 @@ async def test_setup_and_execute_agent_step_with_mcp(
     tool_names = [t.name for t in loaded_tools if hasattr(t, "name")]
     assert "toolA" in tool_names
     assert "toolB" in tool_names
+    assert all(t.description.startswith("Powered by") for t in loaded_tools[1:])
+    # The shared tool listing of the pool is left untouched
+    assert patch_mcp_session_pool.tools[0].description == "descA"
     # Should call _execute_agent_step
     patch_execute_agent_step.assert_called_once()
     assert result == "EXECUTED"
@@ -1248,43 +1834,37 @@ async def test_setup_and_execute_agent_step_with_mcp_tools_description_update(
     patch_config_from_runnable_config_with_mcp,
     patch_create_agent,
     patch_execute_agent_step,
+    patch_mcp_session_pool,
 ):
     # Should update tool.description with Powered by info
     default_tools = [MagicMock(name="default_tool")]
     agent_type = "researcher"
 
-    # Patch MultiServerMCPClient to check description update
-    class FakeTool:
-        def __init__(self, name, description="desc"):
-            self.name = name
-            self.description = description
-
-    class FakeClient:
-        async def __aenter__(self):
-            return self
-
-        async def __aexit__(self, exc_type, exc, tb):
-            pass
-
-        def get_tools(self):
-            return [FakeTool("toolA", "descA")]
-
-    with patch("src.graph.nodes.MultiServerMCPClient", return_value=FakeClient()):
-        await _setup_and_execute_agent_step(
-            mock_state_with_steps,
-            mock_config,
-            agent_type,
-            default_tools,
-        )
-        # The tool description should be updated
-        args, kwargs = patch_create_agent.call_args
-        loaded_tools = args[2]
-        found = False
-        for t in loaded_tools:
-            if hasattr(t, "name") and t.name == "toolA":
-                assert t.description.startswith("Powered by 'server1'.\n")
-                found = True
-        assert found
+    await _setup_and_execute_agent_step(
+        mock_state_with_steps,
+        mock_config,
+        agent_type,
+        default_tools,
+    )
+    # The tool description should be updated
+    args, kwargs = patch_create_agent.call_args
+    loaded_tools = args[2]
+    found = False
+    for t in loaded_tools:
+        if hasattr(t, "name") and t.name == "toolA":
+            assert t.description.startswith("Powered by 'server1'.\n")
+            found = True
+    assert found
+    # The pool is given the connection settings of the server only
+    assert patch_mcp_session_pool.servers == {
+        "server1": {
+            "transport": "http",
+            "command": "run",
+            "args": {},
+            "url": "http://localhost",
+            "env": {},
+        }
+    }
 
 
 @pytest.fixture
@@ -1,8 +1,18 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+from datetime import datetime
+
 import pytest
-from src.prompts.template import get_prompt_template, apply_prompt_template
+from src.prompts.template import (
+    PromptLayout,
+    apply_prompt_template,
+    check_all_prefix_stability,
+    check_prefix_stability,
+    get_prompt_layout,
+    get_prompt_template,
+)
+from src.rag.retriever import Resource
 
 
 def test_get_prompt_template_success():
@@ -143,3 +153,99 @@ def test_apply_prompt_template_reporter():
     messages_cn = apply_prompt_template("reporter", test_state_social_media_cn)
     system_content_cn = messages_cn[0]["content"]
     assert "小红书" in system_content_cn
+
+
+def test_stable_layout_keeps_system_prompt_identical():
+    """Test the stable layout moves the current time after the conversation"""
+    test_state = {"messages": [{"role": "user", "content": "test message"}]}
+    first, second = (
+        apply_prompt_template(
+            "researcher",
+            test_state,
+            layout=PromptLayout.STABLE,
+            now=datetime(2025, 1, 1, 10, 0, second),
+        )
+        for second in (0, 30)
+    )
+    assert first[0] == second[0]
+    assert "CURRENT_TIME: Wed Jan 01 2025\n" in first[0]["content"]
+    assert first[1] == {"role": "user", "content": "test message"}
+    assert first[-1] == {
+        "role": "user",
+        "name": "system",
+        "content": "CURRENT_TIME: Wed Jan 01 2025 10:00:00",
+    }
+    assert second[-1]["content"] == "CURRENT_TIME: Wed Jan 01 2025 10:00:30"
+
+
+def test_stable_layout_keeps_the_system_prompt_of_runs_with_other_resources():
+    states = [
+        {
+            "messages": [],
+            "locale": "en-US",
+            "resources": [Resource(uri=f"rag://dataset/{index}", title=str(index))],
+        }
+        for index in range(2)
+    ]
+    now = datetime(2025, 1, 1, 10, 0, 0)
+    first, second = (
+        apply_prompt_template("researcher", state, layout=PromptLayout.STABLE, now=now)
+        for state in states
+    )
+    assert first[0] == second[0]
+    # The templates still see whether the run has resources
+    assert "local_search_tool" in first[0]["content"]
+    assert second[-1]["content"] == "CURRENT_TIME: Wed Jan 01 2025 10:00:00"
+
+
+def test_stable_layout_only_moves_the_time():
+    state = {"messages": [], "locale": "zh-CN", "report_style": "social_media"}
+    now = datetime(2025, 1, 1, 10, 0, 0)
+    inline = apply_prompt_template(
+        "reporter", state, layout=PromptLayout.INLINE, now=now
+    )
+    stable = apply_prompt_template(
+        "reporter", state, layout=PromptLayout.STABLE, now=now
+    )
+    # The model gets the locale in the system prompt, as with the inline layout
+    assert "locale = **zh-CN**" in stable[0]["content"]
+    assert "小红书" in stable[0]["content"]
+    assert (
+        stable[0]["content"].replace(
+            "CURRENT_TIME: Wed Jan 01 2025",
+            "CURRENT_TIME: " + now.strftime("%a %b %d %Y %H:%M:%S %z"),
+        )
+        == inline[0]["content"]
+    )
+    assert stable[-1] == {
+        "role": "user",
+        "name": "system",
+        "content": "CURRENT_TIME: Wed Jan 01 2025 10:00:00",
+    }
+
+
+def test_stable_layout_without_time_adds_no_message():
+    messages = apply_prompt_template(
+        "prose/prose_zap", {"messages": []}, layout=PromptLayout.STABLE
+    )
+    assert len(messages) == 1
+
+
+def test_prompt_layout_from_environment(monkeypatch):
+    monkeypatch.delenv("PROMPT_LAYOUT", raising=False)
+    assert get_prompt_layout() == PromptLayout.INLINE
+    monkeypatch.setenv("PROMPT_LAYOUT", "STABLE")
+    assert get_prompt_layout() == PromptLayout.STABLE
+    monkeypatch.setenv("PROMPT_LAYOUT", "unknown")
+    assert get_prompt_layout() == PromptLayout.INLINE
+
+
+def test_check_prefix_stability():
+    inline = check_prefix_stability("planner", layout=PromptLayout.INLINE)
+    assert not inline.stable
+    assert inline.stable_prefix_chars < inline.system_prompt_chars
+    assert check_prefix_stability("planner", layout=PromptLayout.STABLE).stable
+    assert all(
+        result.stable
+        for result in check_all_prefix_stability(layout=PromptLayout.STABLE)
+    )
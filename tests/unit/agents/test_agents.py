@@ -0,0 +1,129 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from unittest.mock import patch
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from src.agents import agents
+from src.agents.agents import AgentCache, ToolProxy, get_tools_fingerprint
+
+
+class FakeToolCallingModel(GenericFakeChatModel):
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def make_lookup_tool(prefix):
+    @tool
+    def lookup(keywords: str) -> str:
+        """Look up keywords in the knowledge base."""
+        return f"{prefix}:{keywords}"
+
+    return lookup
+
+
+def make_tool_call_responses(*keywords):
+    responses = []
+    for i, keyword in enumerate(keywords):
+        responses.append(
+            AIMessage(
+                content="",
+                tool_calls=[
+                    {"name": "lookup", "args": {"keywords": keyword}, "id": str(i)}
+                ],
+            )
+        )
+        responses.append(AIMessage(content=f"done {keyword}"))
+    return responses
+
+
+@pytest.fixture
+def agent_cache():
+    cache = AgentCache(max_size=2)
+    with patch.object(agents, "_agent_cache", cache):
+        yield cache
+
+
+@pytest.fixture
+def fake_model():
+    model = FakeToolCallingModel(messages=iter(make_tool_call_responses("x", "y")))
+    with (
+        patch.object(agents, "get_llm_by_type", return_value=model),
+        patch.dict(agents.AGENT_LLM_MAP, {"researcher": "basic"}),
+        patch.object(
+            agents,
+            "apply_prompt_template",
+            side_effect=lambda template, state: state["messages"],
+        ),
+    ):
+        yield model
+
+
+@pytest.mark.asyncio
+async def test_create_agent_reuses_compiled_agent_with_new_tools(
+    agent_cache, fake_model
+):
+    agent_a = agents.create_agent(
+        "researcher", "researcher", [make_lookup_tool("A")], "researcher"
+    )
+    result_a = await agent_a.ainvoke({"messages": [("user", "hi")]})
+    agent_b = agents.create_agent(
+        "researcher", "researcher", [make_lookup_tool("B")], "researcher"
+    )
+    result_b = await agent_b.ainvoke({"messages": [("user", "hi")]})
+
+    assert agent_a.graph is agent_b.graph
+    assert agent_cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+    # Each run calls its own tool instance
+    assert result_a["messages"][2].content == "A:x"
+    assert result_b["messages"][2].content == "B:y"
+
+
+def test_create_agent_compiles_new_agent_for_other_toolset(agent_cache, fake_model):
+    @tool
+    def other(query: str) -> str:
+        """Another tool."""
+        return query
+
+    agent_a = agents.create_agent(
+        "researcher", "researcher", [make_lookup_tool("A")], "researcher"
+    )
+    agent_b = agents.create_agent(
+        "researcher", "researcher", [make_lookup_tool("A"), other], "researcher"
+    )
+    assert agent_a.graph is not agent_b.graph
+    assert agent_cache.stats()["misses"] == 2
+
+
+def test_tool_proxy_requires_bound_tool():
+    proxy = ToolProxy.from_tool(make_lookup_tool("A"))
+    assert proxy.name == "lookup"
+    with pytest.raises(RuntimeError):
+        proxy.invoke({"keywords": "x"})
+
+
+def test_get_tools_fingerprint():
+    @tool
+    def lookup(query: str) -> str:
+        """Look up a query."""
+        return query
+
+    fingerprint = get_tools_fingerprint([make_lookup_tool("A")])
+    assert fingerprint == get_tools_fingerprint([make_lookup_tool("B")])
+    assert fingerprint != get_tools_fingerprint([lookup])
+    assert fingerprint != get_tools_fingerprint([])
+
+
+def test_agent_cache_evicts_least_recently_used():
+    cache = AgentCache(max_size=2)
+    cache.get_or_create(("a",), lambda: "agent a")
+    cache.get_or_create(("b",), lambda: "agent b")
+    assert cache.get_or_create(("a",), lambda: "new agent a") == "agent a"
+    cache.get_or_create(("c",), lambda: "agent c")
+
+    assert cache.get_or_create(("b",), lambda: "new agent b") == "new agent b"
+    assert cache.stats() == {"size": 2, "hits": 1, "misses": 4}
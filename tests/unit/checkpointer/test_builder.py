@@ -0,0 +1,59 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from unittest.mock import patch
+
+import pytest
+from langgraph.checkpoint.memory import MemorySaver
+
+from src.checkpointer.builder import build_checkpointer
+from src.checkpointer.memory_saver import BoundedMemorySaver
+from src.checkpointer.sqlite_saver import SQLiteSaver
+
+
+@patch("src.checkpointer.builder.load_yaml_config", return_value={})
+def test_build_checkpointer_defaults_to_memory(mock_load):
+    checkpointer = build_checkpointer()
+    assert isinstance(checkpointer, MemorySaver)
+    assert isinstance(checkpointer, BoundedMemorySaver)
+    checkpointer.close()
+
+
+@patch(
+    "src.checkpointer.builder.load_yaml_config",
+    return_value={
+        "CHECKPOINTER": {"type": "memory", "max_threads": 10, "max_bytes": 1024}
+    },
+)
+def test_build_bounded_memory_checkpointer(mock_load):
+    checkpointer = build_checkpointer()
+    assert checkpointer.max_threads == 10
+    assert checkpointer.max_bytes == 1024
+    assert checkpointer.thread_ttl == 24 * 60 * 60
+    checkpointer.close()
+
+
+def test_build_sqlite_checkpointer(tmp_path):
+    conf = {
+        "CHECKPOINTER": {
+            "type": "sqlite",
+            "path": str(tmp_path / "checkpoints.sqlite"),
+            "max_checkpoints_per_thread": 5,
+            "batch_size": 8,
+        }
+    }
+    with patch("src.checkpointer.builder.load_yaml_config", return_value=conf):
+        checkpointer = build_checkpointer()
+    assert isinstance(checkpointer, SQLiteSaver)
+    assert checkpointer.max_checkpoints_per_thread == 5
+    assert checkpointer.batch_size == 8
+    checkpointer.close()
+
+
+@patch(
+    "src.checkpointer.builder.load_yaml_config",
+    return_value={"CHECKPOINTER": {"type": "redis"}},
+)
+def test_build_checkpointer_unsupported_type(mock_load):
+    with pytest.raises(ValueError):
+        build_checkpointer()
@@ -0,0 +1,101 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from unittest.mock import patch
+
+import pytest
+from langgraph.graph import START, END, MessagesState, StateGraph
+
+from src.checkpointer.memory_saver import BoundedMemorySaver
+
+
+def _build_graph(checkpointer):
+    builder = StateGraph(MessagesState)
+    builder.add_node("echo", lambda state: {"messages": [("ai", "echo")]})
+    builder.add_edge(START, "echo")
+    builder.add_edge("echo", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def _run(graph, thread_id):
+    config = {"configurable": {"thread_id": thread_id}}
+    graph.invoke({"messages": [("user", "hello " * 100)]}, config)
+    return config
+
+
+def test_evicts_least_recently_used_threads():
+    saver = BoundedMemorySaver(max_threads=2, eviction_interval=None)
+    graph = _build_graph(saver)
+    configs = [_run(graph, f"thread-{i}") for i in range(3)]
+    # Reading thread-0 makes thread-1 the least recently used one
+    assert saver.get_tuple(configs[0]) is not None
+
+    assert saver.evict() == 1
+    assert saver.get_tuple(configs[1]) is None
+    assert saver.get_tuple(configs[0]) is not None
+    assert saver.get_tuple(configs[2]) is not None
+    assert saver.stats()["evictions"] == {"ttl": 0, "capacity": 1, "memory": 0}
+
+
+def test_evicts_idle_threads():
+    saver = BoundedMemorySaver(thread_ttl=60, eviction_interval=None)
+    graph = _build_graph(saver)
+    with patch("src.checkpointer.memory_saver.time.monotonic", return_value=0):
+        old = _run(graph, "old")
+    with patch("src.checkpointer.memory_saver.time.monotonic", return_value=100):
+        new = _run(graph, "new")
+        assert saver.evict() == 1
+    assert saver.get_tuple(old) is None
+    assert saver.get_tuple(new) is not None
+    assert saver.stats()["evictions"]["ttl"] == 1
+
+
+def test_evicts_threads_over_byte_budget():
+    saver = BoundedMemorySaver(eviction_interval=None)
+    graph = _build_graph(saver)
+    _run(graph, "thread-0")
+    thread_size = saver.stats()["bytes"]
+    assert thread_size > 0
+
+    saver.max_bytes = int(thread_size * 2.5)
+    for i in range(1, 4):
+        _run(graph, f"thread-{i}")
+    assert saver.evict() == 2
+    stats = saver.stats()
+    assert stats["threads"] == 2
+    assert stats["bytes"] <= saver.max_bytes
+    assert stats["evictions"]["memory"] == 2
+
+
+def test_delete_thread_releases_bytes():
+    saver = BoundedMemorySaver(eviction_interval=None)
+    graph = _build_graph(saver)
+    _run(graph, "thread-0")
+    saver.delete_thread("thread-0")
+    assert saver.stats() == {
+        "threads": 0,
+        "bytes": 0,
+        "evictions": {"ttl": 0, "capacity": 0, "memory": 0},
+    }
+
+
+def test_unknown_thread_is_not_tracked():
+    saver = BoundedMemorySaver(eviction_interval=None)
+    assert saver.get_tuple({"configurable": {"thread_id": "missing"}}) is None
+    assert list(saver.list({"configurable": {"thread_id": "missing"}})) == []
+    assert "missing" not in saver.storage
+
+
+@pytest.mark.asyncio
+async def test_background_eviction():
+    saver = BoundedMemorySaver(max_threads=1, eviction_interval=0.01)
+    graph = _build_graph(saver)
+    await graph.ainvoke(
+        {"messages": [("user", "hi")]}, {"configurable": {"thread_id": "a"}}
+    )
+    await graph.ainvoke(
+        {"messages": [("user", "hi")]}, {"configurable": {"thread_id": "b"}}
+    )
+    saver.close()
+    saver.evict()
+    assert saver.stats()["threads"] == 1
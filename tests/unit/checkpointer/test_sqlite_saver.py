@@ -0,0 +1,121 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import operator
+from typing import Annotated
+
+import pytest
+from langgraph.graph import START, END, MessagesState, StateGraph
+from langgraph.types import Command, Send, interrupt
+
+from src.checkpointer.sqlite_saver import SQLiteSaver
+
+
+class _State(MessagesState):
+    results: Annotated[list, operator.add]
+
+
+def _review_node(state):
+    feedback = interrupt("Please review.")
+    return {"results": [f"review:{feedback}"]}
+
+
+def _fan_out(state):
+    return [Send("worker", {"index": i}) for i in range(3)]
+
+
+def _worker_node(state):
+    return {"results": [f"worker:{state['index']}"]}
+
+
+def _build_graph(checkpointer):
+    builder = StateGraph(_State)
+    builder.add_node("review", _review_node)
+    builder.add_node("worker", _worker_node)
+    builder.add_edge(START, "review")
+    builder.add_conditional_edges("review", _fan_out, ["worker"])
+    builder.add_edge("worker", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "nested" / "checkpoints.sqlite")
+
+
+def test_resume_interrupted_thread_after_restart(db_path):
+    config = {"configurable": {"thread_id": "thread-1"}}
+    saver = SQLiteSaver(db_path)
+    _build_graph(saver).invoke({"messages": [], "results": []}, config)
+    saver.close()
+
+    saver = SQLiteSaver(db_path)
+    graph = _build_graph(saver)
+    assert graph.get_state(config).next == ("review",)
+    result = graph.invoke(Command(resume="ok"), config)
+    assert result["results"] == ["review:ok", "worker:0", "worker:1", "worker:2"]
+    saver.close()
+
+
+def test_writes_are_batched(db_path):
+    config = {"configurable": {"thread_id": "thread-1"}}
+    saver = SQLiteSaver(db_path, batch_size=1000, flush_interval=60)
+    _build_graph(saver).invoke({"messages": [], "results": []}, config)
+    assert saver.pending_count > 0
+    rows = saver.conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+    assert rows == 0
+
+    # Reads see buffered checkpoints
+    assert saver.get_tuple(config) is not None
+    assert saver.pending_count == 0
+    saver.close()
+
+
+def test_history_is_pruned_per_thread(db_path):
+    saver = SQLiteSaver(db_path, max_checkpoints_per_thread=2)
+    graph = _build_graph(saver)
+    for thread_id in ("thread-1", "thread-2"):
+        config = {"configurable": {"thread_id": thread_id}}
+        graph.invoke({"messages": [], "results": []}, config)
+        graph.invoke(Command(resume="ok"), config)
+        assert len(list(saver.list(config))) == 2
+    saver.close()
+
+
+def test_delete_thread(db_path):
+    config = {"configurable": {"thread_id": "thread-1"}}
+    saver = SQLiteSaver(db_path)
+    _build_graph(saver).invoke({"messages": [], "results": []}, config)
+    saver.delete_thread("thread-1")
+    assert saver.get_tuple(config) is None
+    assert list(saver.list(None)) == []
+    saver.close()
+
+
+def test_list_filter_and_limit(db_path):
+    config = {"configurable": {"thread_id": "thread-1"}}
+    saver = SQLiteSaver(db_path)
+    _build_graph(saver).invoke({"messages": [], "results": []}, config)
+    assert len(list(saver.list(config, limit=1))) == 1
+    inputs = list(saver.list(config, filter={"source": "input"}))
+    assert len(inputs) == 1
+    assert inputs[0].metadata["source"] == "input"
+    saver.close()
+
+
+@pytest.mark.asyncio
+async def test_async_api(db_path):
+    config = {"configurable": {"thread_id": "thread-1"}}
+    saver = SQLiteSaver(db_path)
+    graph = _build_graph(saver)
+    await graph.ainvoke({"messages": [], "results": []}, config)
+    result = await graph.ainvoke(Command(resume="ok"), config)
+    assert len(result["results"]) == 4
+    assert await saver.aget_tuple(config) is not None
+    assert len([c async for c in saver.alist(config, limit=2)]) == 2
+    saver.close()
+
+
+def test_invalid_max_checkpoints(db_path):
+    with pytest.raises(ValueError):
+        SQLiteSaver(db_path, max_checkpoints_per_thread=1)
@@ -0,0 +1,96 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from src.crawler.jina_client import JinaClient
+from src.utils.cancellation import CancelToken, RunCancelledError, set_cancel_token
+
+
+def make_response(chunks, encoding="utf-8"):
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = encoding
+    response.iter_content = MagicMock(return_value=iter(chunks))
+    response.close = MagicMock()
+    return response
+
+
+@pytest.fixture
+def cancel_token():
+    token = CancelToken()
+    set_cancel_token(token)
+    yield token
+    set_cancel_token(None)
+
+
+@patch("src.crawler.jina_client.requests.post")
+def test_crawl_reads_the_response_in_chunks(mock_post, cancel_token):
+    mock_post.return_value = make_response(["<html>".encode(), "页面</html>".encode()])
+
+    assert JinaClient().crawl("https://example.com") == "<html>页面</html>"
+    assert mock_post.call_args.kwargs["stream"] is True
+    assert mock_post.call_args.kwargs["timeout"]
+
+
+@patch("src.crawler.jina_client.requests.post")
+def test_crawl_without_a_run_sets_a_timeout(mock_post):
+    mock_post.return_value = make_response([])
+    mock_post.return_value._content = b"<html></html>"
+
+    assert JinaClient().crawl("https://example.com") == "<html></html>"
+    assert mock_post.call_args.kwargs["timeout"]
+
+
+@patch("src.crawler.jina_client.requests.post")
+def test_crawl_detects_the_encoding_when_none_is_sent(mock_post, cancel_token):
+    text = "<html><body>这是一个用于检测编码的中文页面，内容足够长以便正确识别。</body></html>"
+    mock_post.return_value = make_response([text.encode("gbk")], encoding=None)
+
+    assert JinaClient().crawl("https://example.com") == text
+
+
+@patch("src.crawler.jina_client.requests.post")
+def test_crawl_stops_when_the_run_is_cancelled(mock_post, cancel_token):
+    def chunks():
+        yield b"<html>"
+        cancel_token.cancel()
+        yield b"</html>"
+        pytest.fail("The response is read after the cancellation")
+
+    response = make_response(chunks())
+    mock_post.return_value = response
+
+    with pytest.raises(RunCancelledError):
+        JinaClient().crawl("https://example.com")
+    response.close.assert_called()
+
+
+@patch("src.crawler.jina_client.requests.post")
+def test_crawl_stops_waiting_for_the_server_when_the_run_is_cancelled(
+    mock_post, cancel_token
+):
+    sent = threading.Event()
+    answer = threading.Event()
+    closed = threading.Event()
+    response = make_response([b"<html></html>"])
+    response.close.side_effect = closed.set
+
+    def post(*args, **kwargs):
+        sent.set()
+        answer.wait(5)
+        return response
+
+    mock_post.side_effect = post
+    threading.Thread(target=lambda: sent.wait(5) and cancel_token.cancel()).start()
+
+    with pytest.raises(RunCancelledError):
+        JinaClient().crawl("https://example.com")
+    response.close.assert_not_called()
+
+    answer.set()
+    assert closed.wait(5)
@@ -6,7 +6,16 @@ from unittest.mock import MagicMock, patch
 import importlib
 import sys
 
+from langgraph.types import Send
+
 import src.graph.builder as builder_mod
+from src.prompts.planner_model import (
+    Plan,
+    Step as PlanStep,
+    StepType,
+    get_ready_step_indices,
+    get_step_dependencies,
+)
 
 
 @pytest.fixture
@@ -74,6 +83,70 @@ def test_continue_to_running_research_team_default_planner(mock_state):
     assert builder_mod.continue_to_running_research_team(state) == "planner"
 
 
+def _make_plan(*steps):
+    return Plan(
+        locale="en-US",
+        has_enough_context=False,
+        thought="thought",
+        title="title",
+        steps=list(steps),
+    )
+
+
+def _make_step(title, step_type=StepType.RESEARCH, depends_on=None, res=None):
+    return PlanStep(
+        need_search=step_type == StepType.RESEARCH,
+        title=title,
+        description=title,
+        step_type=step_type,
+        depends_on=depends_on,
+        execution_res=res,
+    )
+
+
+def test_continue_to_running_research_team_fans_out_independent_steps():
+    plan = _make_plan(
+        _make_step("A", depends_on=[]),
+        _make_step("B", depends_on=[]),
+        _make_step("C", StepType.PROCESSING, depends_on=[]),
+        _make_step("D", StepType.PROCESSING, depends_on=[0, 1]),
+    )
+    result = builder_mod.continue_to_running_research_team({"current_plan": plan})
+    assert all(isinstance(send, Send) for send in result)
+    assert [send.node for send in result] == ["researcher", "researcher", "coder"]
+    assert [send.arg["current_step_index"] for send in result] == [0, 1, 2]
+
+
+def test_continue_to_running_research_team_waits_for_dependencies():
+    plan = _make_plan(
+        _make_step("A", depends_on=[], res="done"),
+        _make_step("B", depends_on=[]),
+        _make_step("C", StepType.PROCESSING, depends_on=[0, 1]),
+    )
+    result = builder_mod.continue_to_running_research_team({"current_plan": plan})
+    assert result == "researcher"
+
+
+def test_continue_to_running_research_team_respects_parallel_cap():
+    plan = _make_plan(*(_make_step(str(i), depends_on=[]) for i in range(5)))
+    config = {"configurable": {"max_parallel_steps": 2}}
+    result = builder_mod.continue_to_running_research_team(
+        {"current_plan": plan}, config
+    )
+    assert [send.arg["current_step_index"] for send in result] == [0, 1]
+
+
+def test_get_ready_step_indices_defaults_to_sequential():
+    plan = _make_plan(_make_step("A"), _make_step("B"), _make_step("C"))
+    assert get_ready_step_indices(plan) == [0]
+    assert get_step_dependencies(plan, 2) == [0, 1]
+
+
+def test_get_step_dependencies_ignores_forward_references():
+    plan = _make_plan(_make_step("A", depends_on=[1, 5]), _make_step("B"))
+    assert get_step_dependencies(plan, 0) == []
+
+
 @patch("src.graph.builder.StateGraph")
 def test_build_base_graph_adds_nodes_and_edges(MockStateGraph):
     mock_builder = MagicMock()
@@ -87,13 +160,51 @@ def test_build_base_graph_adds_nodes_and_edges(MockStateGraph):
     mock_builder.add_conditional_edges.assert_called_once()
 
 
+def _make_sync_and_async_graph():
+    from typing import Literal, TypedDict
+
+    from langgraph.graph import END, START, StateGraph
+    from langgraph.types import Command
+
+    class DummyState(TypedDict):
+        ran: str
+
+    def node(state, config) -> Command[Literal["__end__"]]:
+        return Command(update={"ran": "sync"}, goto=END)
+
+    async def node_async(state, config) -> Command[Literal["__end__"]]:
+        return Command(update={"ran": "async"}, goto=END)
+
+    graph_builder = StateGraph(DummyState)
+    builder_mod._add_sync_and_async_node(graph_builder, "node", node, node_async)
+    graph_builder.add_edge(START, "node")
+    return graph_builder.compile()
+
+
+def test_add_sync_and_async_node_dispatches_on_invocation_style():
+    graph = _make_sync_and_async_graph()
+    assert graph.invoke({"ran": ""}) == {"ran": "sync"}
+
+
+@pytest.mark.asyncio
+async def test_add_sync_and_async_node_runs_async_version():
+    graph = _make_sync_and_async_graph()
+    assert await graph.ainvoke({"ran": ""}) == {"ran": "async"}
+    # Destinations are read from the Command return hint of the sync version
+    assert ("node", "__end__") in {
+        (edge.source, edge.target) for edge in graph.get_graph().edges
+    }
+
+
 @patch("src.graph.builder._build_base_graph")
-@patch("src.graph.builder.MemorySaver")
-def test_build_graph_with_memory_uses_memory(MockMemorySaver, mock_build_base_graph):
+@patch("src.graph.builder.build_checkpointer")
+def test_build_graph_with_memory_uses_memory(
+    mock_build_checkpointer, mock_build_base_graph
+):
     mock_builder = MagicMock()
     mock_build_base_graph.return_value = mock_builder
     mock_memory = MagicMock()
-    MockMemorySaver.return_value = mock_memory
+    mock_build_checkpointer.return_value = mock_memory
 
     builder_mod.build_graph_with_memory()
 
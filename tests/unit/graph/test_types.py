@@ -0,0 +1,18 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from src.graph.types import Reset, append_or_reset
+
+
+def test_append_or_reset_appends_updates():
+    assert append_or_reset(["a"], ["b", "c"]) == ["a", "b", "c"]
+    assert append_or_reset(None, ["a"]) == ["a"]
+
+
+def test_append_or_reset_keeps_the_list_for_an_empty_update():
+    assert append_or_reset(["a"], []) == ["a"]
+
+
+def test_append_or_reset_replaces_the_list_on_reset():
+    assert append_or_reset(["a"], Reset()) == []
+    assert append_or_reset(["a"], Reset(["b"])) == ["b"]
@@ -0,0 +1,178 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.llms.balancer import (
+    MAX_FAILURES,
+    AsyncBalancedTransport,
+    BalancedTransport,
+    Endpoint,
+    LoadBalancer,
+)
+
+
+def make_balancer(*hosts):
+    return LoadBalancer(
+        "basic", [Endpoint(base_url=f"http://{host}/v1") for host in hosts]
+    )
+
+
+def test_least_outstanding_endpoint_is_picked():
+    balancer = make_balancer("a", "b")
+    a, b = balancer.endpoints
+    assert balancer.pick() is a
+    assert balancer.pick() is b
+    balancer.done(a)
+    assert balancer.pick() is a
+    assert (a.outstanding, b.outstanding) == (1, 1)
+
+
+def test_faster_endpoint_gets_more_requests():
+    balancer = make_balancer("slow", "fast")
+    slow, fast = balancer.endpoints
+    balancer.record_success(slow, 2.0)
+    balancer.record_success(fast, 0.5)
+    assert [balancer.pick() for _ in range(3)] == [fast, fast, fast]
+    # The slow endpoint is idle while the fast one has 3 requests in flight
+    assert balancer.pick() is slow
+
+
+def test_latency_is_a_moving_average():
+    balancer = make_balancer("a")
+    endpoint = balancer.endpoints[0]
+    balancer.record_success(endpoint, 1.0)
+    balancer.record_success(endpoint, 2.0)
+    assert endpoint.latency == pytest.approx(1.3)
+
+
+def test_endpoint_is_ejected_after_failures(monkeypatch):
+    balancer = make_balancer("a", "b")
+    a, b = balancer.endpoints
+    balancer.record_success(a, 0.1)
+    balancer.record_success(b, 1.0)
+    for _ in range(MAX_FAILURES):
+        balancer.record_failure(a, "HTTP 503")
+    assert [balancer.pick() for _ in range(2)] == [b, b]
+    assert balancer.stats()[0]["ejected"] is True
+
+    # Back after the ejection, a success resets the backoff
+    now = time.monotonic()
+    monkeypatch.setattr("src.llms.balancer.time.monotonic", lambda: now + 31)
+    assert balancer.pick() is a
+    assert a.ejections == 1
+    balancer.record_success(a, 0.1)
+    assert a.ejections == 0
+
+
+def test_ejected_endpoints_are_used_when_all_are_down():
+    balancer = make_balancer("a", "b")
+    for endpoint in balancer.endpoints:
+        for _ in range(MAX_FAILURES):
+            balancer.record_failure(endpoint, "HTTP 500")
+    assert balancer.pick() is balancer.endpoints[0]
+
+
+def test_transport_rewrites_url_and_key():
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append((str(request.url), request.headers["authorization"]))
+        return httpx.Response(200, json={})
+
+    balancer = LoadBalancer(
+        "basic",
+        [
+            Endpoint(base_url="http://a/v1", api_key="key-a"),
+            Endpoint(base_url="http://b/api/v3"),
+        ],
+    )
+    client = httpx.Client(
+        transport=BalancedTransport(
+            balancer, "http://a/v1", httpx.MockTransport(handler)
+        ),
+        headers={"authorization": "Bearer default"},
+    )
+    client.post("http://a/v1/chat/completions")
+    client.post("http://a/v1/chat/completions")
+    assert seen == [
+        ("http://a/v1/chat/completions", "Bearer key-a"),
+        ("http://b/api/v3/chat/completions", "Bearer default"),
+    ]
+
+
+def test_connection_errors_are_retried_on_another_endpoint():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "down":
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200, json={})
+
+    balancer = make_balancer("down", "up")
+    client = httpx.Client(
+        transport=BalancedTransport(
+            balancer, "http://down/v1", httpx.MockTransport(handler)
+        )
+    )
+    for _ in range(MAX_FAILURES):
+        assert client.post("http://down/v1/chat/completions").status_code == 200
+    down, up = balancer.endpoints
+    assert down.ejected_until > time.monotonic()
+    assert (down.outstanding, up.outstanding) == (0, 0)
+
+
+def test_error_responses_count_as_failures():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503 if request.url.host == "a" else 200)
+
+    balancer = make_balancer("a", "b")
+    client = httpx.Client(
+        transport=BalancedTransport(
+            balancer, "http://a/v1", httpx.MockTransport(handler)
+        )
+    )
+    statuses = [client.post("http://a/v1/chat").status_code for _ in range(6)]
+    assert statuses.count(503) == MAX_FAILURES
+    assert balancer.endpoints[0].ejected_until > time.monotonic()
+
+
+def test_streamed_response_is_outstanding_until_closed():
+    balancer = make_balancer("a")
+    client = httpx.Client(
+        transport=BalancedTransport(
+            balancer,
+            "http://a/v1",
+            httpx.MockTransport(lambda request: httpx.Response(200, content=b"data")),
+        )
+    )
+    with client.stream("POST", "http://a/v1/chat/completions") as response:
+        assert balancer.endpoints[0].outstanding == 1
+        assert response.read() == b"data"
+    assert balancer.endpoints[0].outstanding == 0
+
+
+def test_async_transport_spreads_requests():
+    balancer = make_balancer("a", "b")
+    hosts = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        hosts.append(request.url.host)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={})
+
+    async def run():
+        async with httpx.AsyncClient(
+            transport=AsyncBalancedTransport(
+                balancer, "http://a/v1", httpx.MockTransport(handler)
+            )
+        ) as client:
+            await asyncio.gather(
+                *(client.post("http://a/v1/chat/completions") for _ in range(4))
+            )
+
+    asyncio.run(run())
+    assert sorted(hosts) == ["a", "a", "b", "b"]
+    assert [endpoint.outstanding for endpoint in balancer.endpoints] == [0, 0]
@@ -0,0 +1,174 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_openai import ChatOpenAI
+
+from src.llms.cache import (
+    CachedChatOpenAI,
+    LLMResponseCache,
+    normalize_messages,
+    replay_chunks,
+)
+
+
+@pytest.fixture
+def api_calls(monkeypatch):
+    """Replace the OpenAI API calls of ChatOpenAI, recording them."""
+    calls = []
+
+    def fake_generate(self, messages, stop=None, run_manager=None, **kwargs):
+        calls.append(messages)
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content="Hello there"))]
+        )
+
+    def fake_stream(self, messages, stop=None, run_manager=None, **kwargs):
+        calls.append(messages)
+        for piece in ["Hello", " there"]:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+
+    async def fake_astream(self, messages, stop=None, run_manager=None, **kwargs):
+        for chunk in fake_stream(self, messages, stop, run_manager, **kwargs):
+            yield chunk
+
+    monkeypatch.setattr(ChatOpenAI, "_generate", fake_generate)
+    monkeypatch.setattr(ChatOpenAI, "_stream", fake_stream)
+    monkeypatch.setattr(ChatOpenAI, "_astream", fake_astream)
+    return calls
+
+
+def make_llm(cache, **kwargs):
+    return CachedChatOpenAI(
+        response_cache=cache, model="gpt-4o", api_key="test_key", **kwargs
+    )
+
+
+def test_normalize_messages_ignores_ids_and_whitespace():
+    first = [
+        HumanMessage(content="  What is DeerFlow? ", id="1"),
+        AIMessage(
+            content="",
+            tool_calls=[{"name": "search", "args": {"q": "x"}, "id": "call_abc"}],
+        ),
+        ToolMessage(content="result", tool_call_id="call_abc"),
+    ]
+    second = [
+        HumanMessage(content="What is DeerFlow?", id="2"),
+        AIMessage(
+            content="",
+            tool_calls=[{"name": "search", "args": {"q": "x"}, "id": "call_xyz"}],
+        ),
+        ToolMessage(content="result", tool_call_id="call_xyz"),
+    ]
+    assert normalize_messages(first) == normalize_messages(second)
+    assert normalize_messages(first) != normalize_messages(
+        [HumanMessage(content="What is LangGraph?")]
+    )
+
+
+def test_replay_chunks_rebuild_the_message():
+    message = AIMessage(
+        content="Hello  there,\nworld ",
+        tool_calls=[{"name": "search", "args": {"q": "x"}, "id": "call_1"}],
+    )
+    chunks = list(replay_chunks(message))
+    assert [chunk.text for chunk in chunks] == ["Hello", "  there,", "\nworld", " "]
+    merged = chunks[0].message
+    for chunk in chunks[1:]:
+        merged += chunk.message
+    assert merged.content == message.content
+    assert merged.tool_calls == message.tool_calls
+    assert merged.response_metadata["cache_hit"] is True
+
+
+def test_cache_lru_eviction_and_stats():
+    cache = LLMResponseCache(max_entries=2)
+    for key in ["a", "b", "c"]:
+        cache.update(key, AIMessage(content=key))
+    assert cache.lookup("a") is None
+    assert cache.lookup("c").content == "c"
+    assert cache.stats() == {
+        "size": 2,
+        "hits": 1,
+        "memory_hits": 1,
+        "disk_hits": 0,
+        "misses": 1,
+        "hit_rate": 0.5,
+    }
+
+
+def test_cache_persists_to_disk_with_ttl(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache" / "llm.sqlite")
+    cache = LLMResponseCache(path=path, ttl=60)
+    cache.update("key", AIMessage(content="cached"))
+    cache.close()
+
+    reopened = LLMResponseCache(path=path, ttl=60)
+    assert reopened.lookup("key").content == "cached"
+    assert reopened.stats()["disk_hits"] == 1
+
+    now = time.time()
+    monkeypatch.setattr("src.llms.cache.time.time", lambda: now + 120)
+    expired = LLMResponseCache(path=path, ttl=60)
+    assert expired.lookup("key") is None
+
+
+def test_invoke_is_answered_from_cache(api_calls):
+    llm = make_llm(LLMResponseCache())
+    assert llm.invoke("hi").content == "Hello there"
+    assert llm.invoke(" hi ").content == "Hello there"
+    assert len(api_calls) == 1
+
+
+def test_cache_key_depends_on_model_params(api_calls):
+    cache = LLMResponseCache()
+    make_llm(cache, temperature=0).invoke("hi")
+    make_llm(cache, temperature=1).invoke("hi")
+    assert len(api_calls) == 2
+
+
+def test_stream_replays_cached_answer_as_chunks(api_calls):
+    llm = make_llm(LLMResponseCache())
+    assert [chunk.content for chunk in llm.stream("hi")] == ["Hello", " there"]
+    chunks = list(llm.stream("hi"))
+    assert len(api_calls) == 1
+    assert "".join(chunk.content for chunk in chunks) == "Hello there"
+    assert len(chunks) == 2
+
+
+def test_interrupted_stream_is_not_cached(api_calls):
+    cache = LLMResponseCache()
+    llm = make_llm(cache)
+    stream = llm.stream("hi")
+    next(stream)
+    stream.close()
+    llm.invoke("hi")
+    assert len(api_calls) == 2
+
+
+def test_astream_uses_cache_filled_by_invoke(api_calls):
+    llm = make_llm(LLMResponseCache())
+    llm.invoke([SystemMessage(content="Be brief"), HumanMessage(content="hi")])
+
+    async def collect():
+        return [
+            chunk.content
+            async for chunk in llm.astream(
+                [SystemMessage(content="Be brief"), HumanMessage(content="hi")]
+            )
+        ]
+
+    assert "".join(asyncio.run(collect())) == "Hello there"
+    assert len(api_calls) == 1
@@ -0,0 +1,249 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.llms.hedging import (
+    FIRST_TOKEN,
+    RESPONSE,
+    AsyncHedgedTransport,
+    HedgedTransport,
+    HedgingPolicy,
+    _deadline,
+    _request_kind,
+    llm_deadline,
+)
+from src.llms.scheduler import LLMScheduler, ScheduledTransport
+
+
+def make_policy(latency=0.01, samples=20, **kwargs):
+    kwargs.setdefault("min_delay", 0.0)
+    kwargs.setdefault("budget", 1.0)
+    policy = HedgingPolicy("basic", **kwargs)
+    for _ in range(samples):
+        policy.record(FIRST_TOKEN, latency, hedge=False)
+        policy.record(RESPONSE, latency, hedge=False)
+    return policy
+
+
+def test_threshold_is_a_percentile_of_the_latencies():
+    policy = HedgingPolicy("basic", percentile=90, min_delay=0.5, min_samples=10)
+    assert policy.start(RESPONSE) is None
+    for latency in range(1, 11):
+        policy.record(RESPONSE, latency, hedge=False)
+    assert policy.start(RESPONSE) == 9
+    assert policy.start(FIRST_TOKEN) is None
+    for _ in range(10):
+        policy.record(FIRST_TOKEN, 0.1, hedge=False)
+    assert policy.start(FIRST_TOKEN) == 0.5
+
+
+def test_hedges_are_bounded_by_the_budget():
+    policy = HedgingPolicy("basic", budget=0.25)
+    for _ in range(8):
+        policy.start(RESPONSE)
+    assert [policy.try_hedge() for _ in range(3)] == [True, True, False]
+    assert policy.stats()["hedged"] == 2
+    assert policy.stats()["budget_exhausted"] == 1
+
+
+def test_request_kind_is_read_from_the_stream_field():
+    def request(body):
+        return httpx.Request("POST", "http://llm/v1/chat/completions", content=body)
+
+    assert _request_kind(request(b'{"model": "m", "stream": true}')) == FIRST_TOKEN
+    assert _request_kind(request(b'{"stream":true,"model":"m"}')) == FIRST_TOKEN
+    assert _request_kind(request(b'{"stream": false}')) == RESPONSE
+    # Quoted in a message, the field is escaped
+    message = b'{"messages": [{"content": "\\"stream\\": true"}]}'
+    assert _request_kind(request(message)) == RESPONSE
+
+
+def test_llm_deadline_never_extends_the_enclosing_one():
+    assert _deadline.get() is None
+    with llm_deadline(10):
+        outer = _deadline.get()
+        with llm_deadline(60):
+            assert _deadline.get() == outer
+        with llm_deadline(None):
+            assert _deadline.get() == outer
+    assert _deadline.get() is None
+
+
+def stream_handler(delays):
+    """Answers the n-th request after `delays[n]` seconds."""
+    calls = []
+    lock = threading.Lock()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        with lock:
+            index = len(calls)
+            calls.append(request)
+        time.sleep(delays[index])
+        return httpx.Response(200, content=f"answer {index}".encode())
+
+    handler.calls = calls
+    return handler
+
+
+def test_slow_request_is_hedged_and_fastest_answer_wins():
+    handler = stream_handler([0.5, 0.01])
+    policy = make_policy()
+    client = httpx.Client(
+        transport=HedgedTransport(policy, httpx.MockTransport(handler))
+    )
+    started_at = time.monotonic()
+    response = client.post("http://llm/v1/chat/completions", json={"stream": True})
+    assert response.text == "answer 1"
+    assert time.monotonic() - started_at < 0.3
+    assert len(handler.calls) == 2
+    assert policy.stats()["hedge_wins"] == 1
+
+
+def test_fast_request_is_not_hedged():
+    handler = stream_handler([0.0])
+    policy = make_policy(latency=0.2)
+    client = httpx.Client(
+        transport=HedgedTransport(policy, httpx.MockTransport(handler))
+    )
+    assert client.post("http://llm/v1/chat/completions").text == "answer 0"
+    assert len(handler.calls) == 1
+    assert policy.stats()["hedged"] == 0
+
+
+def test_requests_fail_after_the_run_deadline():
+    handler = stream_handler([0.5])
+    policy = HedgingPolicy("basic")
+    client = httpx.Client(
+        transport=HedgedTransport(policy, httpx.MockTransport(handler))
+    )
+    with llm_deadline(0.05):
+        with pytest.raises(httpx.ReadTimeout):
+            client.post("http://llm/v1/chat/completions")
+        with pytest.raises(httpx.ReadTimeout):
+            client.post("http://llm/v1/chat/completions")
+    assert len(handler.calls) == 1
+    assert policy.stats()["deadline_exceeded"] == 2
+
+
+def test_stream_reads_fail_after_the_run_deadline():
+    def handler(request: httpx.Request) -> httpx.Response:
+        def chunks():
+            yield b"data: first"
+            time.sleep(0.2)
+            yield b"data: late"
+
+        return httpx.Response(200, content=chunks())
+
+    policy = HedgingPolicy("basic")
+    client = httpx.Client(
+        transport=HedgedTransport(policy, httpx.MockTransport(handler))
+    )
+    with llm_deadline(0.1):
+        with client.stream("POST", "http://llm/v1/chat/completions") as response:
+            with pytest.raises(httpx.ReadTimeout):
+                response.read()
+    assert policy.stats()["deadline_exceeded"] == 1
+
+
+def test_async_stream_reads_fail_after_the_run_deadline():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        async def chunks():
+            yield b"data: first"
+            await asyncio.sleep(1)
+            yield b"data: late"
+
+        return httpx.Response(200, content=chunks())
+
+    policy = HedgingPolicy("basic")
+
+    async def run():
+        async with httpx.AsyncClient(
+            transport=AsyncHedgedTransport(policy, httpx.MockTransport(handler))
+        ) as client:
+            with llm_deadline(0.1):
+                async with client.stream(
+                    "POST", "http://llm/v1/chat/completions"
+                ) as response:
+                    await response.aread()
+
+    started_at = time.monotonic()
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(run())
+    assert time.monotonic() - started_at < 0.5
+    assert policy.stats()["deadline_exceeded"] == 1
+
+
+def test_hedges_are_charged_to_the_scheduler():
+    def send(max_concurrent_requests):
+        handler = stream_handler([0.3, 0.01])
+        policy = make_policy()
+        scheduler = LLMScheduler(
+            "basic", max_concurrent_requests=max_concurrent_requests
+        )
+        transport = HedgedTransport(policy, httpx.MockTransport(handler), scheduler)
+        client = httpx.Client(transport=ScheduledTransport(scheduler, transport))
+        response = client.post("http://llm/v1/chat/completions")
+        return response, handler, policy, scheduler
+
+    # The request holds the only slot, its hedge is not sent
+    response, handler, policy, scheduler = send(1)
+    assert response.text == "answer 0"
+    assert len(handler.calls) == 1
+    assert policy.stats()["rate_limited"] == 1
+    assert policy.stats()["hedged"] == 0
+
+    response, handler, policy, scheduler = send(2)
+    assert response.text == "answer 1"
+    assert len(handler.calls) == 2
+    # The hedge released its slot once read, the slow copy once discarded
+    assert scheduler.in_flight == 0
+
+
+def test_async_hedge_cancels_the_slow_request():
+    cancelled = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if not cancelled:
+            cancelled.append(False)
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled[0] = True
+                raise
+        return httpx.Response(200, content=b"hedge")
+
+    policy = make_policy()
+
+    async def run():
+        async with httpx.AsyncClient(
+            transport=AsyncHedgedTransport(policy, httpx.MockTransport(handler))
+        ) as client:
+            async with client.stream(
+                "POST", "http://llm/v1/chat/completions", json={"stream": True}
+            ) as response:
+                return await response.aread()
+
+    assert asyncio.run(run()) == b"hedge"
+    assert cancelled == [True]
+    assert policy.stats()["hedge_wins"] == 1
+
+
+def test_async_errors_of_both_copies_are_raised():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.05)
+        raise httpx.ConnectError("refused", request=request)
+
+    async def run():
+        async with httpx.AsyncClient(
+            transport=AsyncHedgedTransport(make_policy(), httpx.MockTransport(handler))
+        ) as client:
+            await client.post("http://llm/v1/chat/completions")
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(run())
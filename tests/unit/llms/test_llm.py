@@ -68,3 +68,75 @@ def test_get_llm_by_type_caches(monkeypatch, dummy_conf):
     inst2 = llm.get_llm_by_type("basic")
     assert inst1 is inst2
     assert called["called"]
+
+
+def test_create_llm_use_conf_strips_token_limit(dummy_conf):
+    dummy_conf["BASIC_MODEL"]["token_limit"] = 128000
+    result = llm._create_llm_use_conf("basic", dummy_conf)
+    assert "token_limit" not in result.kwargs
+
+
+def test_get_llm_token_limit(monkeypatch, dummy_conf):
+    dummy_conf["BASIC_MODEL"]["token_limit"] = 128000
+    monkeypatch.setattr(llm, "load_yaml_config", lambda path: dummy_conf)
+    assert llm.get_llm_token_limit("basic") == 128000
+    assert llm.get_llm_token_limit("reasoning") == llm.DEFAULT_TOKEN_LIMIT
+    assert llm.get_llm_token_limit("unknown") == llm.DEFAULT_TOKEN_LIMIT
+
+    monkeypatch.setenv("REASONING_MODEL__TOKEN_LIMIT", "64000")
+    assert llm.get_llm_token_limit("reasoning") == 64000
+
+
+def test_create_llm_use_conf_with_response_cache(monkeypatch, dummy_conf):
+    monkeypatch.setattr(llm, "_llm_response_cache", None)
+    assert isinstance(llm._create_llm_use_conf("basic", dummy_conf), DummyChatOpenAI)
+
+    dummy_conf["LLM_CACHE"] = {"enabled": True, "max_entries": 8}
+    dummy_conf["BASIC_MODEL"]["model"] = "gpt-4o"
+    result = llm._create_llm_use_conf("basic", dummy_conf)
+    assert isinstance(result, llm.CachedChatOpenAI)
+    assert llm.get_llm_response_cache().max_entries == 8
+
+
+def test_create_llm_use_conf_with_scheduler(monkeypatch, dummy_conf):
+    monkeypatch.setattr(llm, "_llm_response_cache", None)
+    monkeypatch.setattr("src.llms.scheduler._llm_schedulers", {})
+    dummy_conf["BASIC_MODEL"]["scheduler"] = {
+        "max_concurrent_requests": 4,
+        "requests_per_minute": 600,
+    }
+    result = llm._create_llm_use_conf("basic", dummy_conf)
+    assert "scheduler" not in result.kwargs
+    assert isinstance(result.kwargs["http_client"]._transport, llm.ScheduledTransport)
+    assert result.kwargs["http_async_client"]._transport.scheduler.rate == 10
+
+
+def test_create_llm_use_conf_with_endpoints(monkeypatch, dummy_conf):
+    monkeypatch.setattr(llm, "_llm_response_cache", None)
+    monkeypatch.setattr("src.llms.balancer._llm_balancers", {})
+    monkeypatch.setattr("src.llms.scheduler._llm_schedulers", {})
+    dummy_conf["REASONING_MODEL"]["endpoints"] = [
+        {"base_url": "http://replica-1/v1", "api_key": "key-1"},
+        {"base_url": "http://replica-2/v1"},
+    ]
+    dummy_conf["REASONING_MODEL"]["scheduler"] = {"max_concurrent_requests": 4}
+    result = llm._create_llm_use_conf("reasoning", dummy_conf)
+    assert "endpoints" not in result.kwargs
+    assert result.kwargs["base_url"] == "http://replica-1/v1"
+    assert result.kwargs["api_key"] == "reason_key"
+    transport = result.kwargs["http_client"]._transport
+    assert isinstance(transport, llm.ScheduledTransport)
+    assert isinstance(transport._transport, llm.BalancedTransport)
+    assert len(transport._transport.balancer.endpoints) == 2
+
+
+def test_create_llm_use_conf_with_hedging(monkeypatch, dummy_conf):
+    monkeypatch.setattr(llm, "_llm_response_cache", None)
+    monkeypatch.setattr("src.llms.hedging._llm_hedging_policies", {})
+    dummy_conf["BASIC_MODEL"]["hedging"] = {"percentile": 99, "budget": 0.05}
+    result = llm._create_llm_use_conf("basic", dummy_conf)
+    assert "hedging" not in result.kwargs
+    transport = result.kwargs["http_async_client"]._transport
+    assert isinstance(transport, llm.AsyncHedgedTransport)
+    assert transport.policy.percentile == 99
+    assert transport.policy.budget == 0.05
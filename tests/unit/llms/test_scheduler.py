@@ -0,0 +1,144 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from src.llms.scheduler import (
+    AsyncScheduledTransport,
+    LLMScheduler,
+    Priority,
+    ScheduledTransport,
+    llm_priority,
+)
+
+
+def test_concurrency_is_capped_across_threads():
+    scheduler = LLMScheduler("basic", max_concurrent_requests=2)
+    peak = 0
+    lock = threading.Lock()
+
+    def call():
+        nonlocal peak
+        scheduler.acquire()
+        with lock:
+            peak = max(peak, scheduler.in_flight)
+        time.sleep(0.02)
+        scheduler.release()
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == 2
+    assert scheduler.in_flight == 0
+    assert scheduler.stats()["wait_seconds"]["interactive"]["count"] == 8
+
+
+def test_interactive_requests_go_first():
+    scheduler = LLMScheduler("basic", max_concurrent_requests=1)
+    scheduler.acquire()
+    order = []
+
+    def call(priority, name):
+        with llm_priority(priority):
+            scheduler.acquire()
+        order.append(name)
+        scheduler.release()
+
+    background = threading.Thread(target=call, args=(Priority.BACKGROUND, "podcast"))
+    background.start()
+    while scheduler.stats()["queued"]["background"] == 0:
+        time.sleep(0.001)
+    interactive = threading.Thread(target=call, args=(Priority.INTERACTIVE, "chat"))
+    interactive.start()
+    while scheduler.stats()["queued"]["interactive"] == 0:
+        time.sleep(0.001)
+
+    scheduler.release()
+    background.join()
+    interactive.join()
+    assert order == ["chat", "podcast"]
+
+
+def test_token_bucket_limits_request_rate():
+    scheduler = LLMScheduler("basic", requests_per_minute=1200, burst=2)
+    started_at = time.monotonic()
+    for _ in range(4):
+        scheduler.acquire()
+        scheduler.release()
+    # Two requests from the burst, then one every 50ms
+    assert time.monotonic() - started_at >= 0.09
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    scheduler = LLMScheduler("basic", max_concurrent_requests=1)
+
+    async def run():
+        await scheduler.aacquire()
+        waiting = asyncio.create_task(scheduler.aacquire())
+        await asyncio.sleep(0.01)
+        assert scheduler.stats()["queued"]["interactive"] == 1
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert scheduler.stats()["queued"]["interactive"] == 0
+        scheduler.release()
+        await asyncio.wait_for(scheduler.aacquire(), 1)
+
+    asyncio.run(run())
+    assert scheduler.in_flight == 1
+
+
+def test_try_acquire_never_waits():
+    scheduler = LLMScheduler("basic", max_concurrent_requests=1)
+    assert scheduler.try_acquire()
+    assert not scheduler.try_acquire()
+    scheduler.release()
+    assert scheduler.try_acquire()
+    scheduler.release()
+    assert scheduler.in_flight == 0
+
+    limited = LLMScheduler("basic", requests_per_minute=60, burst=1)
+    assert limited.try_acquire()
+    limited.release()
+    assert not limited.try_acquire()
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, content=b"data: token\n\n")
+
+
+def test_transport_holds_slot_until_response_is_closed():
+    scheduler = LLMScheduler("basic", max_concurrent_requests=1)
+    client = httpx.Client(
+        transport=ScheduledTransport(scheduler, httpx.MockTransport(handler))
+    )
+    with client.stream("POST", "http://llm/v1/chat/completions") as response:
+        assert scheduler.in_flight == 1
+        assert response.read() == b"data: token\n\n"
+    assert scheduler.in_flight == 0
+    assert client.post("http://llm/v1/chat/completions").status_code == 200
+    assert scheduler.in_flight == 0
+
+
+def test_async_transport_releases_slot():
+    scheduler = LLMScheduler("basic", max_concurrent_requests=1)
+
+    async def run():
+        async with httpx.AsyncClient(
+            transport=AsyncScheduledTransport(scheduler, httpx.MockTransport(handler))
+        ) as client:
+            responses = await asyncio.gather(
+                *(client.post("http://llm/v1/chat/completions") for _ in range(3))
+            )
+        return [response.status_code for response in responses]
+
+    assert asyncio.run(run()) == [200, 200, 200]
+    assert scheduler.in_flight == 0
+    assert scheduler.stats()["wait_seconds"]["interactive"]["count"] == 3
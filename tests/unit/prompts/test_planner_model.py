@@ -0,0 +1,69 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import json
+from unittest.mock import patch
+
+import pytest
+from pydantic import ValidationError
+
+from src.prompts import planner_model
+from src.prompts.planner_model import Plan, parse_plan
+
+PLAN = {
+    "locale": "en-US",
+    "has_enough_context": False,
+    "thought": "Test Thought",
+    "title": "Test Plan",
+    "steps": [
+        {
+            "need_search": True,
+            "title": "Step 1",
+            "description": "Collect data",
+            "step_type": "research",
+        }
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_parsed_plans():
+    planner_model._parsed_plans.clear()
+    yield
+    planner_model._parsed_plans.clear()
+
+
+def test_parse_plan_returns_a_plan():
+    plan = parse_plan("```json\n" + json.dumps(PLAN) + "\n```")
+    assert isinstance(plan, Plan)
+    assert plan.steps[0].title == "Step 1"
+
+
+def test_parse_plan_parses_the_same_content_once():
+    content = json.dumps(PLAN)
+    with patch(
+        "src.prompts.planner_model.parse_json_output",
+        wraps=planner_model.parse_json_output,
+    ) as mock_parse:
+        first = parse_plan(content)
+        first.steps[0].execution_res = "result"
+        second = parse_plan(content)
+    mock_parse.assert_called_once()
+    # Each call gets its own plan, updating one does not change the others
+    assert second is not first
+    assert second.steps[0].execution_res is None
+
+
+def test_parse_plan_evicts_the_least_recently_used_plans():
+    with patch("src.prompts.planner_model.PLAN_CACHE_SIZE", 2):
+        for title in ("A", "B", "C"):
+            parse_plan(json.dumps({**PLAN, "title": title}))
+    assert len(planner_model._parsed_plans) == 2
+
+
+def test_parse_plan_raises_on_invalid_plans():
+    with pytest.raises(json.JSONDecodeError):
+        parse_plan("not a plan")
+    with pytest.raises(ValidationError):
+        parse_plan('{"title": "Missing fields"}')
+    assert not planner_model._parsed_plans
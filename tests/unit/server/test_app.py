@@ -1,22 +1,47 @@
 # Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
 # SPDX-License-Identifier: MIT
 
+import asyncio
 import base64
 import json
 import os
+import threading
+import time
 from unittest.mock import AsyncMock, MagicMock, patch, mock_open
 from uuid import uuid4
 from fastapi.responses import JSONResponse, StreamingResponse
 import pytest
 from fastapi.testclient import TestClient
 from fastapi import HTTPException, logger
-from src.server.app import app, _make_event, _astream_workflow_generator
+from src.server.app import (
+    app,
+    _astream_workflow_generator,
+    _get_workflow,
+    _with_llm_deadline,
+    cancel_run,
+    download_job_artifact,
+    get_job,
+    get_run,
+    run_manager,
+    start_run,
+    stream_run,
+    submit_podcast_job,
+    submit_ppt_job,
+)
 from src.server.mcp_request import MCPServerMetadataRequest
 from src.server.rag_request import RAGResourceRequest
+from src.checkpointer import BoundedMemorySaver
+from src.server.jobs import JobManager
+from src.server.runs import RunManager
+from src.server.sse import SSEEventEncoder
+from src.server.warmup import WarmupStatus
+from src.llms.hedging import _deadline
+from src.llms.scheduler import Priority, _priority
 from src.config.report_style import ReportStyle
 from langgraph.types import Command
 from langchain_core.messages import ToolMessage
 from langchain_core.messages import AIMessageChunk
+from src.utils.cancellation import CancellationCallbackHandler
 
 from src.server.chat_request import (
     ChatRequest,
@@ -33,27 +58,33 @@ def client():
     return TestClient(app)
 
 
-class TestMakeEvent:
-    def test_make_event_with_content(self):
+class TestSSEEventEncoder:
+    @pytest.fixture
+    def encoder(self, monkeypatch):
+        # The exact output of the standard library encoder is checked
+        monkeypatch.setenv("SSE_JSON_ENCODER", "json")
+        return SSEEventEncoder()
+
+    def test_encode_event_with_content(self, encoder):
         event_type = "message_chunk"
         data = {"content": "Hello", "role": "assistant"}
-        result = _make_event(event_type, data)
+        result = encoder.encode(event_type, data)
         expected = (
             'event: message_chunk\ndata: {"content": "Hello", "role": "assistant"}\n\n'
         )
         assert result == expected
 
-    def test_make_event_with_empty_content(self):
+    def test_encode_event_with_empty_content(self, encoder):
         event_type = "message_chunk"
         data = {"content": "", "role": "assistant"}
-        result = _make_event(event_type, data)
+        result = encoder.encode(event_type, data)
         expected = 'event: message_chunk\ndata: {"role": "assistant"}\n\n'
         assert result == expected
 
-    def test_make_event_without_content(self):
+    def test_encode_event_without_content(self, encoder):
         event_type = "tool_calls"
         data = {"role": "assistant", "tool_calls": []}
-        result = _make_event(event_type, data)
+        result = encoder.encode(event_type, data)
         expected = (
             'event: tool_calls\ndata: {"role": "assistant", "tool_calls": []}\n\n'
         )
@@ -189,6 +220,54 @@ class TestPodcastEndpoint:
         assert response.json()["detail"] == "Internal Server Error"
 
 
+class TestJobsEndpoints:
+    @pytest.mark.asyncio
+    @patch("src.server.app.build_podcast_graph")
+    async def test_podcast_job(self, mock_build_graph, tmp_path):
+        def stream(input_, config=None, stream_mode=None):
+            yield ("updates", {"audio_mixer": {"output": b"fake_audio_data"}})
+            yield ("values", {"output": b"fake_audio_data"})
+
+        mock_build_graph.return_value.nodes = {"__start__": None, "audio_mixer": None}
+        mock_build_graph.return_value.stream = stream
+        manager = JobManager(artifact_dir=str(tmp_path))
+
+        with patch("src.server.app.job_manager", manager):
+            job = await submit_podcast_job(GeneratePodcastRequest(content="text"))
+            assert job["kind"] == "podcast"
+            await manager.get(job["job_id"]).task
+            status = await get_job(job["job_id"])
+            response = await download_job_artifact(job["job_id"])
+
+        assert status["status"] == "succeeded"
+        assert status["progress"] == 1.0
+        assert status["artifact_url"] == f"/api/jobs/{job['job_id']}/artifact"
+        assert response.media_type == "audio/mp3"
+        assert open(response.path, "rb").read() == b"fake_audio_data"
+
+    @pytest.mark.asyncio
+    @patch("src.server.app.build_ppt_graph")
+    async def test_ppt_job_artifact_not_ready(self, mock_build_graph, tmp_path):
+        manager = JobManager(artifact_dir=str(tmp_path))
+        mock_build_graph.return_value.stream.side_effect = Exception("marp failed")
+
+        with patch("src.server.app.job_manager", manager):
+            job = await submit_ppt_job(GeneratePPTRequest(content="text"))
+            await manager.get(job["job_id"]).task
+            with pytest.raises(HTTPException) as exc_info:
+                await download_job_artifact(job["job_id"])
+            status = await get_job(job["job_id"])
+
+        assert exc_info.value.status_code == 409
+        assert status["status"] == "failed"
+
+    def test_unknown_job(self, client):
+        assert client.get("/api/jobs/unknown").status_code == 404
+        assert client.get("/api/jobs/unknown/stream").status_code == 404
+        assert client.get("/api/jobs/unknown/artifact").status_code == 404
+        assert client.post("/api/jobs/unknown/cancel").status_code == 404
+
+
 class TestPPTEndpoint:
     @patch("src.server.app.build_ppt_graph")
     @patch("builtins.open", new_callable=mock_open, read_data=b"fake_ppt_data")
@@ -391,6 +470,146 @@ class TestChatStreamEndpoint:
         assert response.status_code == 200
         assert response.headers["content-type"] == "text/event-stream; charset=utf-8"
 
+    @patch("src.server.app.graph")
+    def test_chat_stream_replays_events_after_last_event_id(self, mock_graph, client):
+        async def mock_astream(*args, **kwargs):
+            for content in ("Hello", "world"):
+                chunk = AIMessageChunk(content=content, id=content)
+                yield ("reporter:1", "messages", (chunk, {}))
+
+        mock_graph.astream = mock_astream
+        request_data = {
+            "thread_id": "thread-resume",
+            "messages": [{"role": "user", "content": "Hello"}],
+        }
+
+        response = client.post("/api/chat/stream", json=request_data)
+        assert response.headers["X-Run-ID"]
+        assert response.text.startswith("id: 1\nevent: message_chunk\n")
+        assert "id: 2\n" in response.text
+
+        for resume in (
+            lambda: client.get(
+                "/api/chat/stream/thread-resume", headers={"Last-Event-ID": "1"}
+            ),
+            lambda: client.post(
+                "/api/chat/stream", json=request_data, headers={"Last-Event-ID": "1"}
+            ),
+        ):
+            response = resume()
+            assert response.status_code == 200
+            assert response.text.startswith("id: 2\n")
+            assert '"content": "world"' in response.text
+            assert "Hello" not in response.text
+
+    def test_chat_stream_resume_of_unknown_thread(self, client):
+        response = client.get(
+            "/api/chat/stream/unknown-thread", headers={"Last-Event-ID": "3"}
+        )
+        assert response.status_code == 404
+
+    def test_chat_stream_resume_of_the_default_thread(self, client):
+        request_data = {
+            "thread_id": "__default__",
+            "messages": [{"role": "user", "content": "Hello"}],
+        }
+        response = client.post(
+            "/api/chat/stream", json=request_data, headers={"Last-Event-ID": "3"}
+        )
+        assert response.status_code == 400
+        assert "thread_id" in response.json()["detail"]
+
+
+class TestRunsEndpoints:
+    @pytest.mark.asyncio
+    @patch("src.server.app.graph")
+    async def test_run_goes_on_without_client(self, mock_graph):
+        async def mock_astream(*args, **kwargs):
+            for content in ("Hello", "world"):
+                chunk = AIMessageChunk(content=content, id=content)
+                yield ("reporter:1", "messages", (chunk, {}))
+
+        mock_graph.astream = mock_astream
+        request = ChatRequest(
+            thread_id="thread-run", messages=[{"role": "user", "content": "Hi"}]
+        )
+
+        started = await start_run(request)
+        assert started["thread_id"] == "thread-run"
+        assert started["detached"] is True
+
+        await run_manager.get(started["run_id"]).task
+        status = await get_run(started["run_id"])
+        assert status["status"] == "succeeded"
+        assert status["events"] == 2
+
+        response = await stream_run(started["run_id"], last_event_id=1)
+        events = [event async for event in response.body_iterator]
+        assert len(events) == 1
+        assert events[0].startswith("id: 2\n")
+        assert '"content": "world"' in events[0]
+
+    @pytest.mark.asyncio
+    @patch("src.server.app.graph")
+    async def test_cancel_run(self, mock_graph):
+        callbacks = []
+
+        async def mock_astream(*args, **kwargs):
+            callbacks.extend(kwargs["config"]["callbacks"])
+            await asyncio.sleep(10)
+            yield
+
+        mock_graph.astream = mock_astream
+        request = ChatRequest(messages=[{"role": "user", "content": "Hi"}])
+
+        started = await start_run(request)
+        await asyncio.sleep(0)
+        await cancel_run(started["run_id"])
+        run = run_manager.get(started["run_id"])
+        await run.task
+        assert (await get_run(started["run_id"]))["status"] == "cancelled"
+        # The calls of the graph are stopped with the run, in worker threads too
+        (handler,) = [
+            c for c in callbacks if isinstance(c, CancellationCallbackHandler)
+        ]
+        assert handler.token is run.cancel_token
+        assert run.cancel_token.cancelled
+
+    @pytest.mark.asyncio
+    @patch("src.server.app.graph")
+    async def test_full_queue_answers_429(self, mock_graph):
+        async def mock_astream(*args, **kwargs):
+            await asyncio.sleep(10)
+            yield
+
+        mock_graph.astream = mock_astream
+        manager = RunManager(max_concurrent_runs=1, max_queued_runs=1)
+        manager._durations.append(30.0)
+        request = ChatRequest(messages=[{"role": "user", "content": "Hi"}])
+
+        with patch("src.server.app.run_manager", manager):
+            started = [await start_run(request), await start_run(request)]
+            with pytest.raises(HTTPException) as exc_info:
+                await start_run(request, x_client_id="client-1")
+            for run in started:
+                await cancel_run(run["run_id"])
+
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.headers == {"Retry-After": "30"}
+        assert [run["status"] for run in started] == ["pending", "pending"]
+
+    def test_list_runs(self, client):
+        response = client.get("/api/runs")
+        assert response.status_code == 200
+        data = response.json()
+        assert isinstance(data["runs"], list)
+        assert {"max_concurrent_runs", "pending", "running"} <= data.keys()
+
+    def test_unknown_run(self, client):
+        assert client.get("/api/runs/unknown").status_code == 404
+        assert client.get("/api/runs/unknown/stream").status_code == 404
+        assert client.post("/api/runs/unknown/cancel").status_code == 404
+
 
 class TestAstreamWorkflowGenerator:
     @pytest.mark.asyncio
@@ -672,6 +891,47 @@ class TestAstreamWorkflowGenerator:
         assert "finish_reason" in events[0]
         assert "stop" in events[0]
 
+    @pytest.mark.asyncio
+    @patch("src.server.app.graph")
+    async def test_astream_workflow_generator_merges_message_chunks(self, mock_graph):
+        chunks = [
+            AIMessageChunk(content=content, id="msg_1", response_metadata=metadata)
+            for content, metadata in (
+                ("Hello", {}),
+                (" world", {}),
+                ("!", {"finish_reason": "stop"}),
+            )
+        ]
+
+        async def mock_astream(*args, **kwargs):
+            for chunk in chunks:
+                yield ("reporter:1", "messages", (chunk, {}))
+
+        mock_graph.astream = mock_astream
+
+        events = [
+            event
+            async for event in _astream_workflow_generator(
+                messages=[],
+                thread_id="test_thread",
+                resources=[],
+                max_plan_iterations=3,
+                max_step_num=10,
+                max_search_results=5,
+                auto_accepted_plan=True,
+                interrupt_feedback="",
+                mcp_settings={},
+                enable_background_investigation=False,
+                report_style=ReportStyle.ACADEMIC,
+                enable_deep_thinking=False,
+            )
+        ]
+
+        assert len(events) == 1
+        data = json.loads(events[0].split("data: ", 1)[1])
+        assert data["content"] == "Hello world!"
+        assert data["finish_reason"] == "stop"
+
     @pytest.mark.asyncio
     @patch("src.server.app.graph")
     async def test_astream_workflow_generator_config_passed_correctly(self, mock_graph):
@@ -691,6 +951,55 @@ class TestAstreamWorkflowGenerator:
             assert config["report_style"] == ReportStyle.NEWS.value
             yield ("agent1", "messages", [mock_ai_message])
 
+    @pytest.mark.asyncio
+    @patch("src.server.app.graph")
+    async def test_astream_workflow_generator_custom_events(self, mock_graph):
+        step = {"title": "Step 1", "step_type": "research"}
+
+        async def mock_astream(*args, **kwargs):
+            assert "custom" in kwargs["stream_mode"]
+            assert kwargs["config"]["stream_plan_steps"] is True
+            yield (
+                (),
+                "custom",
+                {
+                    "event": "plan_step",
+                    "agent": "planner",
+                    "data": {"index": 0, "step": step},
+                },
+            )
+
+        mock_graph.astream = mock_astream
+
+        events = [
+            event
+            async for event in _astream_workflow_generator(
+                messages=[{"role": "user", "content": "Hello"}],
+                thread_id="test_thread",
+                resources=[],
+                max_plan_iterations=3,
+                max_step_num=10,
+                max_search_results=5,
+                auto_accepted_plan=True,
+                interrupt_feedback="",
+                mcp_settings={},
+                enable_background_investigation=False,
+                report_style=ReportStyle.ACADEMIC,
+                enable_deep_thinking=False,
+                stream_plan_steps=True,
+            )
+        ]
+
+        assert len(events) == 1
+        assert events[0].startswith("event: plan_step\n")
+        data = json.loads(events[0].split("data: ", 1)[1])
+        assert data == {
+            "thread_id": "test_thread",
+            "agent": "planner",
+            "index": 0,
+            "step": step,
+        }
+
 
 class TestGenerateProseEndpoint:
     @patch("src.server.app.build_prose_graph")
@@ -734,3 +1043,133 @@ class TestGenerateProseEndpoint:
         response = client.post("/api/prose/generate", json=request_data)
         assert response.status_code == 500
         assert response.json()["detail"] == "Internal Server Error"
+
+
+class TestReadyEndpoint:
+    def test_ready_before_warm_up(self, client):
+        with patch("src.server.app.warmup_status", WarmupStatus()):
+            response = client.get("/api/ready")
+        assert response.status_code == 503
+        assert response.json()["ready"] is False
+
+    def test_ready_after_warm_up(self, client):
+        status = WarmupStatus(ready=True, done=True, steps={"graph:chat": "ok"})
+        with patch("src.server.app.warmup_status", status):
+            response = client.get("/api/ready")
+        assert response.status_code == 200
+        assert response.json()["steps"] == {"graph:chat": "ok"}
+
+    @patch("src.server.app.build_podcast_graph")
+    def test_workflows_are_compiled_once(self, mock_build_graph, client):
+        mock_build_graph.return_value.invoke.return_value = {"output": b"audio"}
+        for _ in range(2):
+            client.post("/api/podcast/generate", json={"content": "content"})
+        mock_build_graph.assert_called_once()
+
+    def test_workflow_asked_from_threads_is_compiled_once(self):
+        build = MagicMock(side_effect=lambda: time.sleep(0.05) or object())
+        workflows = []
+        threads = [
+            threading.Thread(target=lambda: workflows.append(_get_workflow(build)))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        build.assert_called_once()
+        assert len({id(workflow) for workflow in workflows}) == 1
+
+
+class TestLLMCacheEndpoint:
+    @patch("src.server.app.get_llm_response_cache", return_value=None)
+    def test_llm_cache_disabled(self, mock_get_cache, client):
+        response = client.get("/api/llm/cache")
+        assert response.status_code == 200
+        assert response.json() == {"enabled": False}
+
+    @patch("src.server.app.get_llm_response_cache")
+    def test_llm_cache_stats(self, mock_get_cache, client):
+        mock_get_cache.return_value.stats.return_value = {"hits": 3, "misses": 1}
+        response = client.get("/api/llm/cache")
+        assert response.json() == {"enabled": True, "hits": 3, "misses": 1}
+
+
+class TestMetricsEndpoint:
+    @patch("src.server.metrics.get_llm_scheduler_stats")
+    def test_metrics(self, mock_scheduler_stats, client):
+        mock_scheduler_stats.return_value = {
+            "basic": {
+                "in_flight": 2,
+                "queued": {"interactive": 1, "background": 0},
+                "wait_seconds": {"interactive": {"count": 3, "sum": 1.5, "max": 1.0}},
+            }
+        }
+        response = client.get("/api/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE deerflow_llm_latency_seconds histogram" in response.text
+        assert 'deerflow_llm_scheduler_in_flight{llm_type="basic"} 2' in response.text
+        assert (
+            'deerflow_llm_scheduler_queued{llm_type="basic",priority="interactive"} 1'
+            in response.text
+        )
+
+    def test_metrics_report_checkpointer_evictions(self, client):
+        checkpointer = BoundedMemorySaver(eviction_interval=None)
+        checkpointer.evictions["ttl"] = 2
+        with patch("src.server.app.graph") as mock_graph:
+            mock_graph.checkpointer = checkpointer
+            response = client.get("/api/metrics")
+        assert "deerflow_checkpointer_threads 0" in response.text
+        assert 'deerflow_checkpointer_evictions_total{reason="ttl"} 2' in response.text
+        assert (
+            'deerflow_checkpointer_evictions_total{reason="capacity"} 0'
+            in response.text
+        )
+
+
+class TestLLMHedgingEndpoint:
+    @patch("src.server.app.get_llm_hedging_stats")
+    def test_llm_hedging_stats(self, mock_get_stats, client):
+        mock_get_stats.return_value = {"basic": {"hedged": 3}}
+        response = client.get("/api/llm/hedging")
+        assert response.json() == {"basic": {"hedged": 3}}
+
+    @pytest.mark.asyncio
+    async def test_graph_stream_runs_with_the_deadline(self):
+        async def events():
+            yield _deadline.get()
+
+        deadlines = [event async for event in _with_llm_deadline(30, events())]
+        assert deadlines[0] is not None
+        assert _deadline.get() is None
+
+
+class TestLLMEndpointsEndpoint:
+    @patch("src.server.app.get_llm_balancer_stats")
+    def test_llm_endpoint_stats(self, mock_get_stats, client):
+        mock_get_stats.return_value = {
+            "basic": [{"base_url": "http://a/v1", "outstanding": 1}]
+        }
+        response = client.get("/api/llm/endpoints")
+        assert response.json() == {
+            "basic": [{"base_url": "http://a/v1", "outstanding": 1}]
+        }
+
+
+class TestLLMSchedulerEndpoint:
+    @patch("src.server.app.get_llm_scheduler_stats")
+    def test_llm_scheduler_stats(self, mock_get_stats, client):
+        mock_get_stats.return_value = {"basic": {"in_flight": 2}}
+        response = client.get("/api/llm/scheduler")
+        assert response.json() == {"basic": {"in_flight": 2}}
+
+    @patch("src.server.app.build_podcast_graph")
+    def test_podcast_requests_have_background_priority(self, mock_build_graph, client):
+        priorities = []
+        mock_build_graph.return_value.invoke.side_effect = lambda input_: (
+            priorities.append(_priority.get()) or {"output": b"audio"}
+        )
+        client.post("/api/podcast/generate", json={"content": "content"})
+        assert priorities == [Priority.BACKGROUND]
@@ -0,0 +1,62 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+
+from src.server.event_log import EventLog
+
+
+def event(n):
+    return f"event: message_chunk\ndata: {n}\n\n"
+
+
+async def read(events, count=None):
+    received = []
+    async for item in events:
+        received.append(item)
+        if count is not None and len(received) == count:
+            break
+    return received
+
+
+def test_subscribers_get_the_events_after_their_last_id():
+    async def run():
+        log = EventLog()
+        for n in range(1, 4):
+            log.append(event(n))
+        subscriber = asyncio.create_task(read(log.subscribe(last_id=1)))
+        await asyncio.sleep(0)
+        log.append(event(4))
+        log.close()
+        return await subscriber
+
+    assert asyncio.run(run()) == [f"id: {n}\n{event(n)}" for n in range(2, 5)]
+
+
+def test_events_dropped_from_memory_are_reported_as_missed():
+    async def run():
+        log = EventLog(max_events=2)
+        for n in range(1, 6):
+            log.append(event(n))
+        log.close()
+        return await read(log.subscribe(last_id=1))
+
+    missed, *rest = asyncio.run(run())
+    assert missed.startswith("event: events_missed\n")
+    assert '"first_id": 2, "last_id": 3' in missed
+    assert rest == [f"id: {n}\n{event(n)}" for n in (4, 5)]
+
+
+def test_events_spilled_to_disk_are_replayed(tmp_path):
+    spill_path = tmp_path / "events.jsonl"
+
+    async def run():
+        log = EventLog(max_events=2, spill_path=spill_path)
+        for n in range(1, 6):
+            log.append(event(n))
+        received = await read(log.subscribe(last_id=1), count=4)
+        log.discard()
+        return received
+
+    assert asyncio.run(run()) == [f"id: {n}\n{event(n)}" for n in range(2, 6)]
+    assert not spill_path.exists()
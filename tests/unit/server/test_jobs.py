@@ -0,0 +1,153 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import json
+import threading
+
+from src.llms.scheduler import Priority, _priority, llm_priority
+from src.server.jobs import JobManager, JobStatus
+
+
+class FakeWorkflow:
+    """A workflow of two nodes, the second one waiting for `proceed`."""
+
+    nodes = {"__start__": None, "writer": None, "mixer": None}
+
+    def __init__(self):
+        self.proceed = threading.Event()
+        self.threads = []
+        self.priorities = []
+
+    def stream(self, input_, config=None, stream_mode=None):
+        self.threads.append(threading.current_thread())
+        self.priorities.append(_priority.get())
+        yield ("updates", {"writer": {"script": input_["input"]}})
+        self.proceed.wait(5)
+        yield ("updates", {"mixer": {"output": b"audio"}})
+        yield ("values", {"input": input_["input"], "output": b"audio"})
+
+
+def save_output(state, directory):
+    path = directory / "output.mp3"
+    path.write_bytes(state["output"])
+    return path
+
+
+def progress_events(job):
+    return [
+        json.loads(event.split("data: ", 1)[1])
+        for _, event in job.events.events_after(0)
+    ]
+
+
+def test_job_runs_on_a_worker_thread_and_saves_its_file(tmp_path):
+    workflow = FakeWorkflow()
+
+    async def run():
+        manager = JobManager(artifact_dir=str(tmp_path))
+        with llm_priority(Priority.BACKGROUND):
+            job = manager.submit(
+                "podcast", workflow, {"input": "text"}, save_output, "audio/mp3"
+            )
+        workflow.proceed.set()
+        await job.task
+        return job
+
+    job = asyncio.run(run())
+    assert job.status == JobStatus.SUCCEEDED
+    assert job.artifact_path.read_bytes() == b"audio"
+    assert workflow.threads[0] is not threading.main_thread()
+    assert workflow.priorities == [Priority.BACKGROUND]
+    events = progress_events(job)
+    assert [(e["status"], e["stage"], e["progress"]) for e in events] == [
+        ("pending", None, 0.0),
+        ("running", None, 0.0),
+        ("running", "writer", 0.5),
+        ("running", "mixer", 1.0),
+        ("succeeded", "mixer", 1.0),
+    ]
+    assert events[-1]["artifact_url"] == f"/api/jobs/{job.id}/artifact"
+
+
+def test_jobs_wait_for_a_free_worker_and_can_be_cancelled(tmp_path):
+    first_workflow, second_workflow = FakeWorkflow(), FakeWorkflow()
+
+    async def run():
+        manager = JobManager(max_workers=1, artifact_dir=str(tmp_path))
+        first = manager.submit(
+            "podcast", first_workflow, {"input": "a"}, save_output, "audio/mp3"
+        )
+        second = manager.submit(
+            "podcast", second_workflow, {"input": "b"}, save_output, "audio/mp3"
+        )
+        await asyncio.sleep(0.05)
+        statuses = (first.status, second.status)
+        manager.cancel(first.id)
+        first_workflow.proceed.set()
+        second_workflow.proceed.set()
+        await asyncio.gather(first.task, second.task)
+        return statuses, first, second
+
+    statuses, first, second = asyncio.run(run())
+    assert statuses == (JobStatus.RUNNING, JobStatus.PENDING)
+    # The first job stops at its next step, without saving its file
+    assert first.status == JobStatus.CANCELLED
+    assert first.artifact_path is None
+    assert second.status == JobStatus.SUCCEEDED
+
+
+def test_failed_job_reports_its_error_and_files_are_removed(tmp_path):
+    def failing_save(state, directory):
+        raise ValueError("no output")
+
+    async def run():
+        manager = JobManager(artifact_dir=str(tmp_path), retention=0.05)
+        workflow = FakeWorkflow()
+        workflow.proceed.set()
+        failed = manager.submit(
+            "ppt", workflow, {"input": "a"}, failing_save, "application/pdf"
+        )
+        workflow = FakeWorkflow()
+        workflow.proceed.set()
+        succeeded = manager.submit(
+            "ppt", workflow, {"input": "b"}, save_output, "audio/mp3"
+        )
+        await asyncio.gather(failed.task, succeeded.task)
+        path = succeeded.artifact_path
+        exists = path.exists()
+        await asyncio.sleep(0.1)
+        return failed, manager.get(succeeded.id), exists, path.exists()
+
+    failed, removed, existed, exists = asyncio.run(run())
+    assert failed.status == JobStatus.FAILED
+    assert failed.error == "no output"
+    assert removed is None
+    assert existed and not exists
+
+
+def test_pending_job_is_cancelled_at_once(tmp_path):
+    first_workflow, second_workflow = FakeWorkflow(), FakeWorkflow()
+
+    async def run():
+        manager = JobManager(max_workers=1, artifact_dir=str(tmp_path))
+        first = manager.submit(
+            "podcast", first_workflow, {"input": "a"}, save_output, "audio/mp3"
+        )
+        second = manager.submit(
+            "podcast", second_workflow, {"input": "b"}, save_output, "audio/mp3"
+        )
+        await asyncio.sleep(0.05)
+        manager.cancel(second.id)
+        # Reported before any worker is free
+        status, closed = second.status, second.events.closed
+        first_workflow.proceed.set()
+        await asyncio.gather(first.task, second.task)
+        return status, closed, first, second
+
+    status, closed, first, second = asyncio.run(run())
+    assert status == JobStatus.CANCELLED
+    assert closed
+    assert second_workflow.threads == []
+    assert first.status == JobStatus.SUCCEEDED
+    assert [e["status"] for e in progress_events(second)] == ["pending", "cancelled"]
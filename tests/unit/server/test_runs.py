@@ -0,0 +1,232 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+
+import pytest
+
+from src.server.runs import RunManager, RunQueueFullError, RunStatus
+from src.utils.cancellation import get_cancel_token
+
+
+def event(n):
+    return f"event: message_chunk\ndata: {n}\n\n"
+
+
+async def read(events, count=None):
+    received = []
+    async for item in events:
+        received.append(item)
+        if count is not None and len(received) == count:
+            break
+    return received
+
+
+async def slow_events(count=3, delay=0.01):
+    for n in range(1, count + 1):
+        await asyncio.sleep(delay)
+        yield event(n)
+
+
+def test_run_goes_on_while_the_client_reconnects():
+    async def run():
+        manager = RunManager(detach_timeout=1)
+        started = manager.start("thread-1", slow_events(4), resumable=True)
+        # The client disconnects after the first event
+        first = await read(started.events.subscribe(), count=1)
+        await asyncio.sleep(0.05)
+        rest = await read(manager.latest("thread-1").events.subscribe(last_id=1))
+        return first, rest, started.status
+
+    first, rest, status = asyncio.run(run())
+    assert first == [f"id: 1\n{event(1)}"]
+    assert rest == [f"id: {n}\n{event(n)}" for n in range(2, 5)]
+    assert status == RunStatus.SUCCEEDED
+
+
+def test_resumable_run_without_clients_is_cancelled_then_removed():
+    async def run():
+        manager = RunManager(detach_timeout=0.05, retention=0.05)
+        started = manager.start("thread-1", slow_events(100), resumable=True)
+        await read(started.events.subscribe(), count=1)
+        await asyncio.sleep(0.08)
+        status = started.status
+        await asyncio.sleep(0.08)
+        return status, manager.get(started.id), manager.latest("thread-1")
+
+    assert asyncio.run(run()) == (RunStatus.CANCELLED, None, None)
+
+
+def test_run_is_cancelled_as_soon_as_its_client_leaves():
+    async def run():
+        manager = RunManager(detach_timeout=60)
+        started = manager.start("thread-1", slow_events(100))
+        await read(started.events.subscribe(), count=1)
+        await started.task
+        return started.status, started.cancel_token.cancelled
+
+    assert asyncio.run(run()) == (RunStatus.CANCELLED, True)
+
+
+def test_detached_run_goes_on_without_clients():
+    async def run():
+        manager = RunManager(detach_timeout=0.01)
+        started = manager.start("thread-1", slow_events(5), detached=True)
+        await read(started.events.subscribe(), count=1)
+        await started.task
+        return started.status, started.events.last_id
+
+    assert asyncio.run(run()) == (RunStatus.SUCCEEDED, 5)
+
+
+def test_runs_over_the_limit_wait_their_turn():
+    async def run():
+        manager = RunManager(max_concurrent_runs=1)
+        first = manager.start("thread-1", slow_events(), detached=True)
+        second = manager.start("thread-2", slow_events(), detached=True)
+        await asyncio.sleep(0)
+        statuses = (first.status, second.status)
+        stats = manager.stats()
+        await asyncio.gather(first.task, second.task)
+        return statuses, stats, second.started_at >= first.finished_at
+
+    statuses, stats, in_turn = asyncio.run(run())
+    assert statuses == (RunStatus.RUNNING, RunStatus.PENDING)
+    assert stats["running"] == 1 and stats["pending"] == 1
+    assert in_turn
+
+
+def test_cancel_and_failure_are_reported():
+    async def failing():
+        yield event(1)
+        raise ValueError("boom")
+
+    async def run():
+        manager = RunManager()
+        failed = manager.start("thread-1", failing(), detached=True)
+        cancelled = manager.start("thread-2", slow_events(100), detached=True)
+        await read(cancelled.events.subscribe(), count=1)
+        assert manager.cancel(cancelled.id) is cancelled
+        await asyncio.gather(failed.task, cancelled.task)
+        subscriber = await read(cancelled.events.subscribe())
+        return failed.to_dict(), cancelled.status, subscriber, manager.cancel("x")
+
+    failed, status, subscriber, unknown = asyncio.run(run())
+    assert failed["status"] == "failed"
+    assert failed["error"] == "boom"
+    assert failed["events"] == 1
+    assert status == RunStatus.CANCELLED
+    # Clients of a cancelled run get the events sent before it stopped
+    assert len(subscriber) >= 1
+    assert unknown is None
+
+
+def test_cancelling_a_run_cancels_its_token():
+    tokens = []
+
+    async def events():
+        # The sync calls of the run get the token from their context
+        tokens.append(get_cancel_token())
+        yield event(1)
+        await asyncio.sleep(10)
+
+    async def run():
+        manager = RunManager()
+        started = manager.start("thread-1", events(), detached=True)
+        await read(started.events.subscribe(), count=1)
+        manager.cancel(started.id)
+        await started.task
+        return started.cancel_token
+
+    token = asyncio.run(run())
+    assert tokens == [token]
+    assert token.cancelled
+
+
+def test_run_fails_at_its_deadline():
+    async def events():
+        yield event(1)
+        await asyncio.sleep(10)
+
+    async def run():
+        manager = RunManager(max_concurrent_runs=1)
+        first = manager.start("thread-1", slow_events(5, delay=0.02), detached=True)
+        # Its deadline starts once the first run has left the queue
+        late = manager.start("thread-2", events(), detached=True, deadline_seconds=0.05)
+        await asyncio.wait_for(asyncio.gather(first.task, late.task), 2)
+        return first, late
+
+    first, late = asyncio.run(run())
+    assert first.status == RunStatus.SUCCEEDED
+    assert late.status == RunStatus.FAILED
+    assert late.error == "The run exceeded its deadline of 0.05 seconds"
+    assert late.events.events_after(0)
+    assert late.cancel_token.cancelled
+
+
+def test_queued_runs_are_told_their_position():
+    async def run():
+        manager = RunManager(max_concurrent_runs=1)
+        manager._durations.append(10.0)
+        first = manager.start("thread-1", slow_events(2), detached=True)
+        second = manager.start("thread-2", slow_events(2), detached=True)
+        third = manager.start("thread-3", slow_events(2), detached=True)
+        await asyncio.gather(first.task, second.task, third.task)
+        return [await read(run.events.subscribe()) for run in (second, third)]
+
+    second, third = asyncio.run(run())
+    assert second[0] == (
+        "id: 1\nevent: queued\ndata: "
+        '{"thread_id": "thread-2", "position": 1, "estimated_wait": 10.0}\n\n'
+    )
+    assert '"position": 2' in third[0]
+    # Moved up once the first run ended, then executed
+    assert '"position": 1' in third[1]
+    assert third[2:] == [f"id: {n + 2}\n{event(n)}" for n in (1, 2)]
+
+
+def test_full_queue_refuses_new_runs():
+    async def run():
+        manager = RunManager(
+            max_concurrent_runs=1, max_queued_runs=2, max_queued_runs_per_client=1
+        )
+        started = [manager.start("thread-1", slow_events(100), detached=True)]
+        started.append(manager.start("thread-2", slow_events(), client_id="a"))
+        with pytest.raises(RunQueueFullError):
+            manager.start("thread-3", slow_events(), client_id="a")
+        started.append(manager.start("thread-4", slow_events(), client_id="b"))
+        with pytest.raises(RunQueueFullError):
+            manager.start("thread-5", slow_events())
+        # Cancelling a waiting run, even before it began, frees its place
+        manager.cancel(started[1].id)
+        started.append(manager.start("thread-5", slow_events()))
+        stats = manager.stats()
+        for queued in started:
+            manager.cancel(queued.id)
+        await asyncio.gather(
+            *(queued.task for queued in started), return_exceptions=True
+        )
+        return stats, started[1].status, manager.stats()
+
+    stats, cancelled_status, final_stats = asyncio.run(run())
+    assert stats["pending"] == 2
+    assert cancelled_status == RunStatus.CANCELLED
+    assert final_stats["pending"] == final_stats["running"] == 0
+
+
+def test_clients_with_fewer_runs_executing_go_first():
+    async def run():
+        manager = RunManager(max_concurrent_runs=2)
+        first = manager.start("thread-1", slow_events(5), client_id="a")
+        second = manager.start("thread-2", slow_events(2), client_id="a")
+        waiting = [
+            manager.start("thread-3", slow_events(), client_id="a"),
+            manager.start("thread-4", slow_events(), client_id="b"),
+        ]
+        await second.task
+        # The place of the second run goes to the client executing nothing
+        statuses = [queued.status for queued in waiting]
+        await asyncio.gather(first.task, *(queued.task for queued in waiting))
+        return statuses
+
+    assert asyncio.run(run()) == [RunStatus.PENDING, RunStatus.RUNNING]
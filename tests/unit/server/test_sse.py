@@ -0,0 +1,83 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import json
+
+import pytest
+
+from src.server import sse
+from src.server.sse import SSEEventEncoder, get_json_dumps
+
+
+def json_event(event_type, data):
+    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def chunk(content, id="run-1", **fields):
+    return {
+        "thread_id": "thread-1",
+        "agent": "reporter",
+        "id": id,
+        "role": "assistant",
+        "content": content,
+        **fields,
+    }
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        chunk("Hello"),
+        chunk('Quotes " and \\ and\nnew lines, 中文'),
+        chunk("Done", reasoning_content="Thinking", finish_reason="stop"),
+        {k: v for k, v in chunk("").items() if k != "content"},
+    ],
+)
+def test_message_chunks_match_the_standard_encoder(data):
+    encoder = SSEEventEncoder(dumps=lambda _: pytest.fail("envelope not used"))
+    assert encoder.encode("message_chunk", dict(data)) == json_event(
+        "message_chunk", data
+    )
+
+
+def test_envelope_is_encoded_once_per_message(monkeypatch):
+    encoded = []
+    encode_basestring = sse.encode_basestring
+    monkeypatch.setattr(
+        sse, "encode_basestring", lambda s: encoded.append(s) or encode_basestring(s)
+    )
+    encoder = SSEEventEncoder()
+    for content in ("a", "b", "c"):
+        encoder.encode("message_chunk", chunk(content))
+    encoder.encode("message_chunk", chunk("d", id="run-2"))
+    assert encoded.count("thread-1") == 2
+    assert encoded.count("a") == encoded.count("d") == 1
+
+
+def test_other_events_use_the_json_backend():
+    encoder = SSEEventEncoder(dumps=lambda data: "<json>")
+    tool_calls = {**chunk(""), "tool_calls": []}
+    assert (
+        encoder.encode("tool_calls", tool_calls)
+        == "event: tool_calls\ndata: <json>\n\n"
+    )
+    # Chunks that do not fit the envelope, e.g. with list content
+    assert (
+        encoder.encode("message_chunk", chunk([{"type": "text"}]))
+        == "event: message_chunk\ndata: <json>\n\n"
+    )
+
+
+def test_json_backend_is_selected_by_environment(monkeypatch):
+    monkeypatch.setenv("SSE_JSON_ENCODER", "json")
+    assert get_json_dumps() is sse._json_dumps
+    monkeypatch.setenv("SSE_JSON_ENCODER", "orjson")
+    monkeypatch.setattr(sse, "_load_orjson", lambda: None)
+    assert get_json_dumps() is sse._json_dumps
+
+
+def test_orjson_backend_falls_back_on_unsupported_values():
+    pytest.importorskip("orjson")
+    dumps = sse._load_orjson()
+    assert json.loads(dumps({"text": "中文", "n": 1})) == {"text": "中文", "n": 1}
+    assert dumps({"n": 2**70}) == json.dumps({"n": 2**70})
@@ -0,0 +1,131 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import time
+
+import pytest
+
+from src.server.streaming import (
+    DEFAULT_COALESCE_WINDOW,
+    coalesce_message_chunks,
+    get_coalesce_window,
+)
+
+
+def chunk(content, id="run-1", agent="reporter", **kwargs):
+    return "message_chunk", {"agent": agent, "id": id, "content": content, **kwargs}
+
+
+async def produce(events, delay=0.0):
+    for event in events:
+        if delay:
+            await asyncio.sleep(delay)
+        yield event
+
+
+async def collect(events, **kwargs):
+    return [event async for event in coalesce_message_chunks(events, **kwargs)]
+
+
+def test_chunks_of_a_message_are_merged():
+    events = [
+        chunk("Hello"),
+        chunk(" world", reasoning_content="thinking"),
+        chunk("!", finish_reason="stop"),
+        chunk("Next"),
+        chunk("Other", id="run-2"),
+    ]
+    result = asyncio.run(collect(produce(events)))
+    assert result == [
+        chunk("Hello world!", reasoning_content="thinking", finish_reason="stop"),
+        chunk("Next"),
+        chunk("Other", id="run-2"),
+    ]
+
+
+def test_other_events_are_sent_right_away_and_in_order():
+    events = [
+        chunk("Hello"),
+        ("tool_calls", {"agent": "reporter", "id": "run-1"}),
+        chunk("Hi"),
+        chunk(" there"),
+    ]
+    result = asyncio.run(collect(produce(events), window=10))
+    assert result == [
+        chunk("Hello"),
+        ("tool_calls", {"agent": "reporter", "id": "run-1"}),
+        chunk("Hi there"),
+    ]
+
+
+def test_chunks_are_sent_after_the_window_or_size_limit():
+    async def stalled():
+        yield chunk("Hello")
+        yield chunk(" world")
+        await asyncio.sleep(0.5)
+        yield chunk("Late")
+
+    async def run():
+        started_at = time.monotonic()
+        events = coalesce_message_chunks(stalled(), window=0.05)
+        first = await anext(events)
+        elapsed = time.monotonic() - started_at
+        return first, elapsed, [event async for event in events]
+
+    first, elapsed, rest = asyncio.run(run())
+    assert first == chunk("Hello world")
+    assert elapsed < 0.3
+    assert rest == [chunk("Late")]
+
+    events = [chunk("abc"), chunk("def"), chunk("gh")]
+    result = asyncio.run(collect(produce(events), window=10, max_bytes=5))
+    assert result == [chunk("abcdef"), chunk("gh")]
+
+
+def test_reading_pauses_while_the_client_is_slow():
+    produced = []
+
+    async def events():
+        for index in range(10):
+            produced.append(index)
+            yield "tool_calls", {"index": index}
+
+    async def run():
+        stream = coalesce_message_chunks(events(), max_buffered=3)
+        first = await anext(stream)
+        # The client is not reading, the stream stops once 3 events are waiting
+        await asyncio.sleep(0.05)
+        paused_at = len(produced)
+        rest = [event async for event in stream]
+        return first, paused_at, rest
+
+    first, paused_at, rest = asyncio.run(run())
+    assert first == ("tool_calls", {"index": 0})
+    assert paused_at <= 5
+    assert [data["index"] for _, data in rest] == list(range(1, 10))
+
+
+def test_errors_are_raised_after_the_pending_events():
+    async def failing():
+        yield chunk("Hello")
+        raise ValueError("boom")
+
+    async def run():
+        received = []
+        with pytest.raises(ValueError):
+            async for event in coalesce_message_chunks(failing(), window=10):
+                received.append(event)
+        return received
+
+    assert asyncio.run(run()) == [chunk("Hello")]
+
+
+def test_zero_window_disables_merging(monkeypatch):
+    events = [chunk("a"), chunk("b")]
+    assert asyncio.run(collect(produce(events), window=0)) == events
+
+    monkeypatch.setenv("SSE_COALESCE_WINDOW_MS", "0")
+    assert get_coalesce_window() == 0
+    monkeypatch.setenv("SSE_COALESCE_WINDOW_MS", "fast")
+    assert get_coalesce_window() == DEFAULT_COALESCE_WINDOW
@@ -0,0 +1,71 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.prompts.template import PrefixStability
+from src.server.warmup import WarmupStatus, _load_prompt_templates, warm_up
+
+
+@pytest.fixture
+def mock_llm():
+    llm = MagicMock()
+    llm.root_async_client.models.list = AsyncMock(side_effect=Exception("404"))
+    with (
+        patch(
+            "src.server.warmup.get_configured_llm_models",
+            return_value={"basic": ["model"]},
+        ),
+        patch("src.server.warmup.get_llm_by_type", return_value=llm) as mock,
+    ):
+        yield mock
+
+
+@pytest.mark.asyncio
+async def test_warm_up_success(mock_llm):
+    status = WarmupStatus()
+    build_graph = MagicMock(return_value="graph")
+
+    with patch(
+        "src.server.warmup.preload_prompt_templates", return_value=3
+    ) as mock_preload:
+        await warm_up({"chat": build_graph}, status)
+
+    build_graph.assert_called_once()
+    mock_preload.assert_called_once()
+    mock_llm.assert_called_once_with("basic")
+    # Failing to list models does not prevent readiness
+    mock_llm.return_value.root_async_client.models.list.assert_awaited_once()
+    assert status.ready and status.done
+    assert status.steps == {
+        "graph:chat": "ok",
+        "prompt_templates": "ok",
+        "llm:basic": "ok",
+    }
+
+
+@pytest.mark.asyncio
+async def test_warm_up_failure_is_not_ready(mock_llm):
+    status = WarmupStatus()
+    build_graph = MagicMock(side_effect=ValueError("bad graph"))
+
+    await warm_up({"chat": build_graph, "other": MagicMock()}, status)
+
+    assert status.done
+    assert not status.ready
+    assert status.steps["graph:chat"] == "error: bad graph"
+    assert status.steps["graph:other"] == "ok"
+    assert status.to_dict()["ready"] is False
+
+
+def test_load_prompt_templates_reports_unstable_prefixes(monkeypatch, caplog):
+    monkeypatch.setenv("PROMPT_LAYOUT", "stable")
+    unstable = PrefixStability("planner", False, 40, 9000)
+    with (
+        patch("src.server.warmup.preload_prompt_templates", return_value=1),
+        patch("src.server.warmup.check_all_prefix_stability", return_value=[unstable]),
+    ):
+        assert _load_prompt_templates() == 1
+    assert "planner changes between calls after 40 of 9000" in caplog.text
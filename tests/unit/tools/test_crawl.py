@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import Mock, patch
 from src.tools.crawl import crawl_tool
+from src.utils.cancellation import RunCancelledError
 
 
 class TestCrawlTool:
@@ -108,3 +109,10 @@ class TestCrawlTool:
         assert "Failed to crawl" in result
         assert "Markdown conversion error" in result
         mock_logger.error.assert_called_once()
+
+    @patch("src.tools.crawl.Crawler")
+    def test_crawl_tool_cancelled(self, mock_crawler_class):
+        mock_crawler_class.return_value.crawl.side_effect = RunCancelledError()
+
+        with pytest.raises(RunCancelledError):
+            crawl_tool("https://example.com")
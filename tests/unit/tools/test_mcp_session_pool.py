@@ -0,0 +1,182 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import sys
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.tools.mcp_session_pool import MCPSessionPool, get_server_config_key
+from src.utils.cancellation import CancelToken, get_cancel_token, set_cancel_token
+
+SERVER_SCRIPT = '''
+import os
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("pid")
+
+
+@mcp.tool()
+def get_pid() -> str:
+    """Return the process ID of the server."""
+    return str(os.getpid())
+
+
+if __name__ == "__main__":
+    mcp.run()
+'''
+
+
+@pytest.fixture
+def server_config(tmp_path):
+    script = tmp_path / "server.py"
+    script.write_text(SERVER_SCRIPT)
+    return {"transport": "stdio", "command": sys.executable, "args": [str(script)]}
+
+
+async def _get_pid(pool, servers):
+    async with pool.acquire(servers) as tools:
+        assert [tool.name for tool in tools] == ["get_pid"] * len(servers)
+        return [await tool.ainvoke({}) for tool in tools]
+
+
+def test_get_server_config_key():
+    key = get_server_config_key({"command": "uvx", "args": ["a"]})
+    assert key == get_server_config_key({"args": ["a"], "command": "uvx"})
+    assert key != get_server_config_key({"command": "uvx", "args": ["b"]})
+
+
+@pytest.mark.asyncio
+async def test_acquire_reuses_session_and_tool_listing(server_config):
+    pool = MCPSessionPool()
+    try:
+        async with pool.acquire({"a": server_config}) as first_tools:
+            pass
+        async with pool.acquire({"b": server_config}) as second_tools:
+            pass
+        assert first_tools == second_tools
+        assert await _get_pid(pool, {"a": server_config}) == await _get_pid(
+            pool, {"a": server_config}
+        )
+        assert pool.stats["misses"] == 1
+        assert pool.stats["hits"] == 3
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pooled_sessions_do_not_keep_the_context_of_the_first_caller(
+    server_config,
+):
+    pool = MCPSessionPool()
+    set_cancel_token(CancelToken())
+    try:
+        async with pool.acquire({"a": server_config}):
+            pass
+        (session,) = pool._sessions.values()
+        assert session._task.get_context().run(get_cancel_token) is None
+        assert pool._reaper.get_context().run(get_cancel_token) is None
+    finally:
+        set_cancel_token(None)
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_sessions_are_evicted(server_config):
+    pool = MCPSessionPool(idle_timeout=0)
+    try:
+        pid = await _get_pid(pool, {"a": server_config})
+        assert await pool.evict_idle() == 1
+        assert await _get_pid(pool, {"a": server_config}) != pid
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_leased_sessions_are_not_evicted(server_config):
+    pool = MCPSessionPool(idle_timeout=0)
+    try:
+        async with pool.acquire({"a": server_config}):
+            assert await pool.evict_idle() == 0
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_session_is_replaced(server_config):
+    pool = MCPSessionPool(health_check_interval=0)
+    try:
+        pid = await _get_pid(pool, {"a": server_config})
+        with patch(
+            "src.tools.mcp_session_pool._PooledSession.ping",
+            AsyncMock(return_value=False),
+        ):
+            assert await _get_pid(pool, {"a": server_config}) != pid
+        assert pool.stats["evictions"] == 1
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_full_pool_opens_dedicated_session(server_config):
+    other_config = {**server_config, "env": {"OTHER": "1"}}
+    pool = MCPSessionPool(max_sessions=1)
+    try:
+        async with pool.acquire({"a": server_config}):
+            pids = await _get_pid(pool, {"a": server_config, "b": other_config})
+        assert pids[0] != pids[1]
+        assert pool.stats["overflows"] == 1
+
+        # Once idle, the least recently used session makes room for a new one
+        await _get_pid(pool, {"b": other_config})
+        assert pool.stats["evictions"] == 1
+        assert pool.stats["overflows"] == 1
+    finally:
+        await pool.close()
+
+
+SLOW_SERVER_SCRIPT = '''
+import asyncio
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("slow")
+
+
+@mcp.tool()
+async def wait() -> str:
+    """Wait for a long time."""
+    await asyncio.sleep(30)
+    return "done"
+
+
+if __name__ == "__main__":
+    mcp.run()
+'''
+
+
+@pytest.mark.asyncio
+async def test_cancelled_calls_close_their_session(tmp_path, server_config):
+    script = tmp_path / "slow_server.py"
+    script.write_text(SLOW_SERVER_SCRIPT)
+    slow_config = {**server_config, "args": [str(script)]}
+    pool = MCPSessionPool()
+
+    async def call():
+        async with pool.acquire({"slow": slow_config}) as tools:
+            await tools[0].ainvoke({})
+
+    try:
+        task = asyncio.create_task(call())
+        for _ in range(200):
+            await asyncio.sleep(0.05)
+            sessions = list(pool._sessions.values())
+            if sessions and sessions[0].pending_requests:
+                break
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert pool.stats["evictions"] == 1
+        assert not pool._sessions
+    finally:
+        await pool.close()
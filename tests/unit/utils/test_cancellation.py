@@ -0,0 +1,97 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import time
+from uuid import uuid4
+
+import pytest
+from langchain_core.runnables.config import run_in_executor
+
+from src.utils.cancellation import (
+    CancelToken,
+    CancellationCallbackHandler,
+    RunCancelledError,
+    get_cancel_token,
+    raise_if_cancelled,
+    set_cancel_token,
+    upstream_seconds_avoided,
+)
+from src.utils.metrics import llm_latency
+
+
+def test_cancel_calls_the_callbacks_once():
+    token = CancelToken()
+    calls = []
+    token.add_callback(lambda: calls.append("first"))
+    removed = lambda: calls.append("removed")  # noqa: E731
+    token.add_callback(removed)
+    token.remove_callback(removed)
+
+    token.cancel()
+    token.cancel()
+    # Added after the cancellation, called at once
+    token.add_callback(lambda: calls.append("late"))
+
+    assert token.cancelled
+    assert calls == ["first", "late"]
+    with pytest.raises(RunCancelledError):
+        token.raise_if_cancelled()
+
+
+def test_child_token_is_cancelled_with_its_parent_or_alone():
+    parent = CancelToken()
+    first, second = parent.child(), parent.child()
+
+    first.cancel()
+    assert first.cancelled and not parent.cancelled
+    # A cancelled child no longer waits for its parent
+    assert parent._callbacks == [second.cancel]
+
+    parent.cancel()
+    assert second.cancelled
+
+
+def test_worker_threads_see_the_token_of_their_run():
+    def sync_tool():
+        # A blocking call checking the cancellation between its chunks of work
+        for _ in range(200):
+            raise_if_cancelled()
+            time.sleep(0.01)
+        return "done"
+
+    async def run():
+        token = CancelToken()
+        set_cancel_token(token)
+        # As the sync tools are executed by LangChain
+        future = asyncio.ensure_future(run_in_executor(None, sync_tool))
+        await asyncio.sleep(0.05)
+        token.cancel()
+        with pytest.raises(RunCancelledError):
+            await future
+
+    asyncio.run(run())
+    assert get_cancel_token() is None
+
+
+def test_handler_stops_calls_and_records_avoided_seconds():
+    token = CancelToken()
+    handler = CancellationCallbackHandler(token)
+    labels = {"node": "reporter", "model": "cancellation-test"}
+    llm_latency.observe(30.0, **labels)
+    before = upstream_seconds_avoided.value(kind="llm")
+
+    handler.on_chat_model_start(
+        {},
+        [],
+        run_id=uuid4(),
+        metadata={"langgraph_node": "reporter", "ls_model_name": "cancellation-test"},
+    )
+    token.cancel()
+
+    avoided = upstream_seconds_avoided.value(kind="llm") - before
+    assert 29.0 < avoided <= 30.0
+    with pytest.raises(RunCancelledError):
+        handler.on_llm_new_token("token", run_id=uuid4())
+    with pytest.raises(RunCancelledError):
+        handler.on_tool_start({"name": "crawl_tool"}, "", run_id=uuid4())
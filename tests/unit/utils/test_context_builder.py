@@ -0,0 +1,76 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from src.utils.context_builder import ContextBuilder, count_tokens, summarize_text
+
+FINDING = """# Market Overview
+
+The market grew by 12% last year. Most of the growth came from Asia. Analysts expect the trend to continue.
+
+## Competitors
+
+There are three major competitors in the space. Each of them holds a large share of the market.
+
+## References
+
+- [Market Report](https://example.com/report)
+"""
+
+
+def test_count_tokens():
+    assert count_tokens("") == 0
+    assert count_tokens("abcd" * 10) == 10
+    assert count_tokens("深度研究") == 4
+
+
+def test_summarize_text_returns_short_text_unchanged():
+    assert summarize_text("short text", 100) == "short text"
+
+
+def test_summarize_text_keeps_headings_references_and_first_sentences():
+    summary = summarize_text(FINDING, 60)
+    assert count_tokens(summary) <= 60
+    assert summary.splitlines() == [
+        "# Market Overview",
+        "The market grew by 12% last year.",
+        "## Competitors",
+        "There are three major competitors in the space.",
+        "## References",
+        "- [Market Report](https://example.com/report)",
+    ]
+
+
+def test_summarize_text_prefers_headings_when_budget_is_small():
+    summary = summarize_text(FINDING, 20)
+    assert "# Market Overview" in summary
+    assert "grew" not in summary
+
+
+def test_context_builder_keeps_everything_within_budget():
+    builder = ContextBuilder(1000, summary_tokens=20)
+    assert builder.fit([FINDING, FINDING]) == [FINDING, FINDING]
+    assert builder.tokens_saved == 0
+
+
+def test_context_builder_summarizes_oldest_first():
+    full = count_tokens(FINDING)
+    builder = ContextBuilder(full + 60, summary_tokens=60)
+    fitted = builder.fit([FINDING, FINDING])
+    assert fitted[0] == summarize_text(FINDING, 60)
+    assert fitted[1] == FINDING
+    assert builder.tokens_saved == full - count_tokens(fitted[0])
+
+
+def test_context_builder_drops_oldest_when_summaries_do_not_fit():
+    builder = ContextBuilder(50, summary_tokens=40)
+    fitted = builder.fit([FINDING, FINDING, FINDING])
+    assert fitted[:2] == [None, None]
+    assert fitted[2] == summarize_text(FINDING, 40)
+    assert builder.tokens_saved == 3 * count_tokens(FINDING) - count_tokens(fitted[2])
+
+
+def test_context_builder_accumulates_tokens_saved():
+    builder = ContextBuilder(0)
+    assert builder.fit([FINDING]) == [None]
+    assert builder.fit(["more"]) == [None]
+    assert builder.tokens_saved == count_tokens(FINDING) + count_tokens("more")
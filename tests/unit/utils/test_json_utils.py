@@ -4,7 +4,11 @@
 import pytest
 import json
 from unittest.mock import patch
-from src.utils.json_utils import repair_json_output
+from src.utils.json_utils import (
+    IncrementalJSONParser,
+    parse_json_output,
+    repair_json_output,
+)
 
 
 class TestRepairJsonOutput:
@@ -108,3 +112,64 @@ class TestRepairJsonOutput:
         # Should attempt to process as JSON since it contains ```json
         assert isinstance(result, str)
         assert result == '{"key": "value"}'
+
+
+class TestParseJsonOutput:
+
+    def test_valid_json_is_not_repaired(self):
+        with patch("src.utils.json_utils.json_repair.loads") as mock_repair:
+            assert parse_json_output(' {"key": "value"}\n') == {"key": "value"}
+        mock_repair.assert_not_called()
+
+    def test_code_block_is_stripped(self):
+        with patch("src.utils.json_utils.json_repair.loads") as mock_repair:
+            assert parse_json_output('```json\n{"key": "value"}\n```') == {
+                "key": "value"
+            }
+        mock_repair.assert_not_called()
+
+    def test_malformed_json_is_repaired(self):
+        assert parse_json_output('{"key": "value", "list": [1, 2,') == {
+            "key": "value",
+            "list": [1, 2],
+        }
+
+    def test_non_json_content_raises(self):
+        with pytest.raises(json.JSONDecodeError):
+            parse_json_output("This is just text")
+
+
+class TestIncrementalJSONParser:
+
+    def feed_in_chunks(self, parser, text, size=7):
+        items = []
+        for start in range(0, len(text), size):
+            items.append(parser.feed(text[start : start + size]))
+        return items
+
+    def test_items_are_returned_once_complete(self):
+        """Each step is returned by the chunk that completes it"""
+        plan = {
+            "title": "Plan",
+            "steps": [{"title": "a {b}", "note": 'say "}"'}, {"title": "c"}],
+            "locale": "en-US",
+        }
+        parser = IncrementalJSONParser("steps")
+        items = self.feed_in_chunks(parser, "```json\n" + json.dumps(plan) + "\n```")
+        completed = [item for chunk in items for item in chunk]
+        assert completed == plan["steps"]
+        # The first step is returned before the end of the text
+        assert items.index([plan["steps"][0]]) < len(items) - 2
+        assert parser.fields == {"title": "Plan", "locale": "en-US"}
+
+    def test_fields_are_available_before_the_items(self):
+        parser = IncrementalJSONParser("steps")
+        parser.feed('{"has_enough_context": false, "steps": [{"title"')
+        assert parser.fields == {"has_enough_context": False}
+        assert parser.feed(': "a"}, ') == [{"title": "a"}]
+
+    def test_nested_arrays_are_not_items(self):
+        parser = IncrementalJSONParser("steps")
+        items = parser.feed('{"other": [{"a": 1}], "steps": [{"b": [{"c": 2}]}]}')
+        assert items == [{"b": [{"c": 2}]}]
+        assert parser.fields == {"other": [{"a": 1}]}
@@ -0,0 +1,116 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from src.utils.metrics import (
+    MetricsCallbackHandler,
+    MetricsRegistry,
+    llm_requests,
+    llm_time_to_first_token,
+    llm_tokens,
+    render_samples,
+    tool_calls,
+    tool_latency,
+)
+
+
+def test_counter_and_histogram_render_prometheus_text():
+    registry = MetricsRegistry()
+    counter = registry.counter("calls_total", "Calls.", ("node",))
+    histogram = registry.histogram(
+        "latency_seconds", "Latency.", ("node",), buckets=(1.0, 5.0)
+    )
+    counter.inc(node='say "hi"')
+    counter.inc(2, node='say "hi"')
+    histogram.observe(0.5, node="planner")
+    histogram.observe(3.0, node="planner")
+    histogram.observe(10.0, node="planner")
+    assert registry.render().splitlines() == [
+        "# HELP calls_total Calls.",
+        "# TYPE calls_total counter",
+        'calls_total{node="say \\"hi\\""} 3',
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{node="planner",le="1.0"} 1',
+        'latency_seconds_bucket{node="planner",le="5.0"} 2',
+        'latency_seconds_bucket{node="planner",le="+Inf"} 3',
+        'latency_seconds_sum{node="planner"} 13.5',
+        'latency_seconds_count{node="planner"} 3',
+    ]
+
+
+def test_render_samples():
+    assert render_samples("queued", "Queued.", [({"llm_type": "basic"}, 2)]) == [
+        "# HELP queued Queued.",
+        "# TYPE queued gauge",
+        'queued{llm_type="basic"} 2',
+    ]
+
+
+def test_callback_records_llm_calls_by_node_and_model():
+    handler = MetricsCallbackHandler()
+    run_id = uuid4()
+    metadata = {
+        "langgraph_node": "agent",
+        "langgraph_checkpoint_ns": "researcher:1234|agent:5678",
+        "ls_model_name": "metrics-model",
+    }
+    labels = {"node": "researcher", "model": "metrics-model"}
+    ttft_count = llm_time_to_first_token.count(**labels)
+
+    handler.on_chat_model_start({}, [[]], run_id=run_id, metadata=metadata)
+    handler.on_llm_new_token("Hel", run_id=run_id)
+    handler.on_llm_new_token("lo", run_id=run_id)
+    message = AIMessage(
+        content="Hello",
+        usage_metadata={"input_tokens": 12, "output_tokens": 3, "total_tokens": 15},
+    )
+    handler.on_llm_end(
+        LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=run_id
+    )
+
+    assert llm_time_to_first_token.count(**labels) == ttft_count + 1
+    assert llm_requests.value(**labels, status="success") == 1
+    assert llm_tokens.value(**labels, type="prompt") == 12
+    assert llm_tokens.value(**labels, type="completion") == 3
+
+
+def test_callback_records_tool_calls():
+    handler = MetricsCallbackHandler()
+    ok, failed = uuid4(), uuid4()
+    metadata = {"langgraph_node": "background_investigator"}
+    labels = {"tool": "metrics_search", "node": "background_investigator"}
+    handler.on_tool_start({"name": "metrics_search"}, "q", run_id=ok, metadata=metadata)
+    handler.on_tool_end("results", run_id=ok)
+    handler.on_tool_start(
+        {"name": "metrics_search"}, "q", run_id=failed, metadata=metadata
+    )
+    handler.on_tool_error(ValueError("boom"), run_id=failed)
+    assert tool_latency.count(**labels) == 2
+    assert tool_calls.value(**labels, status="success") == 1
+    assert tool_calls.value(**labels, status="error") == 1
+
+
+def test_callback_records_concurrent_calls_from_threads():
+    handler = MetricsCallbackHandler()
+    metadata = {"langgraph_node": "concurrent_node"}
+    labels = {"tool": "concurrent_tool", "node": "concurrent_node"}
+
+    def call(_):
+        run_id = uuid4()
+        handler.on_tool_start(
+            {"name": "concurrent_tool"}, "q", run_id=run_id, metadata=metadata
+        )
+        handler.on_tool_end("result", run_id=run_id)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(call, range(400)))
+
+    assert tool_calls.value(**labels, status="success") == 400
+    assert tool_latency.count(**labels) == 400
+    assert not handler._tool_runs
@@ -0,0 +1,90 @@
+# Copyright (c) 2025 Bytedance Ltd. and/or its affiliates
+# SPDX-License-Identifier: MIT
+
+import time
+
+from src.utils.question_cache import (
+    QuestionCache,
+    jaccard,
+    minhash,
+    question_shingles,
+)
+
+
+def test_question_shingles_normalize_case_width_and_filler_words():
+    assert question_shingles("Tell me about the Ｑuantum computing!") == {
+        "quantum",
+        "computing",
+    }
+    assert question_shingles("量子计算") == {"量", "子", "计", "算"}
+
+
+def test_minhash_is_deterministic_and_tracks_similarity():
+    a = question_shingles("How does quantum computing impact cryptography")
+    b = question_shingles("How does quantum computing impact modern cryptography")
+    c = question_shingles("What are the current trends in cybersecurity")
+    assert minhash(a) == minhash(frozenset(a))
+
+    def agreement(x, y):
+        return sum(i == j for i, j in zip(minhash(x), minhash(y)))
+
+    assert agreement(a, b) > agreement(a, c)
+    assert jaccard(a, b) == 6 / 7
+
+
+def test_lookup_returns_value_of_similar_question():
+    cache = QuestionCache(similarity=0.8)
+    cache.store(
+        "How does quantum computing impact cryptography?", "en-US", "plan", "plan"
+    )
+    assert (
+        cache.lookup("how does Quantum Computing impact cryptography", "en-US", "plan")
+        == "plan"
+    )
+    assert (
+        cache.lookup(
+            "How does quantum computing impact modern cryptography", "en-US", "plan"
+        )
+        == "plan"
+    )
+    assert (
+        cache.lookup("How does quantum computing impact finance", "en-US", "plan")
+        is None
+    )
+    assert cache.stats()["hits"] == {"plan": 2}
+    assert cache.stats()["misses"] == {"plan": 1}
+
+
+def test_lookup_matches_locale_and_kind():
+    cache = QuestionCache()
+    cache.store("What are the trends in cybersecurity", "en-US", "plan", "plan")
+    assert cache.lookup("What are the trends in cybersecurity", "zh-CN", "plan") is None
+    assert (
+        cache.lookup("What are the trends in cybersecurity", "en-US", "report/news")
+        is None
+    )
+
+
+def test_values_expire_after_ttl(monkeypatch):
+    cache = QuestionCache(ttl=60)
+    cache.store("What are the trends in cybersecurity", "en-US", "plan", "plan")
+    now = time.time()
+    monkeypatch.setattr("src.utils.question_cache.time.time", lambda: now + 120)
+    assert cache.lookup("What are the trends in cybersecurity", "en-US", "plan") is None
+
+    # Storing the same value again does not refresh it
+    monkeypatch.setattr("src.utils.question_cache.time.time", lambda: now + 30)
+    cache.store("What are the trends in cybersecurity", "en-US", "plan", "plan")
+    monkeypatch.setattr("src.utils.question_cache.time.time", lambda: now + 90)
+    assert cache.lookup("What are the trends in cybersecurity", "en-US", "plan") is None
+
+
+def test_least_recently_used_questions_are_dropped():
+    cache = QuestionCache(max_entries=2)
+    cache.store("quantum computing cryptography", "en-US", "plan", "1")
+    cache.store("renewable energy technology", "en-US", "plan", "2")
+    cache.lookup("quantum computing cryptography", "en-US", "plan")
+    cache.store("blockchain outside cryptocurrency", "en-US", "plan", "3")
+    assert cache.stats()["size"] == 2
+    assert cache.lookup("renewable energy technology", "en-US", "plan") is None
+    assert cache.lookup("quantum computing cryptography", "en-US", "plan") == "1"